@@ -1,16 +1,20 @@
 import os
+import re
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm
 from utilities.common_agent_library import create_agent
+from utilities.response_cache import ResponseCache
+from utilities.catalog import CatalogFile, PriceCatalog, make_catalog_tools, parse_menu_text
 
 # 1. Load environment variables
 load_dotenv()
 
 # 2. Define the LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = get_llm("gpt-4o-mini", temperature=0)
 
 # 3. Define the Agent's Specific Data and Tools
-# The catalog is passed as a string, as requested.
+# The built-in menu; set PRICE_CATALOG_PATH to a CSV/JSON file to serve a real
+# catalog instead (it is reloaded when the file changes).
 PRICE_CATALOG_DATA = """
 --- Restaurant Menu ---
 Beverages:
@@ -36,36 +40,64 @@ Desserts:
 - Chocolate Lava Cake: $8.00
 - Ice Cream Sundae: $6.50
 """
-tools = [] # This agent doesn't need any special tools
+PRICE_CATALOG_PATH = os.getenv("PRICE_CATALOG_PATH")
+
+if PRICE_CATALOG_PATH:
+    get_catalog = CatalogFile(PRICE_CATALOG_PATH).get
+else:
+    _catalog = PriceCatalog(parse_menu_text(PRICE_CATALOG_DATA))
+
+    def get_catalog() -> PriceCatalog:
+        return _catalog
+
+# The agent fetches only the items it needs instead of reading the whole menu
+tools = make_catalog_tools(get_catalog)
 
 # 4. Define the Agent's Specific System Message
-system_message_content = f"""
+system_message_content = """
 You are a restaurant price catalog agent. Your task is to answer user questions
-about menu items and their prices using the provided catalog data.
+about menu items and their prices.
 
-Price Catalog:
-{PRICE_CATALOG_DATA}
+Use `lookup_price` to get the price of a specific item and `search_menu` to
+find items by keyword or category; `search_menu` without arguments lists the
+menu categories.
 
-Respond concisely and in a helpful manner. Do not mention items that are not in the catalog.
+Respond concisely and in a helpful manner. Do not mention items that the tools did not return.
 """
 
 # 5. Create the Agent using the common library
 price_catalog_agent = create_agent(
     llm=llm,
     system_message_content=system_message_content,
-    tools=tools
+    tools=tools,
+    # Answers to repeated questions are cached
+    response_cache=ResponseCache(),
 )
 
+# 6. Routing hints: the multi-agent router sends questions matching these patterns
+# here. Only price wording and category names (singular or plural): item names
+# would grow the pattern with the catalog and go stale when it reloads; other
+# questions about items reach this agent through the router's LLM classifier.
+description = "Restaurant menu: which items are available and what they cost."
+routing_keywords = [r"prices?", r"costs?", r"how much", r"menu", r"cheap\w*", r"expensive"] + sorted({
+    re.escape(category.lower().removesuffix("s")) + "s?" for category in get_catalog().categories()
+})
+
 '''
 # Example Usage
-if __name__ == "__main__":
+import asyncio
+
+async def main():
     print("Price Catalog Agent created!")
-    for s in price_catalog_agent.stream({"messages": [("user", "How much is the Classic Cheeseburger?")]}):
+    async for s in price_catalog_agent.astream({"messages": [("user", "How much is the Classic Cheeseburger?")]}):
         print(s)
     print("\n---")
-    for s in price_catalog_agent.stream({"messages": [("user", "What kind of desserts do you have?")]}):
+    async for s in price_catalog_agent.astream({"messages": [("user", "What kind of desserts do you have?")]}):
         print(s)
     print("\n---")
-    for s in price_catalog_agent.stream({"messages": [("user", "Do you have French onion soup?")]}):
+    async for s in price_catalog_agent.astream({"messages": [("user", "Do you have French onion soup?")]}):
         print(s)
+
+if __name__ == "__main__":
+    asyncio.run(main())
 '''
\ No newline at end of file
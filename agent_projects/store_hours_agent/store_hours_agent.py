@@ -1,15 +1,17 @@
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm
 from langchain_core.tools import tool
 from utilities.common_agent_library import create_agent
+from utilities.response_cache import ResponseCache
+from utilities.schedule import StoreHoursRouter, WeeklySchedule
 
 # 1. Load environment variables
 load_dotenv()
 
 # 2. Define the LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = get_llm("gpt-4o-mini", temperature=0)
 
 # 3. Define the Agent's Specific Data and Tools
 STORE_HOURS_DATA = """
@@ -33,6 +35,10 @@ def get_current_datetime_tool() -> str:
 
 tools = [get_current_datetime_tool]
 
+# Common questions ("open now?", "hours on Friday?") are answered straight
+# from the parsed schedule; everything else goes to the LLM.
+store_hours_router = StoreHoursRouter(WeeklySchedule.parse(STORE_HOURS_DATA))
+
 # 4. Define the Agent's Specific System Message
 system_message_content = f"""
 You are a store hours agent. Your task is to determine if the store is open 
@@ -51,16 +57,31 @@ Respond concisely and in a friendly manner.
 store_hours_agent = create_agent(
     llm=llm,
     system_message_content=system_message_content,
-    tools=tools
+    tools=tools,
+    # Answers to repeated questions are cached; results of the clock tool never are
+    response_cache=ResponseCache(bypass_tools=[get_current_datetime_tool.name]),
+    fast_path=store_hours_router.answer,
 )
 
+# 6. Routing hints: the multi-agent router sends questions matching these patterns here
+description = "Store opening hours: whether the store is open on a given day or at a given time."
+routing_keywords = [
+    r"open\w*", r"clos(e|ed|es|ing)", r"hours?", r"now", r"today", r"tonight", r"tomorrow",
+    r"weekends?", r"(mon|tues|wednes|thurs|fri|satur|sun)days?",
+]
+
 '''
 # Example Usage
-if __name__ == "__main__":
+import asyncio
+
+async def main():
     print("Store Hours Agent created!")
-    for s in store_hours_agent.stream({"messages": [("user", "Is the store open now?")]}):
+    async for s in store_hours_agent.astream({"messages": [("user", "Is the store open now?")]}):
         print(s)
     print("\n---")
-    for s in store_hours_agent.stream({"messages": [("user", "What are the hours on Sunday?")]}):
+    async for s in store_hours_agent.astream({"messages": [("user", "What are the hours on Sunday?")]}):
         print(s)
+
+if __name__ == "__main__":
+    asyncio.run(main())
 '''
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""
+Offline latency and throughput benchmark for every API endpoint.
+
+Each API is started in its own uvicorn process with LLM_PROVIDER=fake, so
+its models are FakeChatModels with FAKE_LLM_LATENCY seconds to first token
+and FAKE_LLM_TOKENS_PER_SECOND generation speed; the multi-agent API's
+agent is scripted to call its tool once before answering. For every
+endpoint and concurrency level, `concurrency` clients each send
+`--requests` requests back to back after one warm-up request, and the run
+reports:
+- latency p50/p95/p99 (full response), in ms;
+- time to first event p50/p95/p99 for streaming endpoints, in ms;
+- throughput in requests/s and failed requests;
+- the server's resident memory after the level, and its peak.
+
+Results are written as JSON (--output). With --baseline, they are compared
+to an earlier results file and the run exits with status 1 if a p95
+latency, p95 time to first event or throughput got worse by more than
+--tolerance, so it can gate a CI job.
+
+Run from the repository root:
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --targets multi_agent --concurrency 1 16 64 \\
+        --output new.json --baseline old.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, List, NamedTuple, Optional
+import httpx
+
+HOST = "127.0.0.1"
+BASE_PORT = 8771
+LLM_LATENCY = 0.2
+TOKENS_PER_SECOND = 200
+CONCURRENCY_LEVELS = [1, 8, 32]
+REQUESTS_PER_CLIENT = 10
+
+_ids = itertools.count()
+
+
+def _messages(text: str) -> list:
+    # A fresh question per request, so response caches and fast paths don't skip the model
+    return [{"role": "human", "content": f"Request {next(_ids)}: {text}"}]
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+    body: Callable[[], dict]
+    streaming: bool
+
+
+class Target(NamedTuple):
+    app: str
+    endpoints: List[Endpoint]
+    env: dict = {}
+
+
+TARGETS = {
+    "chatbot_api": Target("chatbot_api.chatbot_api:api", [
+        Endpoint("chat", "/chat", lambda: {"message": "Hello!", "thread_id": f"bench-{next(_ids)}"}, True),
+        Endpoint("chat tokens", "/chat",
+                 lambda: {"message": "Hello!", "thread_id": f"bench-{next(_ids)}", "mode": "tokens"}, True),
+    ]),
+    "chatbot_streaming_api": Target("chatbot_streaming_api.chatbot_streaming_api:app", [
+        Endpoint("chat", "/chat", lambda: {"messages": _messages("Write a slogan")}, False),
+        Endpoint("stream", "/stream", lambda: {"messages": _messages("Write a slogan")}, True),
+        Endpoint("stream tokens", "/stream", lambda: {"messages": _messages("Write a slogan"), "mode": "tokens"}, True),
+    ]),
+    "multi_agent": Target("chatbot_multi_project_api.chatbot_multi_agent_api:app", [
+        Endpoint("chat", "/chat", lambda: {"agent": "store_hours", "messages": _messages("Do you have parking?")}, False),
+        Endpoint("stream tokens", "/stream",
+                 lambda: {"agent": "store_hours", "messages": _messages("Do you have parking?"), "mode": "tokens"}, True),
+    ], {"FAKE_LLM_SCRIPT": json.dumps([
+        {"tool_calls": [{"name": "get_current_datetime_tool"}]},
+        "Yes, there is free parking behind the store.",
+    ])}),
+    "multi_graph": Target("chatbot_multi_project_api.chatbot_multi_graph_api:app", [
+        Endpoint("chat", "/chat", lambda: {"graph": "fine_writer", "messages": _messages("Write a slogan")}, False),
+        Endpoint("stream tokens", "/stream",
+                 lambda: {"graph": "fine_writer", "messages": _messages("Write a slogan"), "mode": "tokens"}, True),
+    ]),
+}
+
+
+def memory_mb(pid: int) -> dict:
+    """Current and peak resident memory of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {"rss_mb": None, "peak_rss_mb": None}
+    kb = lambda name: int(fields[name].split()[0]) if name in fields else None
+    to_mb = lambda value: value / 1024 if value is not None else None
+    return {"rss_mb": to_mb(kb("VmRSS")), "peak_rss_mb": to_mb(kb("VmHWM"))}
+
+
+def start_server(target: Target, port: int, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(args.latency),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "PROJECT_HOT_RELOAD": "0",
+        **target.env,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target.app, "--host", HOST, "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{port}/openapi.json")
+            return server
+        except httpx.ConnectError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"{target.app} did not start")
+            time.sleep(0.1)
+
+
+async def request(client: httpx.AsyncClient, endpoint: Endpoint) -> tuple:
+    """Sends one request; returns (latency, time to first event or None)."""
+    started = time.perf_counter()
+    first_event = None
+    async with client.stream("POST", endpoint.path, json=endpoint.body()) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_event is None and endpoint.streaming and line.startswith("data:"):
+                first_event = time.perf_counter() - started
+            if line.startswith("event: error"):
+                raise RuntimeError("stream ended with an error event")
+    return time.perf_counter() - started, first_event
+
+
+async def run_level(port: int, endpoint: Endpoint, concurrency: int, requests_per_client: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{port}", limits=limits, timeout=120) as client:
+        await request(client, endpoint)
+        latencies, first_events, errors = [], [], []
+
+        async def worker():
+            for _ in range(requests_per_client):
+                try:
+                    latency, first_event = await request(client, endpoint)
+                except Exception as e:
+                    errors.append(repr(e))
+                    continue
+                latencies.append(latency)
+                if first_event is not None:
+                    first_events.append(first_event)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": concurrency * requests_per_client,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": summarize(latencies),
+        "ttft_ms": summarize(first_events) if endpoint.streaming else None,
+    }
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile of a sorted list, 0 <= q <= 1."""
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(seconds: List[float]) -> Optional[dict]:
+    if not seconds:
+        return None
+    ordered = sorted(value * 1000 for value in seconds)
+    return {
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "mean": sum(ordered) / len(ordered),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """Descriptions of the measurements that regressed against `baseline`."""
+    key = lambda result: (result["target"], result["endpoint"], result["concurrency"])
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        label = f"{result['target']} {result['endpoint']} x{result['concurrency']}"
+        for metric in ("latency_ms", "ttft_ms"):
+            old, new = (before.get(metric) or {}).get("p95"), (result.get(metric) or {}).get("p95")
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{label}: {metric} p95 {old:.1f} -> {new:.1f}")
+        old, new = before["throughput_rps"], result["throughput_rps"]
+        if old and new < old * (1 - tolerance):
+            regressions.append(f"{label}: throughput {old:.1f} -> {new:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=CONCURRENCY_LEVELS)
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_CLIENT, help="requests per client and level")
+    parser.add_argument("--latency", type=float, default=LLM_LATENCY, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=TOKENS_PER_SECOND)
+    parser.add_argument("--output", default="bench_api_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results, memory = [], {}
+    print(f"fake LLM: {args.latency}s to first token, {args.tokens_per_second} tokens/s")
+    print(f"{'target':>22} {'endpoint':>14} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'ttft p50':>9} {'ttft p95':>9} {'errors':>7} {'RSS MB':>7}")
+    for index, name in enumerate(args.targets):
+        target = TARGETS[name]
+        port = BASE_PORT + index
+        server = start_server(target, port, args)
+        try:
+            for endpoint in target.endpoints:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_level(port, endpoint, concurrency, args.requests))
+                    result.update(target=name, endpoint=endpoint.name, concurrency=concurrency,
+                                  rss_mb=memory_mb(server.pid)["rss_mb"])
+                    results.append(result)
+                    latency = result["latency_ms"] or {}
+                    ttft = result["ttft_ms"] or {}
+                    cell = lambda value, width: f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+                    print(f"{name:>22} {endpoint.name:>14} {concurrency:>5} {result['throughput_rps']:>8.1f} "
+                          f"{cell(latency.get('p50'), 8)} {cell(latency.get('p95'), 8)} {cell(latency.get('p99'), 8)} "
+                          f"{cell(ttft.get('p50'), 9)} {cell(ttft.get('p95'), 9)} {result['errors']:>7} "
+                          f"{cell(result['rss_mb'], 7)}")
+            memory[name] = memory_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "fake_llm": {"latency": args.latency, "tokens_per_second": args.tokens_per_second},
+            "requests_per_client": args.requests,
+        },
+        "results": results,
+        "memory": memory,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
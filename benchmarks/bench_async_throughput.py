@@ -0,0 +1,80 @@
+"""
+Measures /chat throughput of the multi-agent API on a single uvicorn worker.
+
+A fake LLM with a fixed delay is registered as an extra agent, so the numbers
+show how many requests the worker overlaps rather than provider speed. With
+async graphs, requests/sec should grow roughly linearly with concurrency.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_throughput
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+import httpx
+import uvicorn
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from chatbot_multi_project_api import chatbot_multi_agent_api as api
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+
+HOST = "127.0.0.1"
+PORT = 8765
+LLM_LATENCY = 0.5
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+REQUESTS_PER_CLIENT = 4
+
+
+def serve():
+    """Runs the API with a fake-LLM agent on a single uvicorn worker."""
+    api.agents["bench"] = create_agent(
+        llm=FakeChatModel(latency=LLM_LATENCY),
+        system_message_content="You are a benchmark agent.",
+        tools=[],
+    )
+    uvicorn.run(api.app, host=HOST, port=PORT, workers=1, log_level="warning")
+
+
+def start_server() -> multiprocessing.Process:
+    """Starts the server in its own process so the load generator doesn't share its GIL."""
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{PORT}/agents")
+            return server
+        except httpx.ConnectError:
+            time.sleep(0.1)
+
+
+async def run_level(concurrency: int) -> float:
+    """Sends `concurrency` parallel clients and returns requests per second."""
+    payload = {"agent": "bench", "messages": [{"role": "human", "content": "Hello!"}]}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{PORT}", limits=limits, timeout=60) as client:
+        async def worker():
+            for _ in range(REQUESTS_PER_CLIENT):
+                response = await client.post("/chat", json=payload)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return concurrency * REQUESTS_PER_CLIENT / elapsed
+
+
+def main():
+    server = start_server()
+    print(f"Fake LLM latency: {LLM_LATENCY}s")
+    print(f"{'concurrency':>12} {'req/s':>10} {'ideal req/s':>12}")
+    for concurrency in CONCURRENCY_LEVELS:
+        throughput = asyncio.run(run_level(concurrency))
+        print(f"{concurrency:>12} {throughput:>10.2f} {concurrency / LLM_LATENCY:>12.2f}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares one-by-one /chat requests with a single /batch request.
+
+A fake LLM with a fixed delay is registered as an extra agent. The same
+items are sent once as sequential /chat calls (an eval script looping over
+a dataset) and then as one /batch request at several concurrency limits.
+For each run it prints wall time, items/sec and the time to the first
+NDJSON result. The sequential run sends SEQUENTIAL_ITEMS requests and its
+wall time is scaled up to ITEMS.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_throughput
+"""
+import json
+import multiprocessing
+import os
+import time
+import httpx
+import uvicorn
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("BATCH_MAX_CONCURRENCY", "128")
+
+from chatbot_multi_project_api import chatbot_multi_agent_api as api
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+
+HOST = "127.0.0.1"
+PORT = 8769
+LLM_LATENCY = 0.1
+ITEMS = 200
+SEQUENTIAL_ITEMS = 20
+CONCURRENCY_LEVELS = [1, 8, 32, 128]
+
+
+def serve():
+    """Runs the API with a fake-LLM agent on a single uvicorn worker."""
+    api.agents["bench"] = create_agent(
+        llm=FakeChatModel(latency=LLM_LATENCY),
+        system_message_content="You are a benchmark agent.",
+        tools=[],
+    )
+    uvicorn.run(api.app, host=HOST, port=PORT, workers=1, log_level="warning")
+
+
+def start_server() -> multiprocessing.Process:
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{PORT}/agents")
+            return server
+        except httpx.ConnectError:
+            time.sleep(0.1)
+
+
+def make_items(count: int) -> list:
+    return [
+        {"agent": "bench", "id": str(i), "messages": [{"role": "human", "content": f"Question {i}"}]}
+        for i in range(count)
+    ]
+
+
+def run_sequential(client: httpx.Client, items: list) -> float:
+    started = time.perf_counter()
+    for item in items:
+        client.post("/chat", json=item).raise_for_status()
+    return time.perf_counter() - started
+
+
+def run_batch(client: httpx.Client, items: list, concurrency: int) -> tuple:
+    """Returns (wall seconds, seconds to first result, failed items)."""
+    started, first, summary = time.perf_counter(), None, None
+    with client.stream("POST", "/batch", json={"items": items, "max_concurrency": concurrency}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if first is None:
+                first = time.perf_counter() - started
+            summary = result.get("summary", summary)
+    return time.perf_counter() - started, first, summary["failed"]
+
+
+def main():
+    server = start_server()
+    with httpx.Client(base_url=f"http://{HOST}:{PORT}", timeout=300) as client:
+        run_batch(client, make_items(8), 8)  # warm-up
+
+        sequential = run_sequential(client, make_items(SEQUENTIAL_ITEMS))
+        print(f"LLM latency {LLM_LATENCY}s, {ITEMS} items per batch")
+        print(f"{'run':>16} {'wall s':>8} {'items/s':>8} {'first result s':>15} {'failed':>7}")
+        print(f"{'sequential /chat':>16} {sequential * ITEMS / SEQUENTIAL_ITEMS:>8.2f} "
+              f"{SEQUENTIAL_ITEMS / sequential:>8.1f} {sequential / SEQUENTIAL_ITEMS:>15.3f} {0:>7}")
+
+        for concurrency in CONCURRENCY_LEVELS:
+            wall, first, failed = run_batch(client, make_items(ITEMS), concurrency)
+            print(f"{'batch x' + str(concurrency):>16} {wall:>8.2f} {ITEMS / wall:>8.1f} {first:>15.3f} {failed:>7}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Measures multi-agent API cold start with eager vs lazy project loading.
+
+Synthetic agent projects (each building a create_agent graph with a few
+tools) are generated in a temporary directory next to the real ones. Every
+PROJECT_WARMUP mode is then started in a fresh Python process, which reports:
+- time until the app accepts requests (imports + lifespan startup);
+- time until it reports ready on /ready (warm-up finished);
+- latency of the first /chat request to one agent, sent once ready;
+- peak RSS after that request.
+
+Run from the repository root:
+    python -m benchmarks.bench_cold_start
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECTS = 30
+MODES = ["eager", "background", "lazy"]
+
+PROJECT_TEMPLATE = '''
+from langchain_core.tools import tool
+from utilities.llm_registry import get_llm
+from utilities.common_agent_library import create_agent
+
+{tools}
+
+bench{index}_agent = create_agent(
+    llm=get_llm("gpt-4o-mini", temperature=0),
+    system_message_content="You are synthetic agent {index}. " * 50,
+    tools=[{tool_names}],
+)
+'''
+
+TOOL_TEMPLATE = '''
+@tool
+def tool_{index}_{n}(query: str, limit: int = 5) -> str:
+    """Synthetic tool {n} of agent {index}."""
+    return query
+'''
+
+
+def write_projects(directory: str):
+    for index in range(PROJECTS):
+        project = os.path.join(directory, f"bench{index}_agent")
+        os.makedirs(project)
+        tools = "".join(TOOL_TEMPLATE.format(index=index, n=n) for n in range(5))
+        names = ", ".join(f"tool_{index}_{n}" for n in range(5))
+        with open(os.path.join(project, f"bench{index}_agent.py"), "w") as f:
+            f.write(PROJECT_TEMPLATE.format(index=index, tools=tools, tool_names=names))
+
+
+def child(mode: str, directory: str):
+    """Runs in a fresh process: starts the app and prints its timings as JSON."""
+    started = time.perf_counter()
+    import resource
+    from fastapi.testclient import TestClient
+    from chatbot_multi_project_api import chatbot_multi_agent_api as api
+    from chatbot_multi_project_api.registry import ProjectRegistry
+    from chatbot_multi_project_api.warmup import Warmup
+
+    api.agents = ProjectRegistry(
+        os.path.join(directory, "*_agent", "*_agent.py"),
+        name_for=lambda path: os.path.basename(path).replace("_agent.py", ""),
+        build=lambda module, name: getattr(module, f"{name}_agent", None),
+    )
+    api.agents.add_warm_step("sessions", api.sessions.graph)
+    api.warmup = Warmup(api.agents, mode)
+    with TestClient(api.app) as client:
+        accepting = time.perf_counter() - started
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        request_started = time.perf_counter()
+        response = client.post("/chat", json={"agent": "bench7", "messages": [{"role": "human", "content": "Hi"}]})
+        response.raise_for_status()
+        first_request = time.perf_counter() - request_started
+        loaded = sum(status["loaded"] for status in api.agents.status().values())
+
+    print(json.dumps({
+        "accepting": accepting,
+        "ready": ready,
+        "first_request": first_request,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "loaded": loaded,
+    }))
+
+
+def main():
+    env = {**os.environ, "LLM_PROVIDER": "fake", "OPENAI_API_KEY": "sk-benchmark", "PROJECT_HOT_RELOAD": "0"}
+    with tempfile.TemporaryDirectory() as directory:
+        write_projects(directory)
+        print(f"{PROJECTS} synthetic agents")
+        print(f"{'mode':>11} {'started s':>10} {'ready s':>8} {'first request s':>16} {'peak RSS MB':>12} {'loaded':>7}")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", mode, directory],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(next(line for line in output.splitlines() if line.startswith("{")))
+            print(f"{mode:>11} {result['accepting']:>10.2f} {result['ready']:>8.2f} {result['first_request']:>16.3f} "
+                  f"{result['rss_mb']:>12.1f} {result['loaded']:>7}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
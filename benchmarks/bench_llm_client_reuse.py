@@ -0,0 +1,56 @@
+"""
+Compares per-turn overhead of building a ChatOpenAI client on every turn
+against reusing the pooled client from utilities.llm_registry.
+
+Both variants talk to a local OpenAI-compatible stub server, so the numbers
+reflect client construction and connection handling rather than model time.
+The stub speaks plain HTTP; against a real provider the pooled client also
+saves a TLS handshake whenever a new connection would have been opened.
+
+Run from the repository root:
+    python -m benchmarks.bench_llm_client_reuse
+"""
+import asyncio
+import statistics
+import time
+from langchain_openai import ChatOpenAI
+from benchmarks.stub_openai_server import BASE_URL, start_stub_server
+from utilities.llm_registry import get_llm, aclose_llm_clients
+
+TURNS = 300
+MODEL_PARAMS = {"temperature": 0, "base_url": BASE_URL, "api_key": "sk-stub"}
+
+
+async def run_turns(make_model) -> list:
+    """Runs TURNS sequential chat turns and returns per-turn latencies in ms."""
+    latencies = []
+    for _ in range(TURNS):
+        started = time.perf_counter()
+        model = make_model()
+        await model.ainvoke("Hello!")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    print(f"{label:<22} mean {statistics.mean(latencies):7.3f} ms   "
+          f"p50 {statistics.median(latencies):7.3f} ms   "
+          f"p95 {statistics.quantiles(latencies, n=20)[-1]:7.3f} ms")
+
+
+async def main():
+    # Warm both code paths once so imports and first connections don't skew results.
+    await ChatOpenAI(model="gpt-4o", **MODEL_PARAMS).ainvoke("warm-up")
+    await get_llm("gpt-4o", **MODEL_PARAMS).ainvoke("warm-up")
+
+    report("new client per turn", await run_turns(lambda: ChatOpenAI(model="gpt-4o", **MODEL_PARAMS)))
+    report("pooled shared client", await run_turns(lambda: get_llm("gpt-4o", **MODEL_PARAMS)))
+    await aclose_llm_clients()
+
+
+if __name__ == "__main__":
+    server = start_stub_server()
+    try:
+        asyncio.run(main())
+    finally:
+        server.terminate()
@@ -0,0 +1,97 @@
+"""
+Measures the indexed price catalog on synthetic 10k- and 100k-item menus.
+
+For each size it reports index build time, exact and fuzzy lookup latency,
+and how many prompt tokens the catalog costs per LLM call: the whole menu
+pasted into the system prompt versus a typical `lookup_price` tool result.
+
+Run from the repository root:
+    python -m benchmarks.bench_price_catalog
+"""
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.messages import SystemMessage, ToolMessage
+from utilities.catalog import CatalogFile, MenuItem, PriceCatalog, make_catalog_tools
+
+SIZES = [10_000, 100_000]
+QUERIES = 500
+ADJECTIVES = ["classic", "spicy", "smoked", "grilled", "crispy", "vegan", "double", "mini", "house", "garlic",
+              "honey", "lemon", "truffle", "bbq", "cajun", "herb", "sweet", "roasted", "fresh", "loaded"]
+FOODS = ["burger", "pizza", "salad", "wrap", "taco", "soup", "sandwich", "noodles", "curry", "pasta",
+         "wings", "fries", "cake", "sundae", "smoothie", "latte", "tea", "soda", "burrito", "risotto"]
+CATEGORIES = ["Beverages", "Appetizers", "Main Courses", "Desserts", "Sides", "Salads", "Soups", "Kids"]
+
+
+def synthetic_items(count: int, rng: random.Random) -> list:
+    items = []
+    for i in range(count):
+        name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(ADJECTIVES).title()} {rng.choice(FOODS).title()} {i}"
+        items.append(MenuItem(name=name, price=round(rng.uniform(1, 40), 2), category=rng.choice(CATEGORIES)))
+    return items
+
+
+def misspell(text: str, rng: random.Random) -> str:
+    """Drops one letter from a random word longer than three letters."""
+    words = text.split()
+    long_words = [i for i, w in enumerate(words) if len(w) > 3 and not w.isdigit()]
+    i = rng.choice(long_words)
+    cut = rng.randrange(1, len(words[i]))
+    words[i] = words[i][:cut] + words[i][cut + 1:]
+    return " ".join(words)
+
+
+def timed_us(fn, args: list) -> float:
+    latencies = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(latencies)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'items':>8} {'build s':>8} {'exact us':>9} {'fuzzy us':>9} {'fuzzy hit':>10} "
+          f"{'reload s':>9} {'prompt tokens':>14} {'tool tokens':>12}")
+    for size in SIZES:
+        items = synthetic_items(size, rng)
+
+        started = time.perf_counter()
+        catalog = PriceCatalog(items)
+        build = time.perf_counter() - started
+
+        sample = rng.sample(items, QUERIES)
+        exact = timed_us(catalog.get, [item.name.lower() for item in sample])
+        typos = [(misspell(item.name, rng), item) for item in sample]
+        fuzzy = timed_us(lambda query: catalog.search(query, 3), [query for query, _ in typos])
+        hits = sum(item in catalog.search(query, 3) for query, item in typos) / QUERIES
+
+        # Hot reload from a JSON file of the same size
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.json")
+            with open(path, "w") as f:
+                json.dump([{"name": i.name, "price": i.price, "category": i.category} for i in items], f)
+            catalog_file = CatalogFile(path, check_interval=0)
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+            started = time.perf_counter()
+            catalog_file.get()
+            reload = time.perf_counter() - started
+
+        # Prompt cost per LLM call: the whole menu vs. one tool result
+        menu_text = "\n".join(f"- {item.name}: ${item.price:.2f}" for item in items)
+        prompt_tokens = count_tokens_approximately([SystemMessage(content=menu_text)])
+        lookup_price = make_catalog_tools(lambda: catalog)[0]
+        result = lookup_price.invoke({"item_name": typos[0][0]})
+        tool_tokens = count_tokens_approximately([ToolMessage(content=result, tool_call_id="bench")])
+
+        print(f"{size:>8} {build:>8.2f} {exact:>9.1f} {fuzzy:>9.1f} {hits:>10.0%} "
+              f"{reload:>9.2f} {prompt_tokens:>14} {tool_tokens:>12}")
+
+
+if __name__ == "__main__":
+    main()
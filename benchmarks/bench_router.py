@@ -0,0 +1,88 @@
+"""
+Compares the multi-agent router's parallel dispatch with asking the same
+agents one after the other.
+
+Each agent is a one-node chat graph on a fake LLM with LLM_LATENCY seconds
+to first token and TOKENS_PER_SECOND generation speed, and routing
+keywords naming a topic. A question joins one clause per topic ("What
+about topic0 and what about topic1?"), so the router's rules send one
+sub-question to each agent. For each number of agents it prints:
+- the router's wall time, and the speedup it reports for the request;
+- the time of dispatching the same sub-questions sequentially;
+- the measured speedup of the router over sequential dispatch.
+
+Run from the repository root:
+    python -m benchmarks.bench_router
+"""
+import asyncio
+import os
+import time
+from typing import Annotated, List, TypedDict
+from langchain_core.messages import BaseMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from utilities.fake_llm import FakeChatModel
+from chatbot_multi_project_api.router import create_router_graph
+
+LLM_LATENCY = 0.3
+TOKENS_PER_SECOND = 200
+AGENTS = [1, 2, 3, 4]
+REPEAT = 3
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+
+
+def chat_graph(llm):
+    async def chat(state: State) -> State:
+        return {"messages": [await llm.ainvoke(state["messages"])]}
+
+    graph = StateGraph(State)
+    graph.add_node("chat", chat)
+    graph.add_edge(START, "chat")
+    graph.add_edge("chat", END)
+    return graph.compile()
+
+
+class Agents(dict):
+    """Prebuilt agents with routing keywords, standing in for the agent registry."""
+
+    async def aget(self, name: str):
+        return self[name]
+
+    def info(self, name: str) -> dict:
+        return {"description": f"Questions about {name}", "routing_keywords": [name]}
+
+
+async def run(count: int) -> tuple:
+    llm = FakeChatModel(response=" ".join(["word"] * 40), latency=LLM_LATENCY, tokens_per_second=TOKENS_PER_SECOND)
+    agents = Agents({f"topic{i}": chat_graph(llm) for i in range(count)})
+    router = create_router_graph(agents, llm=llm)
+    question = " and ".join(f"what about {name}" for name in agents) + "?"
+
+    started = time.perf_counter()
+    final_state = await router.ainvoke({"messages": [HumanMessage(content=question)]})
+    routed = time.perf_counter() - started
+    report = final_state["messages"][-1].response_metadata["routing"]
+
+    started = time.perf_counter()
+    for route in report["routes"]:
+        await agents[route["agent"]].ainvoke({"messages": [HumanMessage(content=route["question"])]})
+    sequential = time.perf_counter() - started
+    return routed, report["speedup"], sequential
+
+
+def main():
+    print(f"fake LLM: {LLM_LATENCY}s to first token, {TOKENS_PER_SECOND} tokens/s, best of {REPEAT}")
+    print(f"{'agents':>6} {'router s':>9} {'reported x':>11} {'sequential s':>13} {'measured x':>11}")
+    for count in AGENTS:
+        routed, reported, sequential = min(asyncio.run(run(count)) for _ in range(REPEAT))
+        print(f"{count:>6} {routed:>9.2f} {reported:>11.2f} {sequential:>13.2f} {sequential / routed:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compares full-history resend with server-side sessions on the multi-agent API.
+
+A 100-turn conversation is played twice against a fake-LLM agent: once
+stateless, resending the whole `messages` array every turn, and once with a
+`session_id` and only the new message. For selected turns it prints the
+request body size and the server CPU time spent handling the request.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_requests
+"""
+import multiprocessing
+import os
+import time
+import uuid
+import httpx
+import uvicorn
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from chatbot_multi_project_api import chatbot_multi_agent_api as api
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+
+HOST = "127.0.0.1"
+PORT = 8768
+TURNS = 100
+REPORT_TURNS = [1, 10, 25, 50, 100]
+USER_MESSAGE = "Could you tell me a bit more about that? " * 5
+AI_RESPONSE = "Here is a detailed answer to your question. " * 10
+
+
+def serve():
+    """Runs the API with a fake-LLM agent and reports server CPU time per request."""
+    api.agents["bench"] = create_agent(
+        llm=FakeChatModel(response=AI_RESPONSE),
+        system_message_content="You are a benchmark agent.",
+        tools=[],
+    )
+
+    @api.app.middleware("http")
+    async def cpu_time(request, call_next):
+        started = time.process_time()
+        response = await call_next(request)
+        response.headers["X-Server-CPU-ms"] = f"{(time.process_time() - started) * 1000:.3f}"
+        return response
+
+    uvicorn.run(api.app, host=HOST, port=PORT, workers=1, log_level="warning")
+
+
+def start_server() -> multiprocessing.Process:
+    """Starts the server in its own process so client work isn't counted."""
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{PORT}/agents")
+            return server
+        except httpx.ConnectError:
+            time.sleep(0.1)
+
+
+def post(client: httpx.Client, body: dict) -> tuple:
+    """Sends one /chat request; returns (request bytes, server CPU ms, response)."""
+    request = client.build_request("POST", "/chat", json=body)
+    response = client.send(request)
+    response.raise_for_status()
+    return len(request.content), float(response.headers["X-Server-CPU-ms"]), response.json()
+
+
+def run_stateless(client: httpx.Client) -> list:
+    messages, results = [], []
+    for _ in range(TURNS):
+        messages.append({"role": "human", "content": USER_MESSAGE})
+        size, cpu_ms, data = post(client, {"agent": "bench", "messages": messages})
+        messages.append(data["messages"][-1])
+        results.append((size, cpu_ms))
+    return results
+
+
+def run_session(client: httpx.Client) -> list:
+    session_id, results = str(uuid.uuid4()), []
+    for _ in range(TURNS):
+        message = {"role": "human", "content": USER_MESSAGE}
+        size, cpu_ms, _ = post(client, {"agent": "bench", "session_id": session_id, "message": message})
+        results.append((size, cpu_ms))
+    return results
+
+
+def main():
+    server = start_server()
+    with httpx.Client(base_url=f"http://{HOST}:{PORT}", timeout=60) as client:
+        # Warm up imports and caches on the server before measuring
+        run_session(client)
+        stateless = run_stateless(client)
+        session = run_session(client)
+    server.terminate()
+
+    print(f"{'turn':>5} {'stateless bytes':>16} {'session bytes':>14} {'stateless cpu ms':>17} {'session cpu ms':>15}")
+    for turn in REPORT_TURNS:
+        (s_size, s_cpu), (p_size, p_cpu) = stateless[turn - 1], session[turn - 1]
+        print(f"{turn:>5} {s_size:>16} {p_size:>14} {s_cpu:>17.2f} {p_cpu:>15.2f}")
+    print(f"{'total':>5} {sum(r[0] for r in stateless):>16} {sum(r[0] for r in session):>14} "
+          f"{sum(r[1] for r in stateless):>17.2f} {sum(r[1] for r in session):>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
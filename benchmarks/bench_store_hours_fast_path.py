@@ -0,0 +1,104 @@
+"""
+Compares the store-hours agent with and without the schedule fast path.
+
+A canned question set runs through two agents built from the same prompt and
+tools: one that always calls the LLM and one that lets StoreHoursRouter answer
+first. The LLM is a scripted fake that, like the real model, calls
+get_current_datetime_tool before answering "now"/"today" questions, so those
+questions cost two LLM round-trips without the fast path.
+
+Run from the repository root:
+    python -m benchmarks.bench_store_hours_fast_path
+"""
+import asyncio
+import os
+import statistics
+import time
+from typing import Any, List, Optional
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent_projects.store_hours_agent import store_hours_agent as store_hours
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+
+LLM_LATENCY = 0.4
+QUESTIONS = [
+    "Is the store open now?",
+    "Are you open right now?",
+    "What are the hours on Sunday?",
+    "What are your hours on Friday?",
+    "Is the store open at 6pm on Friday?",
+    "Are you open on Saturday at 3:30 pm?",
+    "Are you open tomorrow?",
+    "When do you close today?",
+    "Is the store open on March 5 at noon?",
+    "What are your hours?",
+    "Is it open Monday or Tuesday?",
+    "Do you have parking?",
+]
+
+
+class ScriptedStoreHoursLLM(FakeChatModel):
+    """Calls the clock tool first for "now"/"today" questions, then answers."""
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        question = next(m for m in reversed(messages) if isinstance(m, HumanMessage)).content.lower()
+        needs_clock = any(word in question for word in ("now", "today"))
+        if needs_clock and not isinstance(messages[-1], ToolMessage):
+            call = {"name": "get_current_datetime_tool", "args": {}, "id": f"call_{len(messages)}"}
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[call]))])
+        return self._result()
+
+
+class LLMCallCounter(AsyncCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+async def run(agent) -> list:
+    """Returns (question, latency seconds, LLM calls) per question."""
+    results = []
+    for question in QUESTIONS:
+        counter = LLMCallCounter()
+        started = time.perf_counter()
+        await agent.ainvoke({"messages": [HumanMessage(content=question)]}, {"callbacks": [counter]})
+        results.append((question, time.perf_counter() - started, counter.calls))
+    return results
+
+
+def main():
+    llm = ScriptedStoreHoursLLM(response="The store is open.", latency=LLM_LATENCY)
+    agents = {
+        "llm only": create_agent(llm, store_hours.system_message_content, store_hours.tools),
+        "fast path": create_agent(llm, store_hours.system_message_content, store_hours.tools,
+                                  fast_path=store_hours.store_hours_router.answer),
+    }
+    results = {name: asyncio.run(run(agent)) for name, agent in agents.items()}
+
+    print(f"Fake LLM latency: {LLM_LATENCY}s")
+    print(f"{'question':<40} {'llm only ms':>12} {'calls':>6} {'fast path ms':>13} {'calls':>6}")
+    for (question, slow, slow_calls), (_, fast, fast_calls) in zip(results["llm only"], results["fast path"]):
+        print(f"{question:<40} {slow * 1000:>12.2f} {slow_calls:>6} {fast * 1000:>13.2f} {fast_calls:>6}")
+    for name, rows in results.items():
+        latencies = [row[1] * 1000 for row in rows]
+        print(f"{name}: median {statistics.median(latencies):.2f} ms, "
+              f"{sum(row[2] for row in rows) / len(rows):.2f} LLM calls per query")
+    router = store_hours.store_hours_router
+    started = time.perf_counter()
+    for _ in range(1000):
+        for question in QUESTIONS:
+            router.answer(question)
+    print(f"router alone: {(time.perf_counter() - started) / (1000 * len(QUESTIONS)) * 1e6:.1f} us per question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares the sequential and pipelined writer -> enhancer graphs.
+
+A fake LLM with LLM_LATENCY seconds to first token and TOKENS_PER_SECOND
+generation speed writes an answer of N paragraphs, and "enhances" any text
+by repeating it, so both steps take about as long. For each answer length
+it prints, per mode:
+- time until the first enhanced text reaches the client;
+- end-to-end time of the run;
+- the ideal sequential (writer + enhancer) and pipelined (about
+  max(writer, enhancer) plus one piece) times.
+
+Run from the repository root:
+    python -m benchmarks.bench_writer_pipeline
+"""
+import asyncio
+import os
+import time
+from langchain_core.messages import AIMessage, HumanMessage
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from utilities.fake_llm import FakeChatModel
+from utilities.streaming import stream_token_events
+from utilities.writer_pipeline import create_writer_graph
+
+LLM_LATENCY = 0.3
+TOKENS_PER_SECOND = 200
+PARAGRAPH_WORDS = 60
+PARAGRAPHS = [1, 4, 8, 16]
+ENHANCE_PROMPT = "Make this more fun: {text}"
+
+
+class EchoWriterModel(FakeChatModel):
+    """Writes `paragraphs` paragraphs, and answers an enhance prompt with its text."""
+    paragraphs: int = 4
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        prefix = ENHANCE_PROMPT.split("{text}")[0]
+        if prompt.startswith(prefix):
+            return AIMessage(content=prompt[len(prefix):])
+        paragraph = " ".join(f"word{i}" for i in range(PARAGRAPH_WORDS - 1)) + " end."
+        return AIMessage(content="\n\n".join([paragraph] * self.paragraphs))
+
+
+async def run(graph) -> tuple:
+    """(seconds to the first enhanced text, total seconds) of one streamed run."""
+    started = time.perf_counter()
+    first_enhanced = None
+    async for event, data in stream_token_events(graph, {"messages": [HumanMessage(content="Write a story")]}):
+        if event == "token" and data["node"] == "enhancer" and first_enhanced is None:
+            first_enhanced = time.perf_counter() - started
+    return first_enhanced, time.perf_counter() - started
+
+
+def main():
+    step = LLM_LATENCY + PARAGRAPH_WORDS / TOKENS_PER_SECOND
+    print(f"fake LLM: {LLM_LATENCY}s to first token, {TOKENS_PER_SECOND} tokens/s, {PARAGRAPH_WORDS} tokens per paragraph")
+    print(f"{'paragraphs':>10} {'mode':>10} {'first enhanced s':>17} {'total s':>8} {'ideal s':>8}")
+    for paragraphs in PARAGRAPHS:
+        llm = EchoWriterModel(paragraphs=paragraphs, latency=LLM_LATENCY, tokens_per_second=TOKENS_PER_SECOND)
+        writer_seconds = LLM_LATENCY + paragraphs * PARAGRAPH_WORDS / TOKENS_PER_SECOND
+        ideal = {"sequential": 2 * writer_seconds, "pipelined": writer_seconds + step}
+        for mode in ["sequential", "pipelined"]:
+            # One paragraph per piece, so the enhancer starts after the first one
+            graph = create_writer_graph(llm, ENHANCE_PROMPT, pipelined=mode == "pipelined", min_chars=100)
+            first_enhanced, total = asyncio.run(run(graph))
+            print(f"{paragraphs:>10} {mode:>10} {first_enhanced:>17.2f} {total:>8.2f} {ideal[mode]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Load test for chatbot_api with the SQLite checkpointer across several
+uvicorn worker processes.
+
+Many conversations (thread_ids) run at once. Their turns land on arbitrary
+workers, so each turn only sees earlier history if the checkpoint store is
+shared. At the end the test reads every thread back from the database and
+checks that no turn was lost.
+
+Run from the repository root:
+    python -m benchmarks.load_test_checkpointer
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+from utilities.checkpointers import SQLiteCheckpointer
+
+PORT = 8767
+WORKERS = 4
+THREADS = 200
+TURNS_PER_THREAD = 5
+MAX_IN_FLIGHT = 64
+FAKE_LLM_LATENCY = "0.05"
+
+
+def start_server(db_path: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="sk-load-test",
+        LLM_PROVIDER="fake",
+        FAKE_LLM_LATENCY=FAKE_LLM_LATENCY,
+        CHECKPOINTER="sqlite",
+        CHECKPOINT_DB_PATH=db_path,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "chatbot_api.chatbot_api:api",
+         "--port", str(PORT), "--workers", str(WORKERS), "--log-level", "warning"],
+        env=env,
+    )
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/docs")
+            return server
+        except httpx.ConnectError:
+            time.sleep(0.2)
+
+
+async def run_load(thread_ids: list) -> list:
+    """Runs every conversation concurrently and returns per-turn latencies in ms."""
+    latencies = []
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    limits = httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        async def conversation(thread_id: str):
+            for turn in range(TURNS_PER_THREAD):
+                async with in_flight:
+                    started = time.perf_counter()
+                    response = await client.post("/chat", json={"message": f"turn {turn}", "thread_id": thread_id})
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(conversation(thread_id) for thread_id in thread_ids))
+    return latencies
+
+
+def main():
+    db_path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+    server = start_server(db_path)
+    try:
+        thread_ids = [str(uuid.uuid4()) for _ in range(THREADS)]
+        started = time.perf_counter()
+        latencies = asyncio.run(run_load(thread_ids))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    checkpointer = SQLiteCheckpointer(db_path)
+    complete = sum(
+        len(checkpointer.get_tuple({"configurable": {"thread_id": t}}).checkpoint["channel_values"]["messages"])
+        == 2 * TURNS_PER_THREAD
+        for t in thread_ids
+    )
+    checkpointer.close()
+
+    print(f"{WORKERS} workers, {THREADS} threads x {TURNS_PER_THREAD} turns in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} turns/s)")
+    print(f"turn latency p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {statistics.quantiles(latencies, n=20)[-1]:.1f} ms")
+    print(f"threads with full history: {complete}/{THREADS}")
+
+
+if __name__ == "__main__":
+    main()
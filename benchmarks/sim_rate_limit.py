@@ -0,0 +1,81 @@
+"""
+Simulates provider rate limiting against the stub OpenAI server.
+
+The stub accepts STUB_RPS requests per second and answers the rest with a 429
+and Retry-After. CALLS concurrent chat calls are sent three ways:
+- "sdk retries": plain ChatOpenAI clients with the SDK's default 2 retries;
+- "retry only": the shared transport retrying with backoff, without limits;
+- "rpm limiter": the shared transport with a requests/minute budget
+  matching the stub.
+For each run it prints successes, failures, the 429s the server sent and the
+wall time. A final check cancels calls while they wait for the limiter and
+confirms their reservations are handed to the next caller.
+
+Run from the repository root:
+    python -m benchmarks.sim_rate_limit
+"""
+import asyncio
+import time
+import httpx
+from langchain_openai import ChatOpenAI
+from benchmarks.stub_openai_server import BASE_URL, HOST, PORT, start_stub_server
+from utilities.rate_limiter import AsyncRateLimitedTransport, RateLimiter
+
+STUB_RPS = 20
+CALLS = 200
+
+
+def make_llm(limiter: RateLimiter = None) -> ChatOpenAI:
+    if limiter is None:
+        return ChatOpenAI(model="stub", base_url=BASE_URL, api_key="sk-stub")
+    client = httpx.AsyncClient(transport=AsyncRateLimitedTransport(limiter, httpx.AsyncHTTPTransport()))
+    return ChatOpenAI(model="stub", base_url=BASE_URL, api_key="sk-stub", http_async_client=client, max_retries=0)
+
+
+async def run(llm: ChatOpenAI) -> tuple:
+    started = time.perf_counter()
+    results = await asyncio.gather(*[llm.ainvoke(f"Question {i}") for i in range(CALLS)], return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    return CALLS - failed, failed, time.perf_counter() - started
+
+
+async def check_cancellation():
+    """Reservations of cancelled waiters go back to the bucket."""
+    limiter = RateLimiter(requests_per_minute=STUB_RPS * 60)
+    llm = make_llm(limiter)
+    waiting = [asyncio.create_task(llm.ainvoke("Hi")) for _ in range(100)]
+    await asyncio.sleep(0.2)
+    for task in waiting:
+        task.cancel()
+    await asyncio.gather(*waiting, return_exceptions=True)
+    # Without refunds the next caller would queue behind ~80 dead reservations (~4s)
+    print(f"after cancelling 100 calls, the limiter delays the next one by {limiter.reserve(0):.2f}s")
+
+
+def main():
+    scenarios = [
+        ("sdk retries", lambda: make_llm()),
+        ("retry only", lambda: make_llm(RateLimiter(max_retries=8, base_delay=0.5, max_delay=10))),
+        ("rpm limiter", lambda: make_llm(RateLimiter(requests_per_minute=STUB_RPS * 60, max_retries=8))),
+    ]
+    print(f"stub limit {STUB_RPS} req/s, {CALLS} concurrent calls")
+    print(f"{'client':>12} {'ok':>5} {'failed':>7} {'429s':>6} {'wall s':>8}")
+    for name, make in scenarios:
+        server = start_stub_server(requests_per_second=STUB_RPS)
+        try:
+            ok, failed, wall = asyncio.run(run(make()))
+            rate_limited = httpx.get(f"http://{HOST}:{PORT}/stats").json()["rate_limited"]
+            print(f"{name:>12} {ok:>5} {failed:>7} {rate_limited:>6} {wall:>8.2f}")
+        finally:
+            server.terminate()
+            server.join()
+
+    server = start_stub_server(requests_per_second=STUB_RPS)
+    try:
+        asyncio.run(check_cancellation())
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
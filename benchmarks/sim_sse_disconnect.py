@@ -0,0 +1,127 @@
+"""
+Checks what happens to the graph behind an SSE stream when the client leaves.
+
+chatbot_streaming_api runs its writer -> enhancer graph with a fake LLM that
+takes LLM_LATENCY seconds and counts the calls started and finished.
+
+Disconnect: the client hangs up while `writer` is still waiting for its
+model. With SSE_RESUME_GRACE=0 the writer's call should be aborted and
+`enhancer` should never call the model. With a grace period longer than the
+graph, the run finishes so a reconnecting client could still get it. This
+is checked under ASGI spec 2.3, which uvicorn reports and where Starlette
+watches for disconnects itself, and under spec 2.4, where disconnects only
+show up on the next write.
+
+Resume: the client hangs up after the writer's event and reconnects with
+Last-Event-ID. It should get the remaining events without the graph
+running again.
+
+Run from the repository root:
+    python -m benchmarks.sim_sse_disconnect
+"""
+import multiprocessing
+import os
+import time
+import httpx
+import uvicorn
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from chatbot_streaming_api import chatbot_streaming_api as api
+from utilities.fake_llm import FakeChatModel
+from utilities.streaming import StreamHub
+
+HOST = "127.0.0.1"
+PORT = 8770
+URL = f"http://{HOST}:{PORT}/stream"
+BODY = {"messages": [{"role": "human", "content": "Write a slogan"}]}
+LLM_LATENCY = 1.0
+DISCONNECT_AFTER = 0.3
+
+
+def serve(spec_version: str, resume_grace: float, started, finished):
+    class CountingChatModel(FakeChatModel):
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            with started.get_lock():
+                started.value += 1
+            result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+            with finished.get_lock():
+                finished.value += 1
+            return result
+
+    api.app_graph = api.create_graph(CountingChatModel(latency=LLM_LATENCY))
+    api.streams = StreamHub(resume_grace=resume_grace)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "http":
+            scope["asgi"] = {**scope.get("asgi", {}), "spec_version": spec_version}
+        await api.app(scope, receive, send)
+
+    uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
+
+
+def start(spec_version: str, resume_grace: float) -> tuple:
+    started, finished = multiprocessing.Value("i", 0), multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(target=serve, args=(spec_version, resume_grace, started, finished), daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{PORT}/docs")
+            return server, started, finished
+        except httpx.ConnectError:
+            time.sleep(0.1)
+
+
+def disconnect(spec_version: str, resume_grace: float) -> tuple:
+    server, started, finished = start(spec_version, resume_grace)
+    with httpx.Client(timeout=10) as client:
+        with client.stream("POST", URL, json=BODY):
+            time.sleep(DISCONNECT_AFTER)
+    # Long enough for writer and enhancer to finish if nothing stopped them
+    time.sleep(LLM_LATENCY * 3)
+    server.terminate()
+    server.join()
+    return started.value, finished.value
+
+
+def events_of(lines) -> list:
+    """(id, event) of each SSE event read from `lines`, stopping after `end`."""
+    events, event_id = [], None
+    for line in lines:
+        if line.startswith("id:"):
+            event_id = line[3:].strip()
+        elif line.startswith("event:"):
+            events.append((event_id, line[6:].strip()))
+            if events[-1][1] == "end":
+                break
+    return events
+
+
+def resume() -> tuple:
+    server, started, finished = start("2.3", 5)
+    with httpx.Client(timeout=10) as client:
+        with client.stream("POST", URL, json=BODY) as response:
+            first = next(line[3:].strip() for line in response.iter_lines() if line.startswith("id:"))
+        time.sleep(0.5)
+        with client.stream("POST", URL, json=BODY, headers={"Last-Event-ID": first}) as response:
+            rest = events_of(response.iter_lines())
+    server.terminate()
+    server.join()
+    return first, rest, started.value
+
+
+def main():
+    print(f"fake LLM latency {LLM_LATENCY}s, client disconnects after {DISCONNECT_AFTER}s")
+    print(f"{'ASGI spec':>9} {'grace s':>8} {'LLM calls started':>18} {'finished':>9}")
+    for spec_version in ["2.3", "2.4"]:
+        for resume_grace in [0, 5]:
+            started, finished = disconnect(spec_version, resume_grace)
+            print(f"{spec_version:>9} {resume_grace:>8} {started:>18} {finished:>9}")
+
+    first, rest, started = resume()
+    print(f"\nresume: dropped after event {first}, reconnected and got {[event for _, event in rest]}")
+    print(f"        ids {[event_id for event_id, _ in rest]}, LLM calls started: {started}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Soak test for BoundedMemorySaver.
+
+Drives thousands of synthetic conversations through the chatbot_api graph
+backed by a fake LLM, once with LangGraph's unbounded MemorySaver and once
+with BoundedMemorySaver. Each variant runs in its own process so the peak
+RSS numbers are comparable.
+
+Run from the repository root:
+    python -m benchmarks.soak_test_memory_checkpointer
+"""
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-soak-test")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+THREADS = 5000
+TURNS_PER_THREAD = 4
+MAX_IN_FLIGHT = 100
+
+
+def build_checkpointer(variant: str):
+    from langgraph.checkpoint.memory import MemorySaver
+    from utilities.checkpointers import BoundedMemorySaver
+    if variant == "unbounded":
+        return MemorySaver()
+    return BoundedMemorySaver(max_threads=500, max_checkpoints_per_thread=4, ttl_seconds=60,
+                              max_bytes=16 * 1024 * 1024)
+
+
+async def soak(variant: str):
+    from langchain_core.messages import HumanMessage
+    from chatbot_api.chatbot_api import create_chat_graph
+
+    checkpointer = build_checkpointer(variant)
+    graph = create_chat_graph(checkpointer)
+    thread_ids = asyncio.Queue()
+    for _ in range(THREADS):
+        thread_ids.put_nowait(str(uuid.uuid4()))
+
+    async def user():
+        """Plays whole conversations one after another, like a user session."""
+        while not thread_ids.empty():
+            config = {"configurable": {"thread_id": thread_ids.get_nowait()}}
+            for turn in range(TURNS_PER_THREAD):
+                await graph.ainvoke({"messages": [HumanMessage(content=f"turn {turn} " + "x" * 200)]}, config)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(MAX_IN_FLIGHT)))
+    elapsed = time.perf_counter() - started
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"[{variant}] {THREADS} threads x {TURNS_PER_THREAD} turns in {elapsed:.1f}s, peak RSS {peak_rss_mb:.0f} MB")
+    if variant == "bounded":
+        print(f"[{variant}] stats: {checkpointer.stats()}")
+
+
+def main():
+    if len(sys.argv) > 1:
+        asyncio.run(soak(sys.argv[1]))
+        return
+    for variant in ("unbounded", "bounded"):
+        subprocess.run([sys.executable, "-m", "benchmarks.soak_test_memory_checkpointer", variant], check=True)
+
+
+if __name__ == "__main__":
+    main()
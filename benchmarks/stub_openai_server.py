@@ -0,0 +1,113 @@
+"""
+A minimal OpenAI-compatible chat completions server for local benchmarks.
+
+With a rate limit set (STUB_REQUESTS_PER_SECOND or `start_stub_server`),
+requests over the limit get a 429 with Retry-After, like the real API.
+
+Run from the repository root:
+    uvicorn benchmarks.stub_openai_server:app --port 8766
+"""
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import time
+import uuid
+import httpx
+import uvicorn
+from collections import deque
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+HOST = "127.0.0.1"
+PORT = 8766
+BASE_URL = f"http://{HOST}:{PORT}/v1"
+
+app = FastAPI()
+
+# Prompt prefixes (system message + tools) seen so far, to emulate provider-side
+# prompt caching: a repeated prefix is reported as cached input tokens.
+_seen_prefixes = set()
+
+# Requests accepted per rolling second; 0 means unlimited.
+_requests_per_second = int(os.getenv("STUB_REQUESTS_PER_SECOND", "0"))
+_recent = deque()
+_stats = {"requests": 0, "rate_limited": 0}
+
+
+def _approximate_tokens(value) -> int:
+    return len(json.dumps(value, separators=(",", ":"))) // 4
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Answers every chat completion request with a fixed message."""
+    _stats["requests"] += 1
+    if _requests_per_second:
+        now = time.monotonic()
+        while _recent and now - _recent[0] >= 1.0:
+            _recent.popleft()
+        if len(_recent) >= _requests_per_second:
+            _stats["rate_limited"] += 1
+            wait = 1.0 - (now - _recent[0])
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={"retry-after": str(math.ceil(wait)), "retry-after-ms": str(int(wait * 1000))},
+            )
+        _recent.append(now)
+    body = await request.json()
+    messages = body.get("messages", [])
+    system = messages[:1] if messages and messages[0].get("role") in ("system", "developer") else []
+    prefix = [system, body.get("tools", [])]
+    prefix_id = hashlib.sha256(json.dumps(prefix, separators=(",", ":")).encode()).hexdigest()
+    cached_tokens = _approximate_tokens(prefix) if prefix_id in _seen_prefixes else 0
+    _seen_prefixes.add(prefix_id)
+    prompt_tokens = max(1, _approximate_tokens([messages, body.get("tools", [])]))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "This is a stub response."},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 5,
+            "total_tokens": prompt_tokens + 5,
+            "prompt_tokens_details": {"cached_tokens": min(cached_tokens, prompt_tokens)},
+        },
+    }
+
+
+@app.get("/stats")
+def stats():
+    """Requests received and how many of them were rate limited."""
+    return _stats
+
+
+def _serve(requests_per_second: int = 0):
+    global _requests_per_second
+    _requests_per_second = requests_per_second or _requests_per_second
+    uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
+
+
+def start_stub_server(requests_per_second: int = 0) -> multiprocessing.Process:
+    """
+    Starts the stub server in a subprocess and waits until it accepts requests.
+
+    Args:
+        requests_per_second (int): Rate limit to enforce with 429s; 0 for none.
+    """
+    server = multiprocessing.Process(target=_serve, args=(requests_per_second,), daemon=True)
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://{HOST}:{PORT}/docs")
+            return server
+        except httpx.ConnectError:
+            time.sleep(0.1)
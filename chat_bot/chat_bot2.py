@@ -2,10 +2,11 @@ import os
 import uuid
 from typing import TypedDict, Annotated, List
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
+from utilities.checkpointers import make_checkpointer
+from utilities.history import HistoryPolicy, history_policy_from_env
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,24 +18,34 @@ class State(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
 # Define the nodes of our graph.
-def chat_node(state: State):
+def make_chat_node(history_policy: HistoryPolicy = None):
     """
-    A node that invokes the OpenAI model with the current conversation history.
+    Builds the chat node, optionally compacting old history before each LLM call.
     """
-    # Initialize the OpenAI chat model
-    model = ChatOpenAI(model="gpt-4o", temperature=0)
-    
-    # Get the messages from the current state
-    messages = state["messages"]
-    
-    # Invoke the model and get the response
-    response = model.invoke(messages)
-    
-    # Return the response as a new message to update the state
-    return {"messages": [response]}
+    def chat_node(state: State):
+        """
+        A node that invokes the OpenAI model with the current conversation history.
+        """
+        # Get the shared, connection-pooled OpenAI chat model
+        model = get_llm("gpt-4o", temperature=0)
+        
+        # Get the messages from the current state, windowed by the history policy
+        messages = state["messages"]
+        saved = 0
+        if history_policy is not None:
+            messages, saved = history_policy.compact(messages)
+        
+        # Invoke the model and get the response
+        response = model.invoke(messages)
+        if history_policy is not None:
+            response.response_metadata["history_tokens_saved"] = saved
+        
+        # Return the response as a new message to update the state
+        return {"messages": [response]}
+    return chat_node
 
 # Build the graph
-def create_chat_graph():
+def create_chat_graph(history_policy: HistoryPolicy = None):
     """
     Creates and compiles the LangGraph-based chat application.
     """
@@ -42,13 +53,13 @@ def create_chat_graph():
     workflow = StateGraph(State)
     
     # Add the single node for the chat model
-    workflow.add_node("chatbot", chat_node)
+    workflow.add_node("chatbot", make_chat_node(history_policy))
     
     # Set the starting point and connect it to our node
     workflow.add_edge(START, "chatbot")
     
-    # Use an in-memory checkpointer for simple state persistence
-    memory = MemorySaver()
+    # Use a bounded in-memory checkpointer (or the one set by CHECKPOINTER)
+    memory = make_checkpointer()
     
     # Compile the graph
     app = workflow.compile(checkpointer=memory)
@@ -66,7 +77,7 @@ def chat():
         return
 
     # Create the chat application
-    app = create_chat_graph()
+    app = create_chat_graph(history_policy_from_env())
     
     # Generate a unique thread ID for the conversation
     thread_id = str(uuid.uuid4())
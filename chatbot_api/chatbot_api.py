@@ -1,15 +1,18 @@
 import os
 import uuid
 from typing import TypedDict, Annotated, List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm, aclose_llm_clients
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from dotenv import load_dotenv
+from utilities.streaming import TOKEN_STREAM_MODE, StreamHub, stream_message_events, stream_token_events
+from utilities.checkpointers import add_checkpointer_metrics, make_checkpointer, close_checkpointer
+from utilities.history import HistoryPolicy, history_policy_from_env
+from utilities.instrumentation import instrument, prometheus_response, trace_requests
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,39 +23,68 @@ class State(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
 # Define the nodes of our graph.
-def chat_node(state: State):
-    """A node that invokes the OpenAI model with the current conversation history."""
-    model = ChatOpenAI(model="gpt-4o", temperature=0)
-    messages = state["messages"]
-    response = model.invoke(messages)
-    return {"messages": [response]}
+def make_chat_node(history_policy: HistoryPolicy = None, llm=None):
+    """Builds the chat node, optionally compacting old history before each LLM call."""
+    async def chat_node(state: State):
+        """A node that invokes the OpenAI model with the current conversation history."""
+        model = llm or get_llm("gpt-4o", temperature=0)
+        messages = state["messages"]
+        if history_policy is None:
+            return {"messages": [await model.ainvoke(messages)]}
+        messages, saved = await history_policy.acompact(messages)
+        response = await model.ainvoke(messages)
+        response.response_metadata["history_tokens_saved"] = saved
+        return {"messages": [response]}
+    return chat_node
 
 # Build the graph and compile it once at startup
-def create_chat_graph():
-    """Creates and compiles the LangGraph-based chat application."""
+def create_chat_graph(checkpointer=None, history_policy: HistoryPolicy = None, llm=None):
+    """
+    Creates and compiles the LangGraph-based chat application.
+
+    The checkpointer defaults to the one selected by the CHECKPOINTER env var
+    ("memory" or "sqlite", see utilities/checkpointers.py). A history policy
+    limits how much of the conversation is sent to the model on each turn.
+    `llm` replaces the shared gpt-4o model, e.g. with a FakeChatModel.
+    """
     workflow = StateGraph(State)
-    workflow.add_node("chatbot", chat_node)
+    workflow.add_node("chatbot", make_chat_node(history_policy, llm))
     workflow.add_edge(START, "chatbot")
-    memory = MemorySaver()
-    return workflow.compile(checkpointer=memory)
+    return instrument(workflow.compile(checkpointer=checkpointer or make_checkpointer()), "chatbot")
 
 # Create the LangGraph app instance
-app_graph = create_chat_graph()
+checkpointer = make_checkpointer()
+add_checkpointer_metrics(checkpointer)
+app_graph = create_chat_graph(checkpointer, history_policy_from_env())
 
 # --- FastAPI Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cancels running streams, closes the pooled LLM connections and the checkpointer on shutdown."""
+    yield
+    await streams.aclose()
+    await aclose_llm_clients()
+    close_checkpointer(checkpointer)
+
 # Create the FastAPI app
 api = FastAPI(
     title="LangGraph Chatbot API",
-    description="An API to serve a conversational chatbot powered by LangGraph."
+    description="An API to serve a conversational chatbot powered by LangGraph.",
+    lifespan=lifespan
 )
+trace_requests(api)
+
+# Runs SSE streams with heartbeats and a replay buffer for reconnecting clients
+streams = StreamHub()
 
 # Pydantic model for the request body
 class ChatRequest(BaseModel):
     message: str
     thread_id: str
+    mode: str = "values"  # "tokens" streams LLM tokens as they are produced
 
 @api.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """
     API endpoint to handle a single turn of the conversation.
     It takes a user message and a thread_id to maintain state.
@@ -63,18 +95,22 @@ async def chat_endpoint(request: ChatRequest):
     # Create a HumanMessage from the user's input
     input_message = HumanMessage(content=request.message)
 
-    # Define a generator function to stream the response
-    async def event_generator():
-        # Stream the response from the LangGraph app
-        async for event in app_graph.astream(
-            {"messages": [input_message]},
-            config,
-            stream_mode="values"
-        ):
-            # We are only interested in the last message, which is the AI's response
-            response_message = event["messages"][-1]
-            yield f"data: {response_message.content}\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    # A client whose stream dropped resends the request with Last-Event-ID
+    resumed = streams.resume(http_request)
+    if resumed is not None:
+        return resumed
+
+    graph_input = {"messages": [input_message]}
+    if request.mode == TOKEN_STREAM_MODE:
+        events = stream_token_events(app_graph, graph_input, config)
+    else:
+        # One JSON `message` event per reply, then `end`
+        events = stream_message_events(app_graph, graph_input, config)
+    return streams.response(http_request, events)
+
+@api.get("/metrics")
+def metrics():
+    """Node, LLM and tool timings, token usage and cost in the Prometheus text format."""
+    return prometheus_response()
 
 # You can run this file with 'uvicorn api:api --reload'
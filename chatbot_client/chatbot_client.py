@@ -31,7 +31,8 @@ def run_chat_client():
         # Prepare the request payload
         payload = {
             "message": user_input,
-            "thread_id": thread_id
+            "thread_id": thread_id,
+            "mode": "tokens"
         }
         
         try:
@@ -40,11 +41,11 @@ def run_chat_client():
                 response.raise_for_status() # Raise an exception for bad status codes
                 
                 print("AI: ", end="", flush=True)
-                for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
-                    # Each chunk is a Server-Sent Event data block
-                    if chunk.startswith("data:"):
-                        content = chunk[len("data:"):].strip()
-                        print(content, end="", flush=True)
+                for line in response.iter_lines(decode_unicode=True):
+                    # Each token event carries a JSON payload on its data line
+                    if line.startswith("data:"):
+                        event = json.loads(line[len("data:"):])
+                        print(event.get("content", ""), end="", flush=True)
                 print() # Print a newline at the end of the AI's response
                 
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,277 @@
+import asyncio
+import bisect
+import itertools
+import math
+import os
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException
+from utilities.instrumentation import metrics
+
+# Requests running at once, in total and per agent/graph.
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "64"))
+ADMISSION_MAX_ACTIVE_PER_PROJECT = int(os.getenv("ADMISSION_MAX_ACTIVE_PER_PROJECT", "16"))
+# Requests allowed to wait for a slot, in total and per agent/graph.
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_MAX_QUEUE_PER_PROJECT = int(os.getenv("ADMISSION_MAX_QUEUE_PER_PROJECT", "64"))
+# Seconds a request may wait for a slot before it is turned away.
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+# Priority classes: interactive requests are always admitted before batch work.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+ADMISSION_ACTIVE = metrics.gauge("admission_active_requests", "Requests holding a slot.", ["project"])
+ADMISSION_QUEUED = metrics.gauge("admission_queued_requests", "Requests waiting for a slot.", ["project"])
+ADMISSION_ADMITTED = metrics.counter("admission_admitted_total", "Requests given a slot.", ["project", "priority"])
+ADMISSION_REJECTED = metrics.counter(
+    "admission_rejected_total", "Requests turned away with a 429 or 503.", ["project", "priority"])
+ADMISSION_WAIT = metrics.histogram(
+    "admission_wait_seconds", "Time a request waited for its slot.", ["project", "priority"])
+
+
+def priority_of(body: dict, default: str = INTERACTIVE) -> str:
+    """The priority class asked for in a request body ("priority"), or `default`."""
+    priority = body.get("priority", default)
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"'priority' must be one of {list(PRIORITIES)}")
+    return priority
+
+
+class Ticket:
+    """A granted slot; `release()` gives it back and may be called more than once."""
+    __slots__ = ("controller", "name", "priority", "admitted_at", "released")
+
+    def __init__(self, controller: "AdmissionController", name: str, priority: str):
+        self.controller = controller
+        self.name = name
+        self.priority = priority
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class _Waiter:
+    __slots__ = ("order", "name", "priority", "future", "enqueued_at")
+
+    def __init__(self, order: tuple, name: str, priority: str):
+        self.order = order
+        self.name = name
+        self.priority = priority
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return self.order < other.order
+
+
+class _ProjectStats:
+    __slots__ = ("admitted", "rejected", "timed_out", "waits", "holds")
+
+    def __init__(self):
+        self.admitted = Counter()
+        self.rejected = Counter()
+        self.timed_out = Counter()
+        self.waits = defaultdict(lambda: deque(maxlen=1024))
+        self.holds = deque(maxlen=256)
+
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {
+        "count": len(ordered),
+        "avg": sum(ordered) / len(ordered) * 1000,
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "max": ordered[-1] * 1000,
+    }
+
+
+class AdmissionController:
+    """
+    Limits how many requests run at once, globally and per agent/graph.
+
+    A request that finds no free slot waits in a bounded queue ordered by
+    priority class, then arrival. Whenever a slot frees up, the first waiter
+    whose agent is under its own limit is admitted, so a busy agent cannot
+    hold up requests for the others. When the queue is full the request is
+    rejected straight away: 429 if its own agent's queue is full, 503 if the
+    whole server's is, unless a lower-priority waiter can be turned away
+    (with a 503) to make room. A request still waiting after `queue_timeout` seconds
+    gets a 503. Rejections carry a Retry-After estimated from recent
+    request durations.
+
+    Args:
+        max_active (int): Requests running at once across all agents.
+        max_active_per_project (int): Requests running at once for one agent.
+        max_queue (int): Requests waiting across all agents.
+        max_queue_per_project (int): Requests waiting for one agent.
+        queue_timeout (float): Seconds a request may wait for a slot.
+    """
+
+    def __init__(self, max_active: int = None, max_active_per_project: int = None, max_queue: int = None,
+                 max_queue_per_project: int = None, queue_timeout: float = None):
+        self.max_active = max_active or ADMISSION_MAX_ACTIVE
+        self.max_active_per_project = max_active_per_project or ADMISSION_MAX_ACTIVE_PER_PROJECT
+        self.max_queue = ADMISSION_MAX_QUEUE if max_queue is None else max_queue
+        self.max_queue_per_project = ADMISSION_MAX_QUEUE_PER_PROJECT if max_queue_per_project is None else max_queue_per_project
+        self.queue_timeout = queue_timeout or ADMISSION_QUEUE_TIMEOUT
+        self._active = Counter()
+        self._queued = Counter()
+        self._queue = []
+        self._order = itertools.count()
+        self._stats = defaultdict(_ProjectStats)
+
+    def _can_run(self, name: str) -> bool:
+        return (sum(self._active.values()) < self.max_active
+                and self._active[name] < self.max_active_per_project)
+
+    def _grant(self, name: str, priority: str, waited: float) -> Ticket:
+        self._active[name] += 1
+        stats = self._stats[name]
+        stats.admitted[priority] += 1
+        stats.waits[priority].append(waited)
+        ADMISSION_WAIT.observe(waited, project=name, priority=priority)
+        return Ticket(self, name, priority)
+
+    def retry_after(self, name: str) -> int:
+        """Seconds a rejected client should wait, from the queue length and recent durations."""
+        holds = self._stats[name].holds
+        average = sum(holds) / len(holds) if holds else 1.0
+        waves = (self._queued[name] + 1) / self.max_active_per_project
+        return max(1, min(60, math.ceil(average * waves)))
+
+    def _reject(self, name: str, priority: str, status_code: int, detail: str):
+        self._stats[name].rejected[priority] += 1
+        raise HTTPException(status_code=status_code, detail=detail,
+                            headers={"Retry-After": str(self.retry_after(name))})
+
+    async def acquire(self, name: str, priority: str = INTERACTIVE) -> Ticket:
+        """
+        Waits for a slot for agent `name` and returns its ticket.
+
+        Raises:
+            HTTPException: 429 or 503, with a Retry-After header, when the
+                request can't be queued or waited too long.
+        """
+        # Waiters are admitted as soon as they can run, so if there is a free
+        # slot for this agent, nobody queued could have taken it instead.
+        if self._can_run(name):
+            return self._grant(name, priority, 0.0)
+        if self._queued[name] >= self.max_queue_per_project and not self._evict(priority, name):
+            self._reject(name, priority, 429, f"Too many requests waiting for '{name}'")
+        if len(self._queue) >= self.max_queue and not self._evict(priority):
+            self._reject(name, priority, 503, "Server is at capacity")
+
+        waiter = _Waiter((PRIORITIES[priority], next(self._order)), name, priority)
+        bisect.insort(self._queue, waiter)
+        self._queued[name] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the wait ended: hand the slot back
+                waiter.future.result().release()
+            else:
+                waiter.future.cancel()
+                self._unqueue(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._stats[name].timed_out[priority] += 1
+            self._reject(name, priority, 503, f"Timed out waiting for '{name}'")
+
+    def _evict(self, priority: str, name: Optional[str] = None) -> bool:
+        """
+        Makes room for a `priority` request by turning away the newest waiter
+        of a lower priority class (for agent `name` only, if given).
+        """
+        for waiter in reversed(self._queue):
+            if waiter.order[0] <= PRIORITIES[priority]:
+                return False
+            if name is None or waiter.name == name:
+                self._unqueue(waiter)
+                self._stats[waiter.name].rejected[waiter.priority] += 1
+                waiter.future.set_exception(HTTPException(
+                    status_code=503, detail=f"Displaced by {priority} requests for '{waiter.name}'",
+                    headers={"Retry-After": str(self.retry_after(waiter.name))},
+                ))
+                return True
+        return False
+
+    def _unqueue(self, waiter: _Waiter):
+        index = bisect.bisect_left(self._queue, waiter)
+        if index < len(self._queue) and self._queue[index] is waiter:
+            del self._queue[index]
+            self._queued[waiter.name] -= 1
+
+    def _release(self, ticket: Ticket):
+        self._active[ticket.name] -= 1
+        self._stats[ticket.name].holds.append(time.monotonic() - ticket.admitted_at)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admits waiters, best priority first, while there are free slots."""
+        index = 0
+        while index < len(self._queue) and sum(self._active.values()) < self.max_active:
+            waiter = self._queue[index]
+            if self._active[waiter.name] >= self.max_active_per_project:
+                index += 1
+                continue
+            del self._queue[index]
+            self._queued[waiter.name] -= 1
+            waiter.future.set_result(self._grant(waiter.name, waiter.priority, time.monotonic() - waiter.enqueued_at))
+
+    @asynccontextmanager
+    async def admit(self, name: str, priority: str = INTERACTIVE):
+        """Holds a slot for agent `name` for the duration of the block."""
+        ticket = await self.acquire(name, priority)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def collect(self):
+        """Copies the current counts into the Prometheus metrics; run on every scrape."""
+        for name in set(self._stats) | set(self._active) | set(self._queued):
+            ADMISSION_ACTIVE.set(self._active[name], project=name)
+            ADMISSION_QUEUED.set(self._queued[name], project=name)
+            stats = self._stats[name]
+            for priority in PRIORITIES:
+                ADMISSION_ADMITTED.set(stats.admitted[priority], project=name, priority=priority)
+                ADMISSION_REJECTED.set(stats.rejected[priority], project=name, priority=priority)
+
+    def metrics(self, name: Optional[str] = None) -> dict:
+        """Limits, queue depth, and admission counts and wait times (ms) per agent."""
+        names = [name] if name else sorted(set(self._stats) | set(self._active) | set(self._queued))
+        return {
+            "active": sum(self._active.values()),
+            "queued": len(self._queue),
+            "limits": {
+                "max_active": self.max_active,
+                "max_active_per_project": self.max_active_per_project,
+                "max_queue": self.max_queue,
+                "max_queue_per_project": self.max_queue_per_project,
+                "queue_timeout": self.queue_timeout,
+            },
+            "projects": {
+                project: {
+                    "active": self._active[project],
+                    "queued": self._queued[project],
+                    "admitted": dict(self._stats[project].admitted),
+                    "rejected": dict(self._stats[project].rejected),
+                    "timed_out": dict(self._stats[project].timed_out),
+                    "wait_ms": {priority: _percentiles(waits) for priority, waits in self._stats[project].waits.items()},
+                }
+                for project in names
+            },
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from langchain_core.runnables import RunnableLambda
+from chatbot_multi_project_api.utils import parse_messages, format_messages
+
+# Upper bounds for a single /batch request; clients may ask for less concurrency.
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "10000"))
+
+
+def parse_batch_request(body: dict) -> Tuple[List[dict], int]:
+    """
+    Validates a /batch body and returns its items and concurrency limit.
+
+    Raises:
+        HTTPException: 400 for a malformed body, 413 for too many items.
+    """
+    items = body.get("items")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="'items' must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    try:
+        concurrency = int(body.get("max_concurrency", BATCH_MAX_CONCURRENCY))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'max_concurrency' must be an integer")
+    return items, max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+
+
+def _error(index: int, item: dict, name_key: str, message: str) -> dict:
+    return {"index": index, "id": item.get("id"), name_key: item.get(name_key), "error": message}
+
+
+async def run_batch(items: List[dict], get_graph: Callable[[str], Awaitable], concurrency: int,
+                    name_key: str = "agent",
+                    admit: Optional[Callable[[str], AsyncContextManager]] = None) -> AsyncIterator[dict]:
+    """
+    Runs many stateless chat items and yields one result per item as it completes.
+
+    Items are grouped by graph and each group runs through
+    `graph.abatch_as_completed`; the concurrency limit is shared between the
+    groups in proportion to their size. A failing item yields an "error"
+    result instead of aborting the batch, and so does an item whose graph
+    can't be loaded or whose "messages" is not a list of objects. A final {"summary": ...} result
+    reports the counts.
+
+    Args:
+        items (list): Objects with the graph name under `name_key`, "messages"
+            and an optional client "id" echoed back in the result.
+        get_graph: Async callable returning the graph for a name; it may raise.
+        concurrency (int): Maximum number of items running at once.
+        name_key (str): Key of the graph name in each item ("agent" or "graph").
+        admit: Optional callable returning an async context manager that each
+            item holds while it runs, e.g. an admission-control slot.
+    """
+    results = asyncio.Queue()
+    groups: Dict[str, list] = {}
+    failed = 0
+
+    for index, item in enumerate(items):
+        name = item.get(name_key) if isinstance(item, dict) else None
+        if not name:
+            failed += 1
+            yield _error(index, item if isinstance(item, dict) else {}, name_key, f"Missing '{name_key}' in item")
+            continue
+        messages = item.get("messages", [])
+        if not isinstance(messages, list) or not all(isinstance(message, dict) for message in messages):
+            failed += 1
+            yield _error(index, item, name_key, "'messages' must be a list of objects")
+            continue
+        groups.setdefault(name, []).append((index, item))
+
+    async def run_group(name: str, group: list):
+        # Every item of the group must get exactly one result, or the reader waits forever
+        reported = set()
+        try:
+            await run_items(name, group, reported)
+        except Exception as e:
+            for position, (index, item) in enumerate(group):
+                if position not in reported:
+                    await results.put(_error(index, item, name_key, str(getattr(e, "detail", e))))
+
+    async def run_items(name: str, group: list, reported: set):
+        graph = await get_graph(name)
+        if admit is not None:
+            async def run_admitted(graph_input, graph=graph, name=name):
+                async with admit(name):
+                    return await graph.ainvoke(graph_input)
+            graph = RunnableLambda(run_admitted)
+
+        inputs = [{"messages": parse_messages(item.get("messages", []))} for _, item in group]
+        limit = max(1, concurrency * len(group) // len(items))
+        async for position, output in graph.abatch_as_completed(
+            inputs, {"max_concurrency": limit}, return_exceptions=True
+        ):
+            index, item = group[position]
+            if isinstance(output, Exception):
+                result = _error(index, item, name_key, f"{type(output).__name__}: {output}")
+            else:
+                result = {
+                    "index": index, "id": item.get("id"), name_key: name,
+                    "messages": format_messages(output["messages"]),
+                }
+            await results.put(result)
+            reported.add(position)
+
+    tasks = [asyncio.create_task(run_group(name, group)) for name, group in groups.items()]
+    pending = sum(len(group) for group in groups.values())
+    succeeded = 0
+    try:
+        for _ in range(pending):
+            result = await results.get()
+            if "error" in result:
+                failed += 1
+            else:
+                succeeded += 1
+            yield result
+        await asyncio.gather(*tasks)
+    finally:
+        # The client went away or the batch is done: stop any remaining work
+        for task in tasks:
+            task.cancel()
+    yield {"summary": {"items": len(items), "succeeded": succeeded, "failed": failed}}
+
+
+async def ndjson_lines(results: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Encodes results as newline-delimited JSON."""
+    async for result in results:
+        yield json.dumps(result) + "\n"
@@ -1,45 +1,68 @@
-import os
-import importlib.util
-import glob
-from pathlib import Path
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-from chatbot_multi_project_api.utils import parse_messages, format_messages # Assuming this utility exists
+from utilities.llm_registry import aclose_llm_clients
+from utilities.checkpointers import add_checkpointer_metrics
+from chatbot_multi_project_api.utils import format_messages # Assuming this utility exists
+from utilities.instrumentation import instrument, metrics, prometheus_response, trace_requests
+from utilities.streaming import TOKEN_STREAM_MODE, StreamHub, stream_message_events, stream_stats, stream_token_events
+from chatbot_multi_project_api.sessions import SessionStore, run_turn, stream_options
+from chatbot_multi_project_api.admission import BATCH, AdmissionController, priority_of
+from chatbot_multi_project_api.batch import ndjson_lines, parse_batch_request, run_batch
+from chatbot_multi_project_api.warmup import Warmup
+from chatbot_multi_project_api.registry import PROJECT_HOT_RELOAD, ProjectLoadError, agent_registry
+from chatbot_multi_project_api.router import create_router_graph
 
 # Load environment variables
 load_dotenv()
 
-# --- Load all agents from project modules ---
-agents = {}
+# --- Discover all agents; each is imported and compiled on first use ---
+agents = agent_registry()
+print(f"Found agents in {agents.manifest_seconds * 1000:.1f}ms: {list(agents)}")
 
-cwd = Path.cwd()
-AGENTS_DIR = os.path.join(cwd, "agent_projects") # A new, more logical directory name
+# Server-side history for clients that send a session_id; each newly built
+# agent gets its checkpointed copy for session requests before it serves
+sessions = SessionStore()
+add_checkpointer_metrics(sessions.checkpointer)
+agents.add_warm_step("sessions", sessions.graph)
 
-# Cross-platform glob pattern to find all agent files
-pattern = os.path.join(AGENTS_DIR, "*_agent\*_agent.py")
+# Builds every agent and prepares the LLM clients at startup (PROJECT_WARMUP)
+warmup = Warmup(agents)
+metrics.add_collector(warmup.collect)
 
-print(f"AGENTS_DIR: {AGENTS_DIR}")
-print(f"Agent loading pattern: {pattern}")
+# Per-agent and global concurrency limits with a bounded, prioritized wait queue
+admission = AdmissionController()
+metrics.add_collector(admission.collect)
 
-for path in glob.glob(pattern):
-    module_name = Path(path).stem
-    spec = importlib.util.spec_from_file_location(module_name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+# Answers questions that span several agents by asking them in parallel;
+# every agent call goes through admission control like a /chat request
+router = instrument(create_router_graph(agents, admit=lambda name: admission.admit(name)), "router")
 
-    # Check for the compiled agent variable (e.g., store_hours_agent)
-    # The convention is that the agent variable name is the module name
-    # without the '_agent' suffix.
-    agent_name = module_name.replace('_agent', '')
-    if hasattr(module, f"{agent_name}_agent"):
-        agents[agent_name] = getattr(module, f"{agent_name}_agent")
-
-print(f"Loaded agents: {list(agents.keys())}")
+# Runs SSE streams with heartbeats and a replay buffer for reconnecting clients
+streams = StreamHub()
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warms the agents and LLM clients as set by PROJECT_WARMUP and watches the
+    agents' files for changes; closes pooled connections and sessions on shutdown.
+    """
+    await warmup.start()
+    watcher = asyncio.create_task(agents.watch()) if PROJECT_HOT_RELOAD else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await warmup.aclose()
+    await streams.aclose()
+    await aclose_llm_clients()
+    sessions.close()
+
+app = FastAPI(lifespan=lifespan)
+trace_requests(app)
 
 # Allow CORS
 app.add_middleware(
@@ -50,11 +73,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_agent_or_404(name: str):
-    """Retrieve the agent or raise a 404 error."""
-    if name not in agents:
+async def get_agent_or_404(name: str):
+    """Retrieve the agent, loading it on first use, or raise a 404 error."""
+    try:
+        return await agents.aget(name)
+    except KeyError:
         raise HTTPException(status_code=404, detail=f"Agent '{name}' not found")
-    return agents[name]
+    except ProjectLoadError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/chat")
 async def chat(request: Request):
@@ -63,37 +89,127 @@ async def chat(request: Request):
     agent_name = body.get("agent")
     if not agent_name:
         raise HTTPException(status_code=400, detail="Missing 'agent' in request")
-    agent = get_agent_or_404(agent_name)
+    agent = await get_agent_or_404(agent_name)
+
+    agent, graph_input, config = sessions.prepare(body, agent_name, agent)
+    async with admission.admit(agent_name, priority_of(body)):
+        if config is not None:
+            # Session turns only return the messages added by this turn
+            new_messages = await run_turn(agent, graph_input, config)
+            return {"session_id": body["session_id"], "messages": format_messages(new_messages)}
+
+        final_state = await agent.ainvoke(graph_input)
+        return {"messages": format_messages(final_state["messages"])}
+
+@app.post("/route")
+async def route(request: Request):
+    """
+    Chat endpoint that picks the agents itself.
+
+    The question is split into sub-questions for the agents it concerns,
+    which answer in parallel; the reply merges their answers. `routing`
+    reports the chosen routes, each agent's time, and the speedup over
+    asking the agents one after the other.
+    """
+    body = await request.json()
+    graph, graph_input, config = sessions.prepare(body, "router", router)
+    if config is not None:
+        new_messages = await run_turn(graph, graph_input, config)
+        return {"session_id": body["session_id"], "messages": format_messages(new_messages),
+                "routing": new_messages[-1].response_metadata.get("routing")}
 
-    messages = parse_messages(body.get("messages", []))
-    final_state = agent.invoke({"messages": messages})
-    return {"messages": format_messages(final_state["messages"])}
+    final_state = await graph.ainvoke(graph_input)
+    return {"messages": format_messages(final_state["messages"]),
+            "routing": final_state["messages"][-1].response_metadata.get("routing")}
 
 @app.post("/stream")
 async def stream(request: Request):
-    """Streaming chat endpoint for a specific agent."""
+    """
+    Streaming chat endpoint for a specific agent.
+
+    Events are JSON `token` (mode "tokens") or `message` events, then `end`.
+    A client whose connection dropped can send the last event id it got as
+    `Last-Event-ID` to receive the rest of the stream without a new run.
+    """
+    resumed = streams.resume(request)
+    if resumed is not None:
+        return resumed
+
     body = await request.json()
     agent_name = body.get("agent")
     if not agent_name:
         raise HTTPException(status_code=400, detail="Missing 'agent' in request")
-    agent = get_agent_or_404(agent_name)
-
-    messages = parse_messages(body.get("messages", []))
-
-    def event_generator():
-        """Generates Server-Sent Events from the agent's stream."""
-        for event in agent.stream({"messages": messages}, stream_mode="updates"):
-            for node, value in event.items():
-                if isinstance(value, dict) and "messages" in value:
-                    msg = value["messages"][-1]
-                    role = "human" if msg.type == "human" else "ai"
-                    content = msg.content if hasattr(msg, 'content') else str(msg)
-                    yield f"data: [{node}] {role}: {content}\n\n"
-        yield "data: [final] done\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    agent = await get_agent_or_404(agent_name)
+
+    agent, graph_input, config = sessions.prepare(body, agent_name, agent)
+    # The slot is held until the run ends, not just while a client listens
+    ticket = await admission.acquire(agent_name, priority_of(body))
+
+    if body.get("mode") == TOKEN_STREAM_MODE:
+        events = stream_token_events(agent, graph_input, config, **stream_options(config))
+    else:
+        events = stream_message_events(agent, graph_input, config, **stream_options(config))
+    return streams.response(request, events, on_finish=ticket.release)
+
+@app.post("/batch")
+async def batch(request: Request):
+    """
+    Run many stateless {"agent", "messages"} items concurrently.
+
+    Results stream back as NDJSON, one line per item in completion order,
+    then a summary line. A failing item gets an "error" line; the rest of
+    the batch keeps running. Items are admitted at batch priority, behind
+    interactive /chat and /stream requests.
+    """
+    items, concurrency = parse_batch_request(await request.json())
+    results = run_batch(items, get_agent_or_404, concurrency, name_key="agent",
+                        admit=lambda name: admission.admit(name, BATCH))
+    return StreamingResponse(ndjson_lines(results), media_type="application/x-ndjson")
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, agent: str):
+    """Forget the server-side history of a session with one agent."""
+    if agent not in agents:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent}' not found")
+    await sessions.delete(agent, session_id)
+    return {"deleted": session_id}
 
 @app.get("/agents")
 def list_agents():
     """List all available agents by name."""
-    return {"available_agents": list(agents.keys())}
\ No newline at end of file
+    return {"available_agents": list(agents.keys())}
+
+@app.get("/admin/projects")
+def project_status():
+    """Version, load time and last error of every agent."""
+    return agents.status()
+
+@app.post("/admin/projects/{name}/reload")
+async def reload_project(name: str):
+    """Rebuild one agent from its file now; the previous version stays if the rebuild fails."""
+    if name not in agents:
+        raise HTTPException(status_code=404, detail=f"Agent '{name}' not found")
+    reloaded = await asyncio.to_thread(agents.reload, name)
+    return {"reloaded": reloaded, **agents.status()[name]}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the startup warm-up has finished, then 200."""
+    status = warmup.status()
+    return JSONResponse({"ready": status["ready"], "mode": status["mode"], "seconds": status["seconds"]},
+                        status_code=200 if status["ready"] else 503)
+
+@app.get("/admin/warmup")
+def warmup_status():
+    """Readiness and the seconds taken by each warm-up step, process-wide and per agent."""
+    return warmup.status()
+
+@app.get("/admin/admission")
+def admission_status():
+    """Admission queue depth, active requests, and wait times (ms) per agent; stream outcomes."""
+    return {**admission.metrics(), "streams": dict(stream_stats)}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Node, LLM and tool timings, token usage, cost, admission and stream counts for Prometheus."""
+    return prometheus_response()
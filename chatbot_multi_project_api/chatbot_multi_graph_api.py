@@ -1,39 +1,63 @@
-import os, importlib.util, glob
-from pathlib import Path
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-from chatbot_multi_project_api.utils import parse_messages, format_messages
-
-# Load environment
+from utilities.llm_registry import aclose_llm_clients
+from utilities.checkpointers import add_checkpointer_metrics
+from chatbot_multi_project_api.utils import format_messages
+from utilities.instrumentation import metrics, prometheus_response, trace_requests
+from utilities.streaming import TOKEN_STREAM_MODE, StreamHub, stream_message_events, stream_stats, stream_token_events
+from chatbot_multi_project_api.sessions import SessionStore, run_turn, stream_options
+from chatbot_multi_project_api.admission import BATCH, AdmissionController, priority_of
+from chatbot_multi_project_api.batch import ndjson_lines, parse_batch_request, run_batch
+from chatbot_multi_project_api.warmup import Warmup
+from chatbot_multi_project_api.registry import PROJECT_HOT_RELOAD, ProjectLoadError, graph_registry
+
+# Load environment variables
 load_dotenv()
 
-# --- Load all graphs from projects/ ---
-graphs = {}
-
-cwd = Path.cwd()
-PROJECTS_DIR = os.path.join(cwd, "agent_projects")
+# --- Discover all graphs; each is imported and compiled on first use ---
+graphs = graph_registry()
+print(f"Found graphs in {graphs.manifest_seconds * 1000:.1f}ms: {list(graphs)}")
 
-# Cross-platform glob pattern
-pattern = os.path.join(PROJECTS_DIR, "*", "graph.py")
+# Server-side history for clients that send a session_id; each newly built
+# graph gets its checkpointed copy for session requests before it serves
+sessions = SessionStore()
+add_checkpointer_metrics(sessions.checkpointer)
+graphs.add_warm_step("sessions", sessions.graph)
 
-print(f"PROJECTS_DIR: {PROJECTS_DIR}")
-print(f"PROJECTS PATH: {pattern}")
+# Builds every graph and prepares the LLM clients at startup (PROJECT_WARMUP)
+warmup = Warmup(graphs)
+metrics.add_collector(warmup.collect)
 
-for path in glob.glob(pattern):
-    project_name = os.path.basename(os.path.dirname(path))
-    spec = importlib.util.spec_from_file_location(project_name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    if hasattr(module, "get_graph"):
-        graphs[project_name] = module.get_graph()
+# Per-graph and global concurrency limits with a bounded, prioritized wait queue
+admission = AdmissionController()
+metrics.add_collector(admission.collect)
 
-print(f"Loaded graphs: {graphs}")
-print(f"Loaded graphs: {list(graphs.keys())}")
+# Runs SSE streams with heartbeats and a replay buffer for reconnecting clients
+streams = StreamHub()
 
 # --- FastAPI App ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warms the graphs and LLM clients as set by PROJECT_WARMUP and watches the
+    graphs' files for changes; closes pooled connections and sessions on shutdown.
+    """
+    await warmup.start()
+    watcher = asyncio.create_task(graphs.watch()) if PROJECT_HOT_RELOAD else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await warmup.aclose()
+    await streams.aclose()
+    await aclose_llm_clients()
+    sessions.close()
+
+app = FastAPI(lifespan=lifespan)
+trace_requests(app)
 
 # Allow CORS
 app.add_middleware(
@@ -44,10 +68,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_graph_or_404(name: str):
-    if name not in graphs:
+async def get_graph_or_404(name: str):
+    """Retrieve the graph, loading it on first use, or raise a 404 error."""
+    try:
+        return await graphs.aget(name)
+    except KeyError:
         raise HTTPException(status_code=404, detail=f"Graph '{name}' not found")
-    return graphs[name]
+    except ProjectLoadError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/chat")
 async def chat(request: Request):
@@ -55,33 +83,106 @@ async def chat(request: Request):
     graph_name = body.get("graph")
     if not graph_name:
         raise HTTPException(status_code=400, detail="Missing 'graph' in request")
-    graph = get_graph_or_404(graph_name)
+    graph = await get_graph_or_404(graph_name)
+
+    graph, graph_input, config = sessions.prepare(body, graph_name, graph)
+    async with admission.admit(graph_name, priority_of(body)):
+        if config is not None:
+            # Session turns only return the messages added by this turn
+            new_messages = await run_turn(graph, graph_input, config)
+            return {"session_id": body["session_id"], "messages": format_messages(new_messages)}
 
-    messages = parse_messages(body.get("messages", []))
-    final_state = graph.invoke({"messages": messages})
-    return {"messages": format_messages(final_state["messages"])}
+        final_state = await graph.ainvoke(graph_input)
+        return {"messages": format_messages(final_state["messages"])}
 
 @app.post("/stream")
 async def stream(request: Request):
+    """
+    Streaming chat endpoint for a specific graph.
+
+    Events are JSON `token` (mode "tokens") or `message` events, then `end`.
+    A client whose connection dropped can send the last event id it got as
+    `Last-Event-ID` to receive the rest of the stream without a new run.
+    """
+    resumed = streams.resume(request)
+    if resumed is not None:
+        return resumed
+
     body = await request.json()
     graph_name = body.get("graph")
     if not graph_name:
         raise HTTPException(status_code=400, detail="Missing 'graph' in request")
-    graph = get_graph_or_404(graph_name)
-
-    messages = parse_messages(body.get("messages", []))
-
-    def event_generator():
-        for event in graph.stream({"messages": messages}, stream_mode="updates"):
-            for node, value in event.items():
-                msg = value["messages"][-1]
-                role = "human" if msg.type == "human" else "ai"
-                yield f"data: [{node}] {role}: {msg.content}\n\n"
-        yield "data: [final] done\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    graph = await get_graph_or_404(graph_name)
+
+    graph, graph_input, config = sessions.prepare(body, graph_name, graph)
+    # The slot is held until the run ends, not just while a client listens
+    ticket = await admission.acquire(graph_name, priority_of(body))
+
+    if body.get("mode") == TOKEN_STREAM_MODE:
+        events = stream_token_events(graph, graph_input, config, **stream_options(config))
+    else:
+        events = stream_message_events(graph, graph_input, config, **stream_options(config))
+    return streams.response(request, events, on_finish=ticket.release)
+
+@app.post("/batch")
+async def batch(request: Request):
+    """
+    Run many stateless {"graph", "messages"} items concurrently.
+
+    Results stream back as NDJSON, one line per item in completion order,
+    then a summary line. A failing item gets an "error" line; the rest of
+    the batch keeps running. Items are admitted at batch priority, behind
+    interactive /chat and /stream requests.
+    """
+    items, concurrency = parse_batch_request(await request.json())
+    results = run_batch(items, get_graph_or_404, concurrency, name_key="graph",
+                        admit=lambda name: admission.admit(name, BATCH))
+    return StreamingResponse(ndjson_lines(results), media_type="application/x-ndjson")
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, graph: str):
+    """Forget the server-side history of a session with one graph."""
+    if graph not in graphs:
+        raise HTTPException(status_code=404, detail=f"Graph '{graph}' not found")
+    await sessions.delete(graph, session_id)
+    return {"deleted": session_id}
 
 @app.get("/graphs")
 def list_graphs():
     """List all available graphs by name."""
     return {"available_graphs": list(graphs.keys())}
+
+@app.get("/admin/projects")
+def project_status():
+    """Version, load time and last error of every graph."""
+    return graphs.status()
+
+@app.post("/admin/projects/{name}/reload")
+async def reload_project(name: str):
+    """Rebuild one graph from its file now; the previous version stays if the rebuild fails."""
+    if name not in graphs:
+        raise HTTPException(status_code=404, detail=f"Graph '{name}' not found")
+    reloaded = await asyncio.to_thread(graphs.reload, name)
+    return {"reloaded": reloaded, **graphs.status()[name]}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the startup warm-up has finished, then 200."""
+    status = warmup.status()
+    return JSONResponse({"ready": status["ready"], "mode": status["mode"], "seconds": status["seconds"]},
+                        status_code=200 if status["ready"] else 503)
+
+@app.get("/admin/warmup")
+def warmup_status():
+    """Readiness and the seconds taken by each warm-up step, process-wide and per graph."""
+    return warmup.status()
+
+@app.get("/admin/admission")
+def admission_status():
+    """Admission queue depth, active requests, and wait times (ms) per graph; stream outcomes."""
+    return {**admission.metrics(), "streams": dict(stream_stats)}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Node, LLM and tool timings, token usage, cost, admission and stream counts for Prometheus."""
+    return prometheus_response()
@@ -0,0 +1,357 @@
+import ast
+import asyncio
+import fnmatch
+import glob
+import importlib.util
+import os
+import threading
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, Optional
+from watchfiles import awatch
+from utilities.instrumentation import instrument
+
+# Repository root; project folders are found relative to it, not to the cwd.
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Set PROJECT_HOT_RELOAD=1 in development to reload projects whose files change;
+# off by default, so production servers never swap code under live traffic.
+PROJECT_HOT_RELOAD = os.getenv("PROJECT_HOT_RELOAD", "0") == "1"
+
+
+class ProjectLoadError(RuntimeError):
+    """Raised when a project module fails to import or build its graph."""
+
+
+def _literal(node):
+    """The value of a literal expression; None if it isn't one."""
+    # `[...] + computed` keeps its literal part, e.g. fixed keywords plus ones read from data
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        parts = [_literal(node.left), _literal(node.right)]
+        if any(isinstance(part, list) for part in parts):
+            return [value for part in parts if isinstance(part, list) for value in part]
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        return None
+
+
+def _read_literals(source: str) -> dict:
+    """Module-level names assigned a literal value in `source`, read without executing it."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return {}
+    literals = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = _literal(node.value)
+            if value is not None:
+                literals[node.targets[0].id] = value
+    return literals
+
+
+class _Entry:
+    __slots__ = ("path", "graph", "info", "error", "version", "loaded_at", "load_seconds", "warmup", "lock")
+
+    def __init__(self, path: Optional[str], graph=None, info: Optional[dict] = None):
+        self.path = path
+        self.graph = graph
+        self.info = info or {}
+        self.error = None
+        self.version = 1 if graph is not None else 0
+        self.loaded_at = time.time() if graph is not None else None
+        self.load_seconds = None
+        self.warmup = {}
+        self.lock = threading.Lock()
+
+
+class ProjectRegistry(MutableMapping):
+    """
+    Maps project names to compiled graphs, importing each project on first use.
+
+    The manifest (name -> file) is built at construction by globbing for
+    project files, without importing anything. A project's module is
+    executed and its graph built the first time it is looked up; concurrent
+    first lookups share one load. `warm()` loads every project in parallel.
+    Steps added with `add_warm_step()` run on every newly built graph before
+    it serves its first request; `status()` reports how long each took.
+
+    `info()` answers from the manifest too: until a project is loaded,
+    `describe` sees the literal module-level values of its file (see
+    `_read_literals`), so callers can choose between projects without
+    loading them all.
+
+    `watch()` hot-reloads projects whose files change. The new graph is built
+    while the old one keeps serving, then swapped in with one assignment:
+    requests that already hold the old graph finish on it. A project that
+    fails to rebuild keeps its previous version.
+
+    Args:
+        pattern (str): Glob pattern of the project files, relative to the repo root.
+        name_for (Callable): Maps a project file path to its public name.
+        build (Callable): Builds the graph from the executed module and project name.
+        marker (Callable): Maps a project name to text its file must contain to
+            be listed, checked without importing it (e.g. "def get_graph").
+        describe (Callable): Optionally collects facts about a project from
+            its module (or, before it is loaded, its literals) and name, as a
+            dict (see `info()`).
+    """
+
+    def __init__(self, pattern: str, name_for: Callable[[str], str], build: Callable,
+                 marker: Optional[Callable[[str], str]] = None, describe: Optional[Callable] = None):
+        self.pattern = str(ROOT_DIR / pattern)
+        self.name_for = name_for
+        self.build = build
+        self.marker = marker
+        self.describe = describe
+        self.warm_steps: Dict[str, Callable] = {}
+        self._entries: Dict[str, _Entry] = {}
+
+        started = time.perf_counter()
+        for path in sorted(glob.glob(self.pattern)):
+            self._add(path)
+        self.manifest_seconds = time.perf_counter() - started
+
+    def _add(self, path: str) -> Optional[str]:
+        """Adds a project file to the manifest; returns its name if it qualifies."""
+        name = self.name_for(path)
+        source = Path(path).read_text(encoding="utf-8")
+        if self.marker is not None and self.marker(name) not in source:
+            return None
+        self._entries[name] = _Entry(path, info=self._describe_source(source, name))
+        return name
+
+    def _describe_source(self, source: str, name: str) -> dict:
+        """What `describe` makes of a project's literals, before its module is executed."""
+        if self.describe is None:
+            return {}
+        return self.describe(SimpleNamespace(**_read_literals(source)), name)
+
+    # --- Mapping interface: names come from the manifest, values load lazily ---
+    def __getitem__(self, name: str):
+        entry = self._entries[name]
+        if entry.graph is None:
+            self._load(name, entry)
+        return entry.graph
+
+    def __setitem__(self, name: str, graph):
+        """Registers an already-built graph, e.g. for tests and benchmarks."""
+        self._entries[name] = _Entry(None, graph)
+
+    def info(self, name: str) -> Optional[dict]:
+        """
+        What `describe` collected about a project, without loading it: from
+        the loaded version if there is one, else from the file's literals.
+        None if the project failed to load.
+        """
+        entry = self._entries[name]
+        return entry.info if entry.error is None else None
+
+    def __delitem__(self, name: str):
+        del self._entries[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def add_warm_step(self, step: str, func: Callable):
+        """
+        Runs `func(name, graph)` on every graph built from now on, before it is
+        served, e.g. to prepare per-project caches. A failing step is reported
+        and skipped; the graph is served anyway.
+        """
+        self.warm_steps[step] = func
+
+    def _run_warm_steps(self, name: str, graph, timings: dict):
+        for step, func in self.warm_steps.items():
+            started = time.perf_counter()
+            try:
+                func(name, graph)
+            except Exception as e:
+                print(f"Warm-up step '{step}' failed for project '{name}': {e}")
+                continue
+            timings[step] = time.perf_counter() - started
+
+    def _build(self, name: str, entry: _Entry):
+        """Executes a fresh copy of the project module, builds its graph and warms it."""
+        started = time.perf_counter()
+        timings = {}
+        try:
+            # Importing runs the project's setup: tool schema conversion, binding and compiling
+            spec = importlib.util.spec_from_file_location(Path(entry.path).stem, entry.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            timings["import"] = time.perf_counter() - started
+            graph = self.build(module, name)
+            if graph is None:
+                raise ProjectLoadError(f"{entry.path} does not define project '{name}'")
+            # Metrics for the project's runs are labelled with its name
+            graph = instrument(graph, name)
+            info = self.describe(module, name) if self.describe is not None else {}
+            timings["build"] = time.perf_counter() - started - timings["import"]
+        except Exception as e:
+            entry.error = e
+            print(f"Failed to load project '{name}' from {entry.path}: {e}")
+            raise ProjectLoadError(f"Project '{name}' failed to load: {e}") from e
+        self._run_warm_steps(name, graph, timings)
+
+        # Swapping the reference is atomic; holders of the old graph keep using it
+        entry.graph = graph
+        entry.info = info
+        entry.warmup = timings
+        entry.error = None
+        entry.version += 1
+        entry.loaded_at = time.time()
+        entry.load_seconds = time.perf_counter() - started
+        print(f"Loaded project '{name}' v{entry.version} in {entry.load_seconds:.2f}s")
+
+    def _load(self, name: str, entry: _Entry):
+        with entry.lock:
+            if entry.graph is not None:
+                return
+            if entry.error is not None:
+                raise ProjectLoadError(f"Project '{name}' failed to load: {entry.error}")
+            self._build(name, entry)
+
+    def reload(self, name: str) -> bool:
+        """
+        Rebuilds a project from its file and swaps it in.
+
+        Returns False (keeping the previous version) if the rebuild fails.
+        """
+        entry = self._entries[name]
+        if entry.path is None:
+            return False
+        with entry.lock:
+            try:
+                self._build(name, entry)
+            except ProjectLoadError:
+                return False
+        return True
+
+    async def aget(self, name: str):
+        """
+        Async lookup; a first load runs in a worker thread so it doesn't block the event loop.
+
+        Raises:
+            KeyError: If the project is not in the manifest.
+            ProjectLoadError: If the project fails to load.
+        """
+        entry = self._entries[name]
+        if entry.graph is None:
+            await asyncio.to_thread(self._load, name, entry)
+        return entry.graph
+
+    # --- Warm-up ---
+    def warm(self, max_workers: int = 8):
+        """Loads every project in parallel; failures are reported, not raised."""
+        pending = [(name, entry) for name, entry in self._entries.items() if entry.graph is None]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix="project-load") as pool:
+            for future in [pool.submit(self._load, name, entry) for name, entry in pending]:
+                try:
+                    future.result()
+                except ProjectLoadError:
+                    pass
+
+    def start_warming(self, max_workers: int = 8) -> threading.Thread:
+        """Runs `warm()` in a background thread and returns the thread."""
+        thread = threading.Thread(target=self.warm, args=(max_workers,), name="project-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    # --- Hot reload ---
+    def _watch_root(self) -> str:
+        """The directory holding every project: the pattern up to its first wildcard."""
+        return os.path.dirname(self.pattern.split("*", 1)[0])
+
+    def _changed(self, paths: set) -> set:
+        """Updates the manifest for changed files and returns the names to reload."""
+        to_reload = set()
+        project_dirs = {os.path.dirname(entry.path): name for name, entry in self._entries.items() if entry.path}
+        for path in paths:
+            name = project_dirs.get(os.path.dirname(path))
+            entry = self._entries.get(name) if name else None
+            if entry is not None and not os.path.exists(entry.path):
+                print(f"Project '{name}' was removed")
+                del self._entries[name]
+            elif entry is not None:
+                # Failed projects get another chance; loaded ones are rebuilt now
+                entry.error = None
+                if entry.graph is not None:
+                    to_reload.add(name)
+                else:
+                    entry.info = self._describe_source(Path(entry.path).read_text(encoding="utf-8"), name)
+            elif fnmatch.fnmatch(path, self.pattern) and os.path.exists(path):
+                name = self._add(path)
+                if name:
+                    print(f"Found new project '{name}'")
+        return to_reload
+
+    async def watch(self):
+        """Watches the project files and reloads changed projects until cancelled."""
+        async for changes in awatch(self._watch_root()):
+            paths = {path for _, path in changes if path.endswith(".py")}
+            for name in sorted(self._changed(paths)):
+                await asyncio.to_thread(self.reload, name)
+
+    def status(self) -> dict:
+        """Version and load state of every project in the manifest."""
+        return {
+            name: {
+                "path": entry.path,
+                "loaded": entry.graph is not None,
+                "version": entry.version,
+                "loaded_at": entry.loaded_at,
+                "load_seconds": entry.load_seconds,
+                "warmup": entry.warmup,
+                "error": str(entry.error) if entry.error is not None else None,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+def agent_registry() -> ProjectRegistry:
+    """Agents in agent_projects/<name>_agent/<name>_agent.py exposing `<name>_agent`."""
+    def name_for(path: str) -> str:
+        # Same convention as before: "store_hours_agent.py" -> "store_hours"
+        return Path(path).stem.replace("_agent", "")
+
+    def build(module, name: str):
+        return getattr(module, f"{name}_agent", None)
+
+    def describe(module, name: str) -> dict:
+        # Optional module attributes used by the multi-agent router
+        return {
+            "description": getattr(module, "description", None),
+            "routing_keywords": list(getattr(module, "routing_keywords", [])),
+        }
+
+    return ProjectRegistry(
+        os.path.join("agent_projects", "*_agent", "*_agent.py"),
+        name_for, build, marker=lambda name: f"{name}_agent", describe=describe,
+    )
+
+
+def graph_registry() -> ProjectRegistry:
+    """Graphs in graph_agent_projects/<name>/graph.py exposing `get_graph()`."""
+    def name_for(path: str) -> str:
+        return os.path.basename(os.path.dirname(path))
+
+    def build(module, name: str):
+        return module.get_graph() if hasattr(module, "get_graph") else None
+
+    return ProjectRegistry(
+        os.path.join("graph_agent_projects", "*", "graph.py"),
+        name_for, build, marker=lambda name: "def get_graph",
+    )
@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import time
+from typing import Annotated, AsyncContextManager, Callable, Dict, List, Optional, TypedDict
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.types import Send
+from utilities.llm_registry import get_llm
+
+# Set ROUTER_RULES_FIRST=0 to classify every question with the LLM, instead of
+# only those the agents' routing keywords don't match.
+ROUTER_RULES_FIRST = os.getenv("ROUTER_RULES_FIRST", "1") != "0"
+# Small, cheap model used when the rules don't decide.
+ROUTER_MODEL = os.getenv("ROUTER_MODEL", "gpt-4o-mini")
+
+# Clause boundaries of a compound question: sentence ends and "and"/"also"/"plus"
+_CLAUSE_BREAK = re.compile(r"(?<=[?!;.])\s+|,?\s+(?:and|also|plus)\s+", re.IGNORECASE)
+
+CLASSIFY_PROMPT = """You route customer questions to specialised agents.
+
+Agents:
+{agents}
+
+Split the question below into the parts each agent should answer, and reply
+with JSON only: a list of {{"agent": "<name>", "question": "<sub-question>"}}.
+Leave out agents that have nothing to answer.
+
+Question: {question}"""
+
+
+def _collect_answers(current: List[dict], update: Optional[List[dict]]) -> List[dict]:
+    # `classify` sends None to drop the answers of the previous turn
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+class RouterState(TypedDict, total=False):
+    messages: Annotated[List[BaseMessage], add_messages]
+    routes: List[dict]
+    method: str
+    answers: Annotated[List[dict], _collect_answers]
+    fanout_started: float
+
+
+class AgentTask(TypedDict):
+    index: int
+    agent: str
+    question: str
+
+
+def split_clauses(question: str) -> List[str]:
+    """Splits a compound question into its clauses, e.g. at "?" and " and "."""
+    return [clause.strip() for clause in _CLAUSE_BREAK.split(question) if clause and clause.strip()]
+
+
+def parse_routes(text: str, names) -> List[dict]:
+    """
+    Reads the classifier's JSON list of {"agent", "question"} from `text`,
+    keeping only known agents; an empty list if there is none.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    return [
+        {"agent": item["agent"], "question": str(item.get("question") or "").strip()}
+        for item in items
+        if isinstance(item, dict) and item.get("agent") in names
+    ]
+
+
+def create_router_graph(agents, admit: Optional[Callable[[str], AsyncContextManager]] = None, llm=None):
+    """
+    Builds a graph that answers a question with several agents at once.
+
+    `classify` splits the latest human message into sub-questions, one per
+    agent. With ROUTER_RULES_FIRST it first matches each clause of the
+    question against the agents' `routing_keywords` (see agent_registry);
+    clauses no agent claims go with their neighbour. Only when no keyword
+    matches does it ask a small LLM, and if that fails too the whole
+    question goes to every agent. Each sub-question is then sent to its
+    agent as a parallel `ask_agent` branch (LangGraph's Send API), and
+    `merge` joins the answers in question order into one AI message.
+
+    The merged message's response_metadata["routing"] reports the routes,
+    each agent's time, the parallel wall time, the time the same calls
+    would take one after the other, and the resulting speedup.
+
+    Args:
+        agents (ProjectRegistry): The agents to route between; only the ones a
+            question is routed to are loaded.
+        admit: Optional callable returning an async context manager that each
+            agent call holds while it runs, e.g. an admission-control slot.
+        llm: Chat model of the LLM classifier; defaults to ROUTER_MODEL.
+    """
+    llm = llm or get_llm(ROUTER_MODEL, temperature=0)
+    patterns: Dict[str, tuple] = {}
+
+    def agent_infos() -> Dict[str, dict]:
+        # The registry answers from its manifest, so only the agents a question
+        # is routed to get loaded (by ask_agent); failed ones are left out
+        infos = {name: agents.info(name) for name in agents}
+        return {name: info for name, info in infos.items() if info is not None}
+
+    def pattern_for(name: str, info: dict):
+        # Compiled once per version of the agent's info; a (re)load replaces `info`
+        cached = patterns.get(name)
+        if cached is None or cached[0] is not info:
+            keywords = info.get("routing_keywords") or []
+            pattern = re.compile(r"\b(?:" + "|".join(keywords) + r")\b", re.IGNORECASE) if keywords else None
+            cached = patterns[name] = (info, pattern)
+        return cached[1]
+
+    def route_by_rules(question: str, infos: Dict[str, dict]) -> List[dict]:
+        clauses = split_clauses(question)
+        owners = [
+            [name for name, info in infos.items() if (p := pattern_for(name, info)) and p.search(clause)]
+            for clause in clauses
+        ]
+        if not any(owners):
+            return []
+        # A clause without keywords ("and for two people?") belongs to the one before it
+        for i, names in enumerate(owners):
+            if not names:
+                owners[i] = next((owners[j] for j in range(i - 1, -1, -1) if owners[j]), None) \
+                    or next(owners[j] for j in range(i + 1, len(owners)) if owners[j])
+        asked = {}
+        for clause, names in zip(clauses, owners):
+            for name in names:
+                asked.setdefault(name, []).append(clause)
+        if len(asked) == 1:
+            # One agent: it gets the question exactly as asked
+            return [{"agent": name, "question": question} for name in asked]
+        return [{"agent": name, "question": " ".join(parts)} for name, parts in asked.items()]
+
+    async def route_by_llm(question: str, infos: Dict[str, dict]) -> List[dict]:
+        listing = "\n".join(f"- {name}: {info.get('description') or name}" for name, info in infos.items())
+        try:
+            resp = await llm.ainvoke([HumanMessage(content=CLASSIFY_PROMPT.format(agents=listing, question=question))])
+        except Exception as e:
+            print(f"Router classifier failed: {e}")
+            return []
+        return [
+            {"agent": route["agent"], "question": route["question"] or question}
+            for route in parse_routes(str(resp.content), infos)
+        ]
+
+    async def classify(state: RouterState) -> RouterState:
+        question = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
+        infos = agent_infos()
+        routes, method = [], "rules"
+        if ROUTER_RULES_FIRST:
+            routes = route_by_rules(question, infos)
+        if not routes:
+            routes, method = await route_by_llm(question, infos), "llm"
+        if not routes:
+            routes, method = [{"agent": name, "question": question} for name in infos], "all"
+        return {"routes": routes, "method": method, "answers": None, "fanout_started": time.perf_counter()}
+
+    def fan_out(state: RouterState):
+        return [
+            Send("ask_agent", {"index": i, "agent": route["agent"], "question": route["question"]})
+            for i, route in enumerate(state["routes"])
+        ] or END
+
+    async def ask_agent(task: AgentTask) -> RouterState:
+        started = time.perf_counter()
+        answer = {"index": task["index"], "agent": task["agent"]}
+        try:
+            agent = await agents.aget(task["agent"])
+            graph_input = {"messages": [HumanMessage(content=task["question"])]}
+            if admit is None:
+                final_state = await agent.ainvoke(graph_input)
+            else:
+                async with admit(task["agent"]):
+                    final_state = await agent.ainvoke(graph_input)
+            answer["content"] = final_state["messages"][-1].content
+        except Exception as e:
+            # One failing agent doesn't sink the other answers
+            print(f"Router: agent '{task['agent']}' failed: {e}")
+            answer["error"] = str(e)
+        answer["seconds"] = time.perf_counter() - started
+        return {"answers": [answer]}
+
+    def merge(state: RouterState) -> RouterState:
+        parallel = time.perf_counter() - state["fanout_started"]
+        answers = sorted(state.get("answers") or [], key=lambda answer: answer["index"])
+        sequential = sum(answer["seconds"] for answer in answers)
+        routes = [
+            {**route, "seconds": answer["seconds"], **({"error": answer["error"]} if "error" in answer else {})}
+            for route, answer in zip(state["routes"], answers)
+        ]
+        content = "\n\n".join(
+            answer["content"] if "error" not in answer else f"({answer['agent']} could not answer this part.)"
+            for answer in answers
+        )
+        report = {
+            "method": state["method"],
+            "routes": routes,
+            "parallel_seconds": parallel,
+            "sequential_seconds": sequential,
+            "speedup": sequential / parallel if parallel > 0 else 1.0,
+        }
+        return {"messages": [AIMessage(content=content, response_metadata={"routing": report})]}
+
+    graph = StateGraph(RouterState)
+    graph.add_node("classify", classify)
+    graph.add_node("ask_agent", ask_agent)
+    graph.add_node("merge", merge)
+    graph.add_edge(START, "classify")
+    graph.add_conditional_edges("classify", fan_out, ["ask_agent", END])
+    graph.add_edge("ask_agent", "merge")
+    graph.add_edge("merge", END)
+    return graph.compile()
@@ -0,0 +1,88 @@
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from langchain_core.messages import BaseMessage
+from chatbot_multi_project_api.utils import parse_messages
+from utilities.checkpointers import make_checkpointer, close_checkpointer
+
+# Session turns are checkpointed once, when the turn ends, instead of after
+# every step; a turn that fails halfway is simply not recorded.
+SESSION_DURABILITY = "exit"
+
+
+class SessionStore:
+    """
+    Keeps conversation history on the server for the multi-project APIs.
+
+    A request carrying a `session_id` only sends its new message; the history
+    lives in a checkpointer under the thread "<name>:<session_id>", so the
+    same session id can be used with several agents or graphs without mixing
+    their conversations. Requests without a `session_id` stay stateless and
+    send the whole `messages` array, as before.
+
+    Args:
+        checkpointer: The checkpointer holding the sessions. Defaults to the
+            one selected by the CHECKPOINTER env var.
+    """
+
+    def __init__(self, checkpointer=None):
+        self.checkpointer = checkpointer or make_checkpointer()
+        self._graphs = {}
+
+    def graph(self, name: str, graph):
+        """Returns a copy of `graph` that persists its state in this store."""
+        cached = self._graphs.get(name)
+        if cached is None or cached[0] is not graph:
+            cached = (graph, graph.copy({"checkpointer": self.checkpointer}))
+            self._graphs[name] = cached
+        return cached[1]
+
+    @staticmethod
+    def config(name: str, session_id: str) -> dict:
+        return {"configurable": {"thread_id": f"{name}:{session_id}"}}
+
+    def prepare(self, body: dict, name: str, graph) -> Tuple[object, dict, Optional[dict]]:
+        """
+        Turns a request body into (graph, graph input, config); the config is
+        None for stateless requests.
+
+        Session requests send `message`, either a {"role", "content"} object
+        or a plain string; stateless requests send `messages`.
+        """
+        session_id = body.get("session_id")
+        if not session_id:
+            return graph, {"messages": parse_messages(body.get("messages", []))}, None
+
+        message = body.get("message")
+        if isinstance(message, str):
+            message = {"role": "human", "content": message}
+        messages = parse_messages([message]) if isinstance(message, dict) else []
+        if not messages:
+            raise HTTPException(status_code=400, detail="Missing 'message' in session request")
+        return self.graph(name, graph), {"messages": messages}, self.config(name, str(session_id))
+
+    async def delete(self, name: str, session_id: str):
+        """Forgets the history of one session."""
+        await self.checkpointer.adelete_thread(self.config(name, session_id)["configurable"]["thread_id"])
+
+    def close(self):
+        close_checkpointer(self.checkpointer)
+
+
+def stream_options(config: Optional[dict]) -> dict:
+    """Extra `astream` arguments for a request; empty for stateless requests."""
+    return {"durability": SESSION_DURABILITY} if config is not None else {}
+
+
+async def run_turn(graph, graph_input: dict, config: dict) -> List[BaseMessage]:
+    """
+    Runs one session turn and returns only the messages it added.
+
+    Reading node updates avoids sending the whole stored history back to the
+    client on every turn.
+    """
+    new_messages = list(graph_input["messages"])
+    async for event in graph.astream(graph_input, config, stream_mode="updates", durability=SESSION_DURABILITY):
+        for value in event.values():
+            if isinstance(value, dict):
+                new_messages.extend(value.get("messages", []))
+    return new_messages
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+from langchain_core.messages import (
+    AIMessageChunk, SystemMessage, ToolMessage, message_chunk_to_message, messages_from_dict, messages_to_dict,
+)
+from utilities.instrumentation import metrics
+from utilities.llm_registry import awarm_llm_clients
+from chatbot_multi_project_api.utils import format_messages, parse_messages
+
+logger = logging.getLogger(__name__)
+
+# How the multi-project APIs warm up: "lazy" (nothing; each project loads on
+# its first request), "background" (after startup, reporting ready once done;
+# requests arriving earlier load what they need on demand) or "eager" (before
+# the server accepts traffic).
+PROJECT_WARMUP = os.getenv("PROJECT_WARMUP", "background")
+WARMUP_MODES = ("lazy", "background", "eager")
+
+WARMUP_READY = metrics.gauge("warmup_ready", "1 once the startup warm-up has finished.")
+WARMUP_SECONDS = metrics.gauge("warmup_step_seconds", "Duration of each process-wide warm-up step.", ["step"])
+PROJECT_WARMUP_SECONDS = metrics.gauge(
+    "project_warmup_step_seconds", "Duration of each warm-up step of the current version of a project.",
+    ["project", "step"])
+
+
+def warm_message_models():
+    """Runs every message type through the request, response and checkpoint conversions once."""
+    messages = parse_messages([{"role": "human", "content": "warm-up"}, {"role": "ai", "content": "warm-up"}])
+    chunk = AIMessageChunk(content="warm", id="warmup") + AIMessageChunk(
+        content="-up", id="warmup", tool_call_chunks=[{"name": "warmup", "args": "{}", "id": "call_0", "index": 0}])
+    messages += [
+        SystemMessage(content="warm-up"),
+        message_chunk_to_message(chunk),
+        ToolMessage(content="warm-up", tool_call_id="call_0"),
+    ]
+    format_messages(messages_from_dict(messages_to_dict(messages)))
+    for message in messages:
+        type(message).model_validate_json(message.model_dump_json())
+
+
+class Warmup:
+    """
+    The startup warm-up of a multi-project API, and its readiness.
+
+    `run()` builds every project of the registry in parallel (with the
+    registry's warm steps, see `ProjectRegistry.add_warm_step`), builds the
+    message models, and prepares the shared LLM clients: provider response
+    models and pooled connections (see `awarm_llm_clients`). Until it has
+    finished, `ready` is False and `status()` tells a readiness probe to wait.
+    Every step is timed, per project and process-wide, for `status()` and the
+    Prometheus metrics.
+
+    Args:
+        registry (ProjectRegistry): The projects to warm.
+        mode (str): One of WARMUP_MODES; defaults to the PROJECT_WARMUP env var.
+    """
+
+    def __init__(self, registry, mode: str = None):
+        self.registry = registry
+        self.mode = mode or PROJECT_WARMUP
+        if self.mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown PROJECT_WARMUP mode: {self.mode}")
+        self.ready = False
+        self.seconds: Optional[float] = None
+        self.steps = {}
+        self._task = None
+
+    async def _step(self, step: str, func):
+        started = time.perf_counter()
+        await asyncio.to_thread(func)
+        self.steps[step] = time.perf_counter() - started
+
+    async def run(self):
+        """Warms everything now; failures are reported, not raised."""
+        started = time.perf_counter()
+        try:
+            # Projects first: the provider warm-up opens connections for the models they use
+            try:
+                await self._step("projects", self.registry.warm)
+            except Exception as e:
+                logger.warning("Could not warm the projects: %s", e)
+            try:
+                await self._step("messages", warm_message_models)
+            except Exception as e:
+                logger.warning("Could not warm the message models: %s", e)
+            try:
+                self.steps.update(await awarm_llm_clients())
+            except Exception as e:
+                logger.warning("Could not warm the LLM clients: %s", e)
+        finally:
+            # A failed (or cancelled) warm-up only costs speed: requests load what they need
+            self.seconds = time.perf_counter() - started
+            self.ready = True
+        logger.info("Warm-up done in %.2fs: %s", self.seconds,
+                    ", ".join(f"{step} {seconds:.2f}s" for step, seconds in self.steps.items()))
+
+    async def start(self):
+        """Starts the warm-up as selected by `mode`; call it from the FastAPI lifespan."""
+        if self.mode == "eager":
+            await self.run()
+        elif self.mode == "background":
+            self._task = asyncio.create_task(self.run())
+        else:
+            self.ready = True
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def status(self) -> dict:
+        """Readiness, process-wide step timings, and per-project step timings, in seconds."""
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "seconds": self.seconds,
+            "steps": dict(self.steps),
+            "projects": {
+                name: {"load_seconds": status["load_seconds"], **status["warmup"]}
+                for name, status in self.registry.status().items() if status["loaded"]
+            },
+        }
+
+    def collect(self):
+        WARMUP_READY.set(1 if self.ready else 0)
+        for step, seconds in self.steps.items():
+            WARMUP_SECONDS.set(seconds, step=step)
+        for name, status in self.registry.status().items():
+            for step, seconds in status["warmup"].items():
+                PROJECT_WARMUP_SECONDS.set(seconds, project=name, step=step)
@@ -1,47 +1,44 @@
 import os
-from typing import Annotated, List, TypedDict
+from typing import List
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm, aclose_llm_clients
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
 from fastapi.middleware.cors import CORSMiddleware
+from utilities.instrumentation import instrument, prometheus_response, trace_requests
+from utilities.writer_pipeline import create_writer_graph
+from utilities.streaming import TOKEN_STREAM_MODE, StreamHub, stream_message_events, stream_token_events
 
 # Load environment variables
 load_dotenv()
 
-# --- Define State ---
-class State(TypedDict):
-    messages: Annotated[List[BaseMessage], add_messages]
+# --- Build Graph ---
+def create_graph(llm=None):
+    """
+    Builds the writer -> enhancer graph, pipelined when WRITER_PIPELINE=1
+    (see utilities/writer_pipeline.py). `llm` replaces the shared gpt-4o-mini model.
+    """
+    llm = llm or get_llm("gpt-4o-mini", temperature=0)
+    return instrument(create_writer_graph(llm, "Make this sound more exciting: {text}"), "chatbot_streaming")
 
-# --- Initialize LLM ---
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+app_graph = create_graph()
 
-# --- Define Nodes ---
-def writer(state: State) -> State:
-    resp = llm.invoke(state["messages"])
-    return {"messages": [AIMessage(content=resp.content)]}
+# --- FastAPI App ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cancels running streams and closes the pooled LLM connections when the server shuts down."""
+    yield
+    await streams.aclose()
+    await aclose_llm_clients()
 
-def enhancer(state: State) -> State:
-    last_msg = state["messages"][-1].content
-    resp = llm.invoke([HumanMessage(content=f"Make this sound more exciting: {last_msg}")])
-    return {"messages": [AIMessage(content=resp.content)]}
+app = FastAPI(lifespan=lifespan)
+trace_requests(app)
 
-# --- Build Graph ---
-graph = StateGraph(State)
-graph.add_node("writer", writer)
-graph.add_node("enhancer", enhancer)
-graph.add_edge(START, "writer")
-graph.add_edge("writer", "enhancer")
-graph.add_edge("enhancer", END)
-app_graph = graph.compile()
-
-# --- FastAPI App ---
-app = FastAPI()
+# Runs SSE streams with heartbeats and a replay buffer for reconnecting clients
+streams = StreamHub()
 
 # Allow client requests (adjust origins if you want stricter security)
 app.add_middleware(
@@ -64,31 +61,41 @@ def parse_messages(data: List[dict]) -> List[BaseMessage]:
             msgs.append(AIMessage(content=content))
     return msgs
 
+# Helper: format graph messages as JSON-friendly dicts
+def format_messages(msgs: List[BaseMessage]) -> List[dict]:
+    return [{"role": "human" if isinstance(m, HumanMessage) else "ai", "content": m.content}
+            for m in msgs]
+
 @app.post("/chat")
 async def chat(request: Request):
     """Return final graph result given chat history."""
     body = await request.json()
     messages = parse_messages(body.get("messages", []))
-    final_state = app_graph.invoke({"messages": messages})
-    return {
-        "messages": [{"role": "human" if isinstance(m, HumanMessage) else "ai", "content": m.content}
-                     for m in final_state["messages"]]
-    }
+    final_state = await app_graph.ainvoke({"messages": messages})
+    return {"messages": format_messages(final_state["messages"])}
 
 @app.post("/stream")
 async def stream(request: Request):
-    """Stream graph execution step by step as Server-Sent Events (SSE)."""
+    """
+    Stream graph execution as Server-Sent Events: a JSON `message` event per
+    node (or `token` events in mode "tokens"), then `end` with the final
+    messages. Send `Last-Event-ID` to resume a dropped stream.
+    """
+    resumed = streams.resume(request)
+    if resumed is not None:
+        return resumed
+
     body = await request.json()
     messages = parse_messages(body.get("messages", []))
 
-    def event_generator():
-        for event in app_graph.stream({"messages": messages}, stream_mode="updates"):
-            for node, value in event.items():
-                msg = value["messages"][-1]
-                role = "human" if isinstance(msg, HumanMessage) else "ai"
-                yield f"data: [{node}] {role}: {msg.content}\n\n"
-
-        final_state = app_graph.invoke({"messages": messages})
-        yield "data: [final] done\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    if body.get("mode") == TOKEN_STREAM_MODE:
+        events = stream_token_events(app_graph, {"messages": messages})
+    else:
+        # A closed tab stops the graph, e.g. enhancer never runs if the client left during writer
+        events = stream_message_events(app_graph, {"messages": messages}, final=format_messages)
+    return streams.response(request, events)
+
+@app.get("/metrics")
+def metrics():
+    """Node, LLM and tool timings, token usage and cost in the Prometheus text format."""
+    return prometheus_response()
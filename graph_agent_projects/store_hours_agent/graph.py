@@ -1,21 +1,24 @@
 import os
 import json
+import uuid
 import operator
 from typing import TypedDict, Annotated, List, Union
 from datetime import datetime
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from utilities.llm_registry import get_llm
 from langchain_core.tools import tool
-from langchain_core.utils.function_calling import format_tool_to_openai_tool
+from utilities.tool_executor import aexecute_tool_calls
+from utilities.schedule import StoreHoursRouter, WeeklySchedule
+from utilities.prompt_prefix import PromptPrefix
 
 # 1. Load environment variables
 load_dotenv()
 
 # 2. Set up the LLM with tool-calling capabilities
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = get_llm("gpt-4o-mini", temperature=0)
 
 # 3. Define the State
 class AgentState(TypedDict):
@@ -42,8 +45,11 @@ def get_current_datetime_tool() -> str:
     now = datetime.now()
     return now.strftime("%A, %B %d, %Y at %I:%M %p")
 
+# Common questions are answered straight from the parsed schedule
+store_hours_router = StoreHoursRouter(WeeklySchedule.parse(STORE_HOURS_DATA))
+
 tools = [get_current_datetime_tool]
-llm_with_tools = llm.bind_tools(tools)
+tool_map = {tool.name: tool for tool in tools}
 
 # 6. Define the Agent's System Message
 # This will be prepended to every conversation.
@@ -59,33 +65,39 @@ If the user mentions a specific date or time, use that instead.
 
 Respond concisely and in a friendly manner.
 """
-system_message = SystemMessage(content=system_message_content)
+# System prompt and tool schemas are serialized once, so every request starts
+# with the same bytes and the provider's prompt cache can reuse them.
+prefix = PromptPrefix(system_message_content, tools)
+system_message = prefix.system_message
+llm_with_tools = prefix.bind(llm)
 
 # 7. Define the Nodes of the Graph
-def agent_node(state: AgentState):
+async def agent_node(state: AgentState):
     """
     This node invokes the LLM with the current conversation history and system message.
+    Questions the schedule router can answer on its own skip the LLM.
     """
+    last_message = state["messages"][-1]
+    if isinstance(last_message, HumanMessage) and isinstance(last_message.content, str):
+        answer = store_hours_router.answer(last_message.content)
+        if answer is not None:
+            return {"messages": [AIMessage(content=answer, id=f"run-{uuid.uuid4()}", response_metadata={"fast_path": True})]}
+
     # Prepend the system message to the user's message for the LLM to process.
     messages = [system_message] + state["messages"]
-    result = llm_with_tools.invoke(messages)
+    result = await llm_with_tools.ainvoke(messages)
+    share = prefix.cached_share(result)
+    if share is not None:
+        result.response_metadata["cached_prefix_share"] = share
     return {"messages": [result]}
 
-def tool_node(state: AgentState):
+async def tool_node(state: AgentState):
     """
-    This node executes the tool call based on the LLM's decision.
+    This node executes all tool calls of the LLM's decision concurrently.
     """
     last_message = state["messages"][-1]
-    tool_call = last_message.tool_calls[0]
-    tool_name = tool_call["name"]
-    tool_input = tool_call["args"]
-
-    if tool_name == "get_current_datetime_tool":
-        tool_output = get_current_datetime_tool.invoke(tool_input)
-    else:
-        tool_output = f"Unknown tool: {tool_name}"
-    
-    return {"messages": [ToolMessage(content=tool_output, name=tool_name, tool_call_id=tool_call["id"])]}
+    tool_messages = await aexecute_tool_calls(last_message.tool_calls, tool_map)
+    return {"messages": tool_messages}
 
 def should_continue(state: AgentState):
     """
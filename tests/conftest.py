@@ -0,0 +1,35 @@
+import os
+import pytest
+
+# Modules build their shared models at import; no real provider is ever called
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("PROJECT_HOT_RELOAD", "0")
+
+from utilities.fake_llm import FakeChatModel
+
+
+class CountingChatModel(FakeChatModel):
+    """A FakeChatModel recording the prompt of every call it starts and finishes."""
+    started: list = []
+    finished: list = []
+
+    def calls_with(self, prefix: str) -> int:
+        """Started calls whose last message starts with `prefix`."""
+        return sum(prompt.startswith(prefix) for prompt in self.started)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.started.append(messages[-1].content)
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        self.finished.append(messages[-1].content)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.started.append(messages[-1].content)
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+        self.finished.append(messages[-1].content)
+
+
+@pytest.fixture
+def counting_llm():
+    return CountingChatModel(response="A slogan.")
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, MessagesState, START
+from chatbot_multi_project_api.batch import run_batch
+
+
+def echo_graph():
+    def answer(state: MessagesState):
+        if state["messages"][-1].content == "fail":
+            raise ValueError("boom")
+        return {"messages": [AIMessage(content=f"Echo: {state['messages'][-1].content}")]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("answer", answer)
+    graph.add_edge(START, "answer")
+    return graph.compile()
+
+
+async def get_graph(name: str):
+    if name != "echo":
+        raise HTTPException(status_code=404, detail=f"Agent '{name}' not found")
+    return echo_graph()
+
+
+def run(items, get_graph=get_graph) -> list:
+    async def collect():
+        return [result async for result in run_batch(items, get_graph, concurrency=4)]
+
+    return asyncio.run(asyncio.wait_for(collect(), timeout=5))
+
+
+def by_index(results: list) -> dict:
+    return {result["index"]: result for result in results if "index" in result}
+
+
+def test_answers_every_item_and_counts_them():
+    results = run([
+        {"id": "a", "agent": "echo", "messages": [{"role": "human", "content": "hi"}]},
+        {"id": "b", "agent": "echo", "messages": [{"role": "human", "content": "fail"}]},
+        {"id": "c", "agent": "nobody", "messages": [{"role": "human", "content": "hi"}]},
+        {"id": "d", "messages": []},
+    ])
+    items = by_index(results)
+    assert items[0]["messages"][-1] == {"role": "ai", "content": "Echo: hi"}
+    assert items[1]["error"] == "ValueError: boom"
+    assert items[2]["error"] == "Agent 'nobody' not found"
+    assert items[3]["error"] == "Missing 'agent' in item"
+    assert sorted(item["id"] for item in items.values()) == ["a", "b", "c", "d"]
+    assert results[-1] == {"summary": {"items": 4, "succeeded": 1, "failed": 3}}
+
+
+@pytest.mark.parametrize("messages", ["hello", ["hello"], {"role": "human"}])
+def test_malformed_messages_get_an_error_instead_of_hanging(messages):
+    results = run([
+        {"agent": "echo", "messages": messages},
+        {"agent": "echo", "messages": [{"role": "human", "content": "hi"}]},
+    ])
+    items = by_index(results)
+    assert items[0]["error"] == "'messages' must be a list of objects"
+    assert "messages" in items[1]
+    assert results[-1] == {"summary": {"items": 2, "succeeded": 1, "failed": 1}}
+
+
+def test_a_failing_group_reports_its_items():
+    class Broken:
+        async def abatch_as_completed(self, inputs, config=None, return_exceptions=False):
+            raise RuntimeError("graph exploded")
+            yield
+
+    async def get_broken(name: str):
+        return Broken()
+
+    results = run([{"agent": "echo", "messages": []}, {"agent": "echo", "messages": []}], get_broken)
+    assert [result["error"] for result in by_index(results).values()] == ["graph exploded"] * 2
+    assert results[-1] == {"summary": {"items": 2, "succeeded": 0, "failed": 2}}
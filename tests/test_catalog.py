@@ -0,0 +1,41 @@
+from utilities.catalog import MenuItem, PriceCatalog, make_catalog_tools
+
+ITEMS = [
+    MenuItem(name="Chocolate Lava Cake", price=7.5, category="Desserts"),
+    MenuItem(name="New York Cheesecake", price=6.0, category="Desserts"),
+    MenuItem(name="Chocolate Milkshake", price=5.0, category="Beverages"),
+    MenuItem(name="Chicken Wings", price=11.0, category="Appetizers"),
+]
+
+
+def tools():
+    catalog = PriceCatalog(ITEMS)
+    return {tool.name: tool for tool in make_catalog_tools(lambda: catalog)}
+
+
+def test_category_alone_matches_fuzzily():
+    result = tools()["search_menu"].invoke({"category": "dessert"})
+    assert "Chocolate Lava Cake" in result and "Cheesecake" in result
+
+
+def test_query_and_category_use_the_same_fuzzy_category():
+    result = tools()["search_menu"].invoke({"query": "chocolate", "category": "dessert"})
+    assert "Chocolate Lava Cake" in result
+    assert "Milkshake" not in result
+
+
+def test_category_matches_are_not_crowded_out_by_other_categories():
+    snacks = [MenuItem(name=f"Chocolate {i}", price=2.0, category="Snacks") for i in range(20)]
+    catalog = PriceCatalog(snacks + ITEMS)
+    [search_menu] = [t for t in make_catalog_tools(lambda: catalog) if t.name == "search_menu"]
+    result = search_menu.invoke({"query": "chocolate", "category": "desserts", "limit": 1})
+    assert result == ITEMS[0].describe()
+
+
+def test_unknown_category_matches_nothing():
+    result = tools()["search_menu"].invoke({"query": "chocolate", "category": "pasta"})
+    assert result == "No matching menu items. Menu categories: Appetizers, Beverages, Desserts"
+
+
+def test_no_arguments_lists_the_categories():
+    assert tools()["search_menu"].invoke({}) == "Menu categories: Appetizers, Beverages, Desserts"
@@ -0,0 +1,45 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from chatbot_streaming_api import chatbot_streaming_api as api
+
+ENHANCE_PREFIX = "Make this sound more exciting:"
+BODY = {"messages": [{"role": "human", "content": "Write a slogan"}]}
+
+
+@pytest.fixture
+def client(monkeypatch, counting_llm):
+    monkeypatch.setattr(api, "app_graph", api.create_graph(counting_llm))
+    with TestClient(api.app) as client:
+        yield client
+
+
+def events(response) -> list:
+    """(event, data) pairs of an SSE response, without heartbeats."""
+    parsed = []
+    for frame in response.text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+@pytest.mark.parametrize("mode", [None, "tokens"])
+def test_stream_runs_each_model_call_once(client, counting_llm, mode):
+    response = client.post("/stream", json={**BODY, "mode": mode} if mode else BODY)
+    assert response.status_code == 200
+    assert events(response)[-1][0] == "end"
+
+    # One turn: the writer's call and the enhancer's call, each exactly once
+    assert counting_llm.calls_with(ENHANCE_PREFIX) == 1
+    assert len(counting_llm.started) - counting_llm.calls_with(ENHANCE_PREFIX) == 1
+
+
+def test_end_event_carries_the_streamed_final_state(client, counting_llm):
+    final = events(client.post("/stream", json=BODY))[-1]
+    assert final == ("end", {"messages": [
+        {"role": "human", "content": "Write a slogan"},
+        {"role": "ai", "content": "A slogan."},
+        {"role": "ai", "content": "A slogan."},
+    ]})
+    assert len(counting_llm.started) == 2
@@ -0,0 +1,154 @@
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from utilities import checkpointers
+from utilities.checkpointers import BoundedMemorySaver, SQLiteCheckpointer
+from utilities.instrumentation import metrics
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"))
+    yield saver
+    saver.close()
+
+
+def _put(saver: SQLiteCheckpointer, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    # In a worker, so a dead writer thread fails the test instead of hanging it
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(saver.put, config, empty_checkpoint(), {"step": 0}, {}).result(timeout=5)
+
+
+@pytest.mark.parametrize("statement", [
+    # Fails inside the transaction
+    ("INSERT INTO missing_table VALUES (?)", (1,)),
+    # Ends the transaction early, so both COMMIT and ROLLBACK fail
+    ("COMMIT", ()),
+])
+def test_writer_survives_a_failing_write(saver, statement):
+    with pytest.raises(sqlite3.Error):
+        saver._submit([statement]).result(timeout=5)
+
+    config = _put(saver, "after-failure")
+    assert saver.get_tuple(config).config["configurable"]["thread_id"] == "after-failure"
+
+
+def test_a_bad_write_fails_alone_in_its_group(saver):
+    config = {"configurable": {"thread_id": "good", "checkpoint_ns": ""}}
+    statements, next_config, _ = saver._put_statements(config, empty_checkpoint(), {"step": 0})
+    good, bad = Future(), Future()
+    # checkpoint_id is NOT NULL: an integrity error in the middle of the group
+    bad_statement = ("INSERT INTO checkpoints (thread_id, checkpoint_id) VALUES (?, ?)", ("bad", None))
+    conn = saver._connect()
+    saver._commit(conn, [([bad_statement], bad), (statements, good)])
+    conn.close()
+
+    assert good.result(timeout=0) is None
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result(timeout=0)
+    assert saver.get_tuple(next_config).checkpoint["id"] == next_config["configurable"]["checkpoint_id"]
+
+
+def test_round_trip(saver):
+    thread = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+    first = saver.put(thread, empty_checkpoint(), {"step": 0}, {})
+    second = saver.put(first, empty_checkpoint(), {"step": 1}, {})
+
+    latest = saver.get_tuple(thread)
+    assert latest.config == second
+    assert latest.parent_config == first
+    assert saver.get_tuple(first).metadata["step"] == 0
+    assert [saved.metadata["step"] for saved in saver.list(thread)] == [1, 0]
+    assert [saved.config for saved in saver.list(thread, before=second)] == [first]
+    assert [saved.metadata["step"] for saved in saver.list(None, filter={"step": 0})] == [0]
+
+    # Pending writes replace the cached tuple
+    saver.put_writes(second, [("messages", "hello")], task_id="task-1")
+    assert saver.get_tuple(thread).pending_writes == [("task-1", "messages", "hello")]
+
+    # Another worker's newer put isn't hidden by this worker's cached tuple
+    other = SQLiteCheckpointer(saver.path)
+    try:
+        third = other.put(second, empty_checkpoint(), {"step": 2}, {})
+    finally:
+        other.close()
+    assert saver.get_tuple(thread).config == third
+    assert saver.get_tuple(thread).metadata["step"] == 2
+
+    saver.delete_thread("t1")
+    assert saver.get_tuple(thread) is None
+    assert list(saver.list(thread)) == []
+
+
+def _memory_put(saver: BoundedMemorySaver, thread_id: str, parent: dict = None, payload: str = "") -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"]["payload"] = payload
+    config = parent or {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    return saver.put(config, checkpoint, {"step": 0}, {})
+
+
+def _threads(saver: BoundedMemorySaver) -> set:
+    return {saved.config["configurable"]["thread_id"] for saved in saver.list(None)}
+
+
+def test_memory_evicts_the_least_recently_used_thread():
+    saver = BoundedMemorySaver(max_threads=2)
+    a = _memory_put(saver, "a")
+    _memory_put(saver, "b")
+    saver.get_tuple(a)
+    _memory_put(saver, "c")
+    assert _threads(saver) == {"a", "c"}
+    assert saver.stats()["evicted_threads"] == {"max_threads": 1, "ttl": 0, "max_bytes": 0}
+
+
+def test_memory_keeps_the_latest_checkpoints_of_a_thread():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=2)
+    first = _memory_put(saver, "a", payload="x" * 1000)
+    saver.put_writes(first, [("messages", "y" * 1000)], task_id="task-1")
+    second = _memory_put(saver, "a", parent=first)
+    third = _memory_put(saver, "a", parent=second)
+
+    assert [saved.config for saved in saver.list({"configurable": {"thread_id": "a"}})] == [third, second]
+    assert saver.get_tuple(first) is None
+    stats = saver.stats()
+    assert stats["checkpoints"] == 2 and stats["evicted_checkpoints"] == 1
+    # The dropped checkpoint's payload and writes no longer count
+    assert stats["bytes"] < 1000
+
+
+def test_memory_expires_idle_threads(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(checkpointers, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    saver = BoundedMemorySaver(ttl_seconds=60)
+    _memory_put(saver, "idle")
+    now[0] = 30
+    _memory_put(saver, "active")
+    now[0] = 70
+    _memory_put(saver, "new")
+    assert _threads(saver) == {"active", "new"}
+    assert saver.stats()["evicted_threads"]["ttl"] == 1
+
+
+def test_memory_stays_under_max_bytes():
+    saver = BoundedMemorySaver(max_bytes=3000)
+    for thread_id in "abc":
+        _memory_put(saver, thread_id, payload="x" * 1000)
+    assert _threads(saver) == {"b", "c"}
+    assert saver.stats()["bytes"] <= 3000
+    assert saver.stats()["evicted_threads"]["max_bytes"] == 1
+    # The thread being written is kept even when it alone is over the limit
+    _memory_put(saver, "huge", payload="x" * 5000)
+    assert _threads(saver) == {"huge"}
+
+
+def test_memory_stats_reach_the_metrics():
+    saver = BoundedMemorySaver(max_threads=1)
+    _memory_put(saver, "a")
+    _memory_put(saver, "b")
+    saver.collect()
+    rendered = metrics.render()
+    assert 'checkpointer_evicted_threads_total{reason="max_threads"} 1' in rendered
+    assert "checkpointer_threads 1" in rendered
@@ -0,0 +1,87 @@
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from conftest import CountingChatModel
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+from utilities.history import SUMMARY_PREFIX, HistoryPolicy
+
+
+def count_words(messages) -> int:
+    # One token per word keeps the budgets in these tests easy to follow
+    return sum(len(str(message.content).split()) + 1 for message in messages)
+
+
+def policy(max_tokens: int, **kwargs) -> HistoryPolicy:
+    return HistoryPolicy(max_tokens=max_tokens, token_counter=count_words, **kwargs)
+
+
+def tool_call(call_id: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": "lookup", "args": {}, "id": call_id}])
+
+
+def turns(count: int) -> list:
+    """`count` question/answer pairs of 4 words each, i.e. 5 tokens per message."""
+    return [
+        message for i in range(count)
+        for message in (HumanMessage(content=f"question {i} four words"), AIMessage(content=f"answer {i} four words"))
+    ]
+
+
+def test_keeps_the_newest_messages_within_the_budget():
+    system = SystemMessage(content="Be brief.")
+    history = [system] + turns(4) + [HumanMessage(content="latest")]
+    compacted, saved = policy(max_tokens=22).compact(history)
+    assert compacted == [system] + history[-5:]
+    assert saved == count_words(history[1:-5])
+
+
+def test_keeps_the_question_when_a_long_tool_result_follows_it():
+    question = HumanMessage(content="What does the big report say?")
+    history = turns(2) + [question, tool_call("call_1"),
+                          ToolMessage(content="word " * 200, tool_call_id="call_1")]
+    compacted, _ = policy(max_tokens=20).compact(history)
+    assert compacted == history[-3:]
+
+
+def test_tool_calls_and_results_are_dropped_or_kept_together():
+    exchange = [tool_call("call_1"), ToolMessage(content="one", tool_call_id="call_1"),
+                ToolMessage(content="two", tool_call_id="call_1")]
+    history = [HumanMessage(content="look it up")] + exchange + [AIMessage(content="found " * 10)] + turns(2) \
+        + [HumanMessage(content="latest")]
+    # The latest tool exchange is pinned even though older than the window
+    compacted, _ = policy(max_tokens=25).compact(history)
+    assert compacted[:3] == exchange
+    assert HumanMessage(content="look it up") not in compacted
+    # Without pinning, the whole exchange goes
+    compacted, _ = policy(max_tokens=25, keep_tool_exchanges=0).compact(history)
+    assert not any(isinstance(m, ToolMessage) or getattr(m, "tool_calls", None) for m in compacted)
+
+
+def test_summary_is_updated_with_only_the_newly_dropped_messages():
+    summarizer = CountingChatModel(response="They asked things.")
+    history_policy = policy(max_tokens=40, summary_llm=summarizer, summary_max_tokens=20)
+    history = turns(3) + [HumanMessage(content="latest")]
+
+    compacted, _ = asyncio.run(history_policy.acompact(history))
+    assert compacted[0] == SystemMessage(content=SUMMARY_PREFIX + "They asked things.")
+    assert "question 0" in summarizer.started[-1] and "(none)" in summarizer.started[-1]
+
+    # Same conversation again: the stored summary is reused without a call
+    asyncio.run(history_policy.acompact(history))
+    assert len(summarizer.started) == 1
+
+    # Two more turns: only the messages that newly fell out are summarized
+    asyncio.run(history_policy.acompact(history[:-1] + turns(5)[6:] + [HumanMessage(content="latest")]))
+    assert len(summarizer.started) == 2
+    assert "question 0" not in summarizer.started[-1]
+    assert "They asked things." in summarizer.started[-1]
+
+
+def test_agent_reports_the_tokens_saved():
+    history_policy = policy(max_tokens=12)
+    agent = create_agent(FakeChatModel(response="Hello."), "Be brief.", [], history_policy=history_policy)
+    history = turns(4) + [HumanMessage(content="latest")]
+    answer = asyncio.run(agent.ainvoke({"messages": history}))["messages"][-1]
+    saved = answer.response_metadata["history_tokens_saved"]
+    assert saved == count_words(history[:-3])
+    assert history_policy.stats() == {"turns": 1, "tokens_saved": saved}
@@ -0,0 +1,20 @@
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage
+from utilities.common_agent_library import create_agent
+from utilities.fake_llm import FakeChatModel
+from utilities.history import HistoryPolicy
+from utilities.response_cache import ResponseCache
+
+
+def test_metadata_added_after_caching_stays_out_of_the_entry():
+    # The compacted history gives the answer a history_tokens_saved annotation
+    cache = ResponseCache()
+    agent = create_agent(FakeChatModel(response="Hello."), "Be brief.", [], response_cache=cache,
+                         history_policy=HistoryPolicy(max_tokens=20))
+    history = [HumanMessage(content="filler " * 50), AIMessage(content="ok"), HumanMessage(content="Hi")]
+    answer = asyncio.run(agent.ainvoke({"messages": history}))["messages"][-1]
+    assert answer.response_metadata.get("history_tokens_saved")
+
+    [(_, cached)] = cache._exact.values()
+    assert cached is not answer
+    assert "history_tokens_saved" not in cached.response_metadata
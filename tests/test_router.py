@@ -0,0 +1,63 @@
+import asyncio
+from langchain_core.messages import HumanMessage
+from conftest import CountingChatModel
+from chatbot_multi_project_api.registry import ProjectRegistry, agent_registry
+from chatbot_multi_project_api.router import create_router_graph
+
+AGENT = '''
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, MessagesState, START
+
+{setup}
+description = "Questions about {name}"
+routing_keywords = [r"{name}"] + [r"{name}s"]
+graph = StateGraph(MessagesState)
+graph.add_node("answer", lambda state: {{"messages": [AIMessage(content="About {name}.")]}})
+graph.add_edge(START, "answer")
+{name}_agent = graph.compile()
+'''
+
+
+def make_registry(tmp_path, broken=()):
+    for name in ("apple", "pear", "plum"):
+        folder = tmp_path / f"{name}_agent"
+        folder.mkdir()
+        setup = 'raise RuntimeError("bad config")' if name in broken else ""
+        (folder / f"{name}_agent.py").write_text(AGENT.format(name=name, setup=setup))
+    template = agent_registry()
+    return ProjectRegistry(str(tmp_path / "*_agent" / "*_agent.py"), template.name_for, template.build,
+                           marker=template.marker, describe=template.describe)
+
+
+def ask(router, question: str) -> dict:
+    final_state = asyncio.run(router.ainvoke({"messages": [HumanMessage(content=question)]}))
+    return final_state["messages"][-1].response_metadata["routing"]
+
+
+def loaded(agents) -> set:
+    return {name for name, status in agents.status().items() if status["loaded"]}
+
+
+def test_routes_from_the_manifest_and_loads_only_the_chosen_agents(tmp_path):
+    agents = make_registry(tmp_path)
+    assert agents.info("pear")["routing_keywords"] == ["pear", "pears"]
+    report = ask(create_router_graph(agents, llm=CountingChatModel(response="[]")), "Any pears?")
+    assert [route["agent"] for route in report["routes"]] == ["pear"]
+    assert report["method"] == "rules"
+    assert loaded(agents) == {"pear"}
+
+
+def test_a_broken_agent_is_loaded_once_then_left_out(tmp_path, monkeypatch):
+    agents = make_registry(tmp_path, broken={"plum"})
+    builds = []
+    build = agents._build
+    monkeypatch.setattr(agents, "_build", lambda name, entry: builds.append(name) or build(name, entry))
+    router = create_router_graph(agents, llm=CountingChatModel(response="[]"))
+
+    report = ask(router, "Plums and apples?")
+    assert {route["agent"]: "error" in route for route in report["routes"]} == {"plum": True, "apple": False}
+    assert agents.info("plum") is None
+
+    report = ask(router, "Plums and apples?")
+    assert [route["agent"] for route in report["routes"]] == ["apple"]
+    assert sorted(builds) == ["apple", "plum"]
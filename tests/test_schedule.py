@@ -0,0 +1,63 @@
+from datetime import datetime
+import pytest
+from utilities.schedule import StoreHoursRouter, WeeklySchedule
+
+HOURS = """
+Monday: 9:00 AM - 5:00 PM
+Tuesday: 9:00 AM - 5:00 PM
+Wednesday: 9:00 AM - 5:00 PM
+Thursday: 9:00 AM - 5:00 PM
+Friday: 9:00 AM - 5:00 PM
+Saturday: 10:00 AM - 4:00 PM
+Sunday: Closed
+"""
+
+
+@pytest.fixture
+def router():
+    # Wednesday, 10:30 AM
+    return StoreHoursRouter(WeeklySchedule.parse(HOURS), clock=lambda: datetime(2026, 10, 14, 10, 30))
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Is the store open now?", "Yes, the store is open right now. Today's hours are 9:00 AM - 5:00 PM."),
+    ("What are your hours on Sunday?", "The store is closed on Sunday."),
+    ("Is the store open at 6pm on Friday?",
+     "No, the store is closed at 6:00 PM on Friday. Hours on Friday are 9:00 AM - 5:00 PM."),
+    ("Are you open on Saturday at 3:30 pm?", "Yes, the store is open at 3:30 PM on Saturday (hours: 10:00 AM - 4:00 PM)."),
+    ("What are the store's opening hours tomorrow?", "The store's hours tomorrow are 9:00 AM - 5:00 PM."),
+    ("Is the store open at 18:30 on Friday?",
+     "No, the store is closed at 6:30 PM on Friday. Hours on Friday are 9:00 AM - 5:00 PM."),
+    ("Are you open at 0:15 on Friday?",
+     "No, the store is closed at 12:15 AM on Friday. Hours on Friday are 9:00 AM - 5:00 PM."),
+])
+def test_answers_plain_questions(router, question, expected):
+    assert router.answer(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "Are you open before 8 on Monday?",
+    "Is the store open after 9pm today?",
+    "Are you open until 6pm on Friday?",
+    "Are you open next Sunday?",
+    "Were you open last Monday?",
+    "Aren't you open on Sunday?",
+    "Is the store not open on Saturday?",
+    "Why isn’t the store open today?",
+    "Are you open at 7 on Friday?",
+    "Are you open at 6:30 on Friday?",
+    "Is the store open Friday at 5:30?",
+    "Are you open at 12:00 on Saturday?",
+])
+def test_ambiguous_wording_or_times_fall_back_to_llm(router, question):
+    assert router.answer(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "When does the pharmacy open on Monday?",
+    "Is the kitchen open now?",
+    "What are the bakery hours on Friday?",
+    "Does pharmacy open today?",
+])
+def test_other_subjects_fall_back_to_llm(router, question):
+    assert router.answer(question) is None
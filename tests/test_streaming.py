@@ -0,0 +1,79 @@
+import asyncio
+import json
+import pytest
+from chatbot_streaming_api import chatbot_streaming_api as api
+from utilities.streaming import StreamHub, stream_stats
+from conftest import CountingChatModel
+
+LLM_LATENCY = 0.5
+BODY = {"messages": [{"role": "human", "content": "Write a slogan"}]}
+
+
+async def post_and_disconnect(app, path: str, body: dict, disconnect_after: float) -> list:
+    """Sends a request to an ASGI app, then hangs up after `disconnect_after` seconds."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json")], "client": ("test", 1), "server": ("test", 80),
+    }
+    hang_up = asyncio.Event()
+    requests = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+    sent = []
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await hang_up.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    app_task = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(disconnect_after)
+    hang_up.set()
+    await asyncio.wait_for(app_task, 5)
+    return sent
+
+
+@pytest.mark.parametrize("mode", [None, "tokens"])
+def test_disconnect_cancels_the_run(monkeypatch, mode):
+    llm = CountingChatModel(latency=LLM_LATENCY)
+    monkeypatch.setattr(api, "app_graph", api.create_graph(llm))
+    monkeypatch.setattr(api, "streams", StreamHub(resume_grace=0))
+    cancelled = stream_stats["cancelled"]
+
+    async def scenario():
+        # Hang up while the writer waits for its model
+        await post_and_disconnect(api.app, "/stream", {**BODY, "mode": mode} if mode else BODY, LLM_LATENCY / 5)
+        calls = len(llm.started)
+        # Long enough for the writer to finish and the enhancer to run, had they not been cancelled
+        await asyncio.sleep(LLM_LATENCY * 3)
+        return calls
+
+    calls_at_disconnect = asyncio.run(scenario())
+    assert calls_at_disconnect == 1
+    assert len(llm.started) == 1
+    assert llm.finished == []
+    assert stream_stats["cancelled"] == cancelled + 1
+
+
+def test_a_response_that_is_never_read_cancels_the_run():
+    finished = []
+
+    async def slow_events():
+        await asyncio.sleep(LLM_LATENCY * 4)
+        yield "end", {}
+
+    async def scenario():
+        hub = StreamHub(resume_grace=0, poll_interval=LLM_LATENCY / 5)
+        # The client is gone before the body is iterated: `_follow` never runs
+        hub.response(None, slow_events(), on_finish=lambda: finished.append(True))
+        [run] = hub._runs.values()
+        await asyncio.sleep(LLM_LATENCY)
+        # Checked here: leaving asyncio.run cancels whatever is still running
+        return run.task.cancelled(), list(finished)
+
+    cancelled = stream_stats["cancelled"]
+    assert asyncio.run(scenario()) == (True, [True])
+    assert stream_stats["cancelled"] == cancelled + 1
@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+import time
+from langchain_core.tools import tool
+from utilities.tool_executor import aexecute_tool_calls, execute_tool_calls
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@tool
+def slow(seconds: float) -> str:
+    """Sleeps for `seconds`."""
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+@tool
+def echo(text: str) -> str:
+    """Returns `text`."""
+    return text
+
+
+@tool
+def whoami() -> str:
+    """Returns the caller's request id."""
+    return str(request_id.get())
+
+
+@tool
+async def async_slow(seconds: float) -> str:
+    """Sleeps for `seconds` on the event loop."""
+    await asyncio.sleep(seconds)
+    return f"slept {seconds}"
+
+
+TOOLS = {t.name: t for t in (slow, echo, whoami, async_slow)}
+
+
+def call(name: str, call_id: str, **args) -> dict:
+    return {"name": name, "args": args, "id": call_id}
+
+
+def run_both(tool_calls, timeouts=None):
+    """Results of the sync and the async executor."""
+    return [
+        execute_tool_calls(tool_calls, TOOLS, timeouts),
+        asyncio.run(aexecute_tool_calls(tool_calls, TOOLS, timeouts)),
+    ]
+
+
+def test_results_keep_the_tool_call_order():
+    # The first call finishes last
+    tool_calls = [call("slow", "1", seconds=0.2), call("echo", "2", text="hi"), call("async_slow", "3", seconds=0.1)]
+    for results in run_both(tool_calls):
+        assert [m.tool_call_id for m in results] == ["1", "2", "3"]
+        assert [m.content for m in results] == ["slept 0.2", "hi", "slept 0.1"]
+
+
+def test_a_slow_tool_times_out_without_holding_up_the_others():
+    tool_calls = [call("slow", "1", seconds=1), call("echo", "2", text="hi"), call("async_slow", "3", seconds=1)]
+    for results in run_both(tool_calls, timeouts={"slow": 0.2, "async_slow": 0.2}):
+        assert [m.status for m in results] == ["error", "success", "error"]
+        assert results[0].content == "Tool 'slow' timed out after 0.2s"
+        assert results[1].content == "hi"
+
+
+def test_all_calls_share_one_deadline():
+    started = time.monotonic()
+    execute_tool_calls([call("slow", str(i), seconds=1) for i in range(3)], TOOLS, 0.2)
+    # Three separate 0.2s waits would take 0.6s
+    assert time.monotonic() - started < 0.5
+
+
+def test_unknown_tools_get_an_error_message():
+    for results in run_both([call("missing", "1"), call("echo", "2", text="hi")]):
+        assert (results[0].status, results[0].content) == ("error", "Unknown tool: missing")
+        assert results[1].content == "hi"
+
+
+def test_sync_tools_see_the_callers_context():
+    request_id.set("req-42")
+    for results in run_both([call("whoami", "1"), call("whoami", "2")]):
+        assert [m.content for m in results] == ["req-42", "req-42"]
@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from chatbot_multi_project_api import warmup
+from chatbot_multi_project_api.warmup import Warmup
+
+
+class BrokenRegistry:
+    def warm(self):
+        raise RuntimeError("warm step exploded")
+
+    def status(self) -> dict:
+        return {}
+
+
+async def failing_llm_warmup():
+    raise RuntimeError("no provider")
+
+
+@pytest.mark.parametrize("mode", ["eager", "background"])
+def test_failing_steps_still_end_the_warmup(monkeypatch, mode):
+    monkeypatch.setattr(warmup, "awarm_llm_clients", failing_llm_warmup)
+    warm = Warmup(BrokenRegistry(), mode=mode)
+
+    async def start_and_wait():
+        await warm.start()
+        if warm._task is not None:
+            await asyncio.wait_for(warm._task, timeout=5)
+
+    asyncio.run(start_and_wait())
+    assert warm.ready
+    status = warm.status()
+    assert status["ready"] and "messages" in status["steps"] and "projects" not in status["steps"]
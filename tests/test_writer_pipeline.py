@@ -0,0 +1,83 @@
+import asyncio
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from utilities.fake_llm import FakeChatModel
+from utilities.streaming import stream_message_events, stream_token_events
+from utilities.writer_pipeline import create_writer_graph
+
+ENHANCE_PROMPT = "Make this more fun: {text}"
+PREFIX = ENHANCE_PROMPT.split("{text}")[0]
+
+
+class EchoWriterModel(FakeChatModel):
+    """Writes `paragraphs` paragraphs; enhances by upper-casing and counts concurrent enhancer calls."""
+    paragraphs: int = 6
+    running: int = 0
+    most_running: int = 0
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        if prompt.startswith(PREFIX):
+            return AIMessage(content=prompt[len(PREFIX):].upper())
+        return AIMessage(content="\n\n".join(f"paragraph {i} of the story." for i in range(self.paragraphs)))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.running -= 1
+
+
+def collect(events) -> list:
+    async def run():
+        return [event async for event in events]
+    return asyncio.run(run())
+
+
+def graph_input() -> dict:
+    return {"messages": [HumanMessage(content="Write a story")]}
+
+
+def test_message_mode_sends_draft_and_enhanced_text():
+    llm = EchoWriterModel(paragraphs=3, latency=0.01)
+    graph = create_writer_graph(llm, ENHANCE_PROMPT, pipelined=True, min_chars=10)
+    events = collect(stream_message_events(graph, graph_input()))
+
+    drafts = [data for event, data in events if event == "message"]
+    assert [(d["node"], d["content"]) for d in drafts] == [("writer", llm._reply([HumanMessage(content="")]).content)]
+    enhanced = "".join(data["content"] for event, data in events if event == "chunk")
+    assert enhanced == "\n\n".join(f"PARAGRAPH {i} OF THE STORY." for i in range(3))
+    assert events[-1][0] == "end"
+
+
+def test_token_mode_does_not_repeat_the_draft():
+    llm = EchoWriterModel(paragraphs=2)
+    graph = create_writer_graph(llm, ENHANCE_PROMPT, pipelined=True, min_chars=10)
+    events = collect(stream_token_events(graph, graph_input()))
+    assert {event for event, _ in events} == {"token", "end"}
+    writer_text = "".join(data["content"] for event, data in events if event == "token" and data["node"] == "writer")
+    assert writer_text == "paragraph 0 of the story.\n\nparagraph 1 of the story."
+
+
+def test_enhancer_calls_are_bounded():
+    llm = EchoWriterModel(paragraphs=12, latency=0.05)
+    graph = create_writer_graph(llm, ENHANCE_PROMPT, pipelined=True, min_chars=10, max_enhancers=2)
+    state = asyncio.run(graph.ainvoke(graph_input()))
+    assert state["messages"][-1].content.count("PARAGRAPH") == 12
+    assert llm.most_running <= 2
+
+
+class NonTextChunkModel(FakeChatModel):
+    """Streams its reply, then a chunk whose content is a list of blocks, e.g. usage only."""
+
+    def _chunks(self, messages):
+        yield from super()._chunks(messages)
+        yield AIMessageChunk(content=[], id="run-blocks")
+
+
+def test_chunks_without_text_are_skipped():
+    llm = NonTextChunkModel(response="A short draft.")
+    graph = create_writer_graph(llm, ENHANCE_PROMPT, pipelined=True)
+    state = asyncio.run(graph.ainvoke(graph_input()))
+    assert state["messages"][-1].content == "A short draft."
@@ -0,0 +1,283 @@
+import csv
+import difflib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+from langchain_core.tools import tool
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MENU_LINE = re.compile(r"^\s*-\s*(.+?)\s*:\s*\$?\s*([0-9]+(?:\.[0-9]+)?)\s*$")
+_CATEGORY_LINE = re.compile(r"^\s*([^-].*?)\s*:\s*$")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_TOKEN.findall(text.lower()))
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class MenuItem:
+    """One priced menu entry."""
+    name: str
+    price: float
+    category: str = ""
+    aliases: Tuple[str, ...] = ()
+
+    def describe(self) -> str:
+        return f"{self.name} ({self.category}): ${self.price:.2f}" if self.category else f"{self.name}: ${self.price:.2f}"
+
+
+class PriceCatalog:
+    """
+    An indexed menu supporting exact, category and fuzzy lookups.
+
+    Names and aliases are indexed by their normalized form, categories by
+    name, and every name/alias token in an inverted index. Fuzzy search
+    scores candidates sharing tokens with the query by IDF, and misspelled
+    query tokens are first mapped to close vocabulary tokens with difflib.
+
+    Args:
+        items (Iterable[MenuItem]): The menu entries.
+    """
+
+    def __init__(self, items: Iterable[MenuItem]):
+        self.items = list(items)
+        self._by_name = {}
+        self._by_category = defaultdict(list)
+        self._postings = defaultdict(set)
+        for index, item in enumerate(self.items):
+            for name in (item.name,) + tuple(item.aliases):
+                self._by_name.setdefault(_normalize(name), index)
+                for token in _tokens(name):
+                    self._postings[token].add(index)
+            self._by_category[_normalize(item.category)].append(index)
+
+        self._idf = {token: math.log(1 + len(self.items) / len(ids)) for token, ids in self._postings.items()}
+        # Vocabulary bucketed by first letter keeps difflib's candidate list short
+        self._vocabulary = defaultdict(list)
+        for token in self._postings:
+            self._vocabulary[token[0]].append(token)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def categories(self) -> List[str]:
+        return sorted({item.category for item in self.items if item.category})
+
+    def get(self, name: str) -> Optional[MenuItem]:
+        """Exact lookup by name or alias, ignoring case and punctuation."""
+        index = self._by_name.get(_normalize(name))
+        return self.items[index] if index is not None else None
+
+    def resolve_category(self, category: str) -> Optional[str]:
+        """The normalized name of the category closest to `category` ("dessert" -> "desserts"), if any."""
+        wanted = _normalize(category)
+        if wanted in self._by_category:
+            return wanted
+        matches = difflib.get_close_matches(wanted, list(self._by_category), n=1, cutoff=0.75)
+        return matches[0] if matches else None
+
+    def in_category(self, category: str, limit: int = 50) -> List[MenuItem]:
+        resolved = self.resolve_category(category)
+        indexes = self._by_category[resolved] if resolved is not None else []
+        return [self.items[i] for i in indexes[:limit]]
+
+    def _expand(self, token: str) -> List[str]:
+        """The token itself when known, else its closest vocabulary tokens."""
+        if token in self._postings:
+            return [token]
+        candidates = self._vocabulary.get(token[0], [])
+        return difflib.get_close_matches(token, candidates, n=3, cutoff=0.75)
+
+    def search(self, query: str, limit: int = 5, category: str = "") -> List[MenuItem]:
+        """
+        Items best matching a free-text query, best first; with `category`,
+        only items of that category (see `resolve_category`) are ranked.
+        """
+        allowed = None
+        if category:
+            resolved = self.resolve_category(category)
+            if resolved is None:
+                return []
+            allowed = set(self._by_category[resolved])
+        matches = [
+            (match, self._idf[match] * (1.0 if match == token else 0.8))
+            for token in set(_tokens(query)) for match in self._expand(token)
+        ]
+        # Rarest tokens first: once they have produced candidates, common tokens
+        # only add to those candidates instead of scanning their long posting lists.
+        matches.sort(key=lambda m: len(self._postings[m[0]]))
+        scores = defaultdict(float)
+        for match, weight in matches:
+            postings = self._postings[match]
+            if scores and len(postings) > len(scores):
+                for index in scores:
+                    if index in postings:
+                        scores[index] += weight
+            else:
+                for index in postings:
+                    scores[index] += weight
+        if allowed is not None:
+            scores = {index: score for index, score in scores.items() if index in allowed}
+        if not scores:
+            return []
+
+        # Rank by token score, then break ties on whole-name similarity
+        query_text = _normalize(query)
+        top = heapq.nlargest(limit * 4, scores, key=scores.get)
+        top.sort(key=lambda i: (
+            -scores[i],
+            -difflib.SequenceMatcher(None, query_text, _normalize(self.items[i].name)).ratio(),
+        ))
+        return [self.items[i] for i in top[:limit]]
+
+    def lookup(self, name: str, limit: int = 3) -> List[MenuItem]:
+        """The exact item for `name` if there is one, else the closest matches."""
+        item = self.get(name)
+        return [item] if item is not None else self.search(name, limit)
+
+
+def parse_menu_text(text: str) -> List[MenuItem]:
+    """Parses the "Category:" / "- Name: $price" text format used in prompts."""
+    items, category = [], ""
+    for line in text.splitlines():
+        item = _MENU_LINE.match(line)
+        if item:
+            items.append(MenuItem(name=item.group(1), price=float(item.group(2)), category=category))
+            continue
+        header = _CATEGORY_LINE.match(line)
+        if header:
+            category = header.group(1)
+    return items
+
+
+def _item_from_record(record: dict) -> MenuItem:
+    aliases = record.get("aliases") or ()
+    if isinstance(aliases, str):
+        aliases = [alias.strip() for alias in aliases.split("|") if alias.strip()]
+    return MenuItem(
+        name=record["name"].strip(),
+        price=float(str(record["price"]).lstrip("$")),
+        category=(record.get("category") or "").strip(),
+        aliases=tuple(aliases),
+    )
+
+
+def load_catalog_file(path: str) -> PriceCatalog:
+    """
+    Loads a catalog from a CSV or JSON file.
+
+    CSV files need `name` and `price` columns and may have `category` and
+    `aliases` ("|"-separated). JSON files hold a list of objects with the same
+    keys, or an object with such a list under "items".
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data["items"] if isinstance(data, dict) else data
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+    return PriceCatalog(_item_from_record(record) for record in records)
+
+
+class CatalogFile:
+    """
+    A catalog file that is reloaded when it changes on disk.
+
+    `get()` checks the file's modification time at most every
+    `check_interval` seconds. A changed file is loaded into a new
+    PriceCatalog that then replaces the old one in a single assignment, so
+    readers never see a half-built index. If the new file can't be read, the
+    previous catalog stays in use.
+
+    Args:
+        path (str): The CSV or JSON catalog file.
+        check_interval (float): Minimum seconds between modification checks.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._catalog = load_catalog_file(path)
+        self._checked_at = time.monotonic()
+
+    def get(self) -> PriceCatalog:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+        return self._catalog
+
+    def reload(self, force: bool = False) -> bool:
+        """Reloads the file if it changed; returns True when a new catalog was loaded."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime and not force:
+                    return False
+                catalog = load_catalog_file(self.path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Keeping the previous catalog, could not reload {self.path}: {e}")
+                return False
+            self._catalog, self._mtime = catalog, mtime
+            return True
+
+
+def make_catalog_tools(get_catalog: Callable[[], PriceCatalog]) -> list:
+    """
+    Builds the `lookup_price` and `search_menu` tools over a catalog.
+
+    Args:
+        get_catalog: Returns the catalog to use, e.g. `CatalogFile.get`, so
+            reloaded catalogs are picked up on the next tool call.
+    """
+
+    @tool
+    def lookup_price(item_name: str) -> str:
+        """
+        Returns the price of a menu item by name. Close matches are returned
+        when there is no exact match.
+        """
+        catalog = get_catalog()
+        item = catalog.get(item_name)
+        if item is not None:
+            return item.describe()
+        items = catalog.search(item_name, limit=3)
+        if not items:
+            return f"No menu item matches '{item_name}'."
+        return f"No exact match for '{item_name}'. Closest items:\n" + "\n".join(item.describe() for item in items)
+
+    @tool
+    def search_menu(query: str = "", category: str = "", limit: int = 10) -> str:
+        """
+        Searches the menu by keywords and/or category, e.g. query="chicken"
+        or category="Desserts". Returns matching items with their prices.
+        Without a query or category, lists the menu categories.
+        """
+        catalog = get_catalog()
+        limit = max(1, min(limit, 50))
+        categories = "Menu categories: " + ", ".join(catalog.categories())
+        if not query and not category:
+            return categories
+        if category and not query:
+            items = catalog.in_category(category, limit)
+        else:
+            items = catalog.search(query, limit, category=category)
+        if not items:
+            # The current categories, so the model can retry with a valid one
+            return f"No matching menu items. {categories}" if category else "No matching menu items."
+        return "\n".join(item.describe() for item in items)
+
+    return [lookup_price, search_menu]
@@ -0,0 +1,740 @@
+import asyncio
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from utilities.instrumentation import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+CHECKPOINTER_THREADS = metrics.gauge("checkpointer_threads", "Threads held by the in-memory checkpointer.")
+CHECKPOINTER_CHECKPOINTS = metrics.gauge("checkpointer_checkpoints", "Checkpoints held by the in-memory checkpointer.")
+CHECKPOINTER_BYTES = metrics.gauge("checkpointer_bytes", "Serialized size of everything the in-memory checkpointer holds.")
+CHECKPOINTER_EVICTED_THREADS = metrics.counter(
+    "checkpointer_evicted_threads_total", "Threads evicted by the in-memory checkpointer, by limit.", ["reason"])
+CHECKPOINTER_EVICTED_CHECKPOINTS = metrics.counter(
+    "checkpointer_evicted_checkpoints_total", "Old checkpoints dropped by the per-thread limit.")
+
+# A batch of SQL statements that the writer thread commits in one transaction.
+_Statements = List[Tuple[str, tuple]]
+
+
+def _thread_key(config: RunnableConfig) -> Tuple[str, str]:
+    configurable = config["configurable"]
+    return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+
+def _checkpoint_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+def _next_version(current: Optional[str]) -> str:
+    """Sortable channel versions, in the same format MemorySaver uses."""
+    if current is None:
+        current_v = 0
+    elif isinstance(current, int):
+        current_v = current
+    else:
+        current_v = int(current.split(".")[0])
+    return f"{current_v + 1:032}.{random.random():016}"
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    A SQLite checkpointer that several uvicorn workers can share.
+
+    The database runs in WAL mode, so readers never block the writer. Reads
+    use a small pool of connections. All writes go through one writer thread
+    that commits whatever has queued up in a single transaction (group
+    commit), so concurrent threads share fsyncs instead of serializing on
+    them. If a group fails, its writes are retried one per transaction, so
+    only the bad write fails. The latest checkpoint of recently used threads is kept in an LRU
+    cache. A cache hit is confirmed with one indexed lookup of the latest
+    checkpoint id, so a thread that moves to another worker never gets stale
+    state.
+
+    Args:
+        path (str): The SQLite database file.
+        pool_size (int): Number of pooled read connections.
+        batch_size (int): Maximum number of queued writes per transaction.
+        cache_size (int): Number of threads kept in the LRU front cache.
+    """
+
+    def __init__(self, path: str, *, pool_size: int = 4, batch_size: int = 128, cache_size: int = 1024, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+        self._readers = queue.Queue()
+        for _ in range(pool_size):
+            self._readers.put(self._connect())
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self._pending = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-checkpointer", daemon=True)
+        self._writer.start()
+
+    # --- Connections ---
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    # --- Batched writer ---
+    def _submit(self, statements: _Statements) -> Future:
+        future = Future()
+        self._pending.put((statements, future))
+        return future
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._commit(conn, batch)
+            except Exception as e:
+                # The writer must outlive any failure, or every later put would wait forever
+                self._fail(batch, e)
+        conn.close()
+
+    @staticmethod
+    def _fail(batch: list, error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _commit(self, conn: sqlite3.Connection, batch: list):
+        try:
+            self._transaction(conn, batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch, e)
+                return
+            # One bad write rolled back the whole group: retry each write in its
+            # own transaction, so only the bad one fails
+            for item in batch:
+                self._commit(conn, [item])
+            return
+        for _, future in batch:
+            future.set_result(None)
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection, batch: list):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for statements, _ in batch:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            # BEGIN or COMMIT may have failed with no transaction left to roll back
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+
+    def close(self):
+        """Stops the writer once queued writes are committed and closes all connections."""
+        self._pending.put(None)
+        self._writer.join()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    # --- LRU front cache ---
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[CheckpointTuple]:
+        with self._cache_lock:
+            saved = self._cache.get(key)
+            if saved is not None:
+                self._cache.move_to_end(key)
+            return saved
+
+    def _cache_put(self, key: Tuple[str, str], saved: CheckpointTuple):
+        with self._cache_lock:
+            self._cache[key] = saved
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_discard(self, key: Tuple[str, str]):
+        with self._cache_lock:
+            self._cache.pop(key, None)
+
+    def _cache_drop_thread(self, thread_id: str):
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == thread_id]:
+                del self._cache[key]
+
+    # --- Reads ---
+    def _load(self, conn: sqlite3.Connection, row: tuple, thread_id: str, checkpoint_ns: str) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config=_checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                _checkpoint_config(thread_id, checkpoint_ns, parent_checkpoint_id)
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns = _thread_key(config)
+        checkpoint_id = get_checkpoint_id(config)
+        with self._reader() as conn:
+            if checkpoint_id is None:
+                latest = conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+                if latest is None:
+                    return None
+                checkpoint_id = latest[0]
+
+            cached = self._cache_get((thread_id, checkpoint_ns))
+            if cached is not None and cached.config["configurable"]["checkpoint_id"] == checkpoint_id:
+                return cached._replace(checkpoint=copy_checkpoint(cached.checkpoint))
+
+            row = conn.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+            return self._load(conn, row, thread_id, checkpoint_ns) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if "checkpoint_ns" in configurable:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                f"metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                saved = self._load(conn, tuple(row), thread_id, checkpoint_ns)
+                if filter and not all(saved.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(saved)
+        yield from results
+
+    # --- Writes ---
+    def _put_statements(self, config, checkpoint, metadata) -> Tuple[_Statements, RunnableConfig, CheckpointTuple]:
+        thread_id, checkpoint_ns = _thread_key(config)
+        metadata = get_checkpoint_metadata(config, metadata)
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        statement = (
+            "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+            "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, checkpoint["id"], parent_checkpoint_id, type_, data, metadata_type, metadata_data),
+        )
+        next_config = _checkpoint_config(thread_id, checkpoint_ns, checkpoint["id"])
+        saved = CheckpointTuple(
+            config=next_config,
+            checkpoint=copy_checkpoint(checkpoint),
+            metadata=metadata,
+            parent_config=(
+                _checkpoint_config(thread_id, checkpoint_ns, parent_checkpoint_id)
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[],
+        )
+        return [statement], next_config, saved
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        statements, next_config, saved = self._put_statements(config, checkpoint, metadata)
+        self._submit(statements).result()
+        self._cache_put(_thread_key(config), saved)
+        return next_config
+
+    def _writes_statements(self, config, writes, task_id, task_path) -> _Statements:
+        thread_id, checkpoint_ns = _thread_key(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        statements = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            # Regular writes never overwrite; special writes (errors, interrupts) replace.
+            verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+            type_, data = self.serde.dumps_typed(value)
+            statements.append((
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, "
+                "type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, data, task_path),
+            ))
+        return statements
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        self._submit(self._writes_statements(config, writes, task_id, task_path)).result()
+        # The cached tuple no longer lists every pending write of its checkpoint.
+        self._cache_discard(_thread_key(config))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._submit([
+            ("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)),
+            ("DELETE FROM writes WHERE thread_id = ?", (thread_id,)),
+        ]).result()
+        self._cache_drop_thread(thread_id)
+
+    # --- Async API ---
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for saved in results:
+            yield saved
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        statements, next_config, saved = self._put_statements(config, checkpoint, metadata)
+        await asyncio.wrap_future(self._submit(statements))
+        self._cache_put(_thread_key(config), saved)
+        return next_config
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.wrap_future(self._submit(self._writes_statements(config, writes, task_id, task_path)))
+        self._cache_discard(_thread_key(config))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return _next_version(current)
+
+
+class _ThreadRecord:
+    """Everything a BoundedMemorySaver stores for one thread."""
+    __slots__ = ("checkpoints", "writes", "nbytes", "last_used")
+
+    def __init__(self):
+        # checkpoint_ns -> checkpoint_id -> (checkpoint, metadata, parent_checkpoint_id), oldest first
+        self.checkpoints = {}
+        # (checkpoint_ns, checkpoint_id) -> (task_id, idx) -> (task_id, channel, value)
+        self.writes = {}
+        self.nbytes = 0
+        self.last_used = time.monotonic()
+
+
+def _typed_size(typed: Tuple[str, bytes]) -> int:
+    return len(typed[0]) + len(typed[1])
+
+
+class BoundedMemorySaver(BaseCheckpointSaver[str]):
+    """
+    An in-memory checkpointer with hard limits on how much it keeps.
+
+    Like MemorySaver, but a long-running server's memory stays flat:
+      - at most `max_threads` threads, least recently used evicted first;
+      - at most `max_checkpoints_per_thread` checkpoints per thread namespace,
+        oldest dropped first (the latest state is always kept);
+      - threads idle for longer than `ttl_seconds` are evicted;
+      - the serialized size of everything stored stays under `max_bytes`.
+
+    The latest checkpoint of the `decoded_cache_size` most recently written
+    threads is also kept decoded, so a conversation's next turn doesn't pay
+    for deserializing its whole history again.
+
+    Use `stats()` for the current footprint and eviction counts, and
+    `collect()` (see `add_checkpointer_metrics`) to export them.
+    """
+
+    def __init__(self, *, max_threads: int = 10000, max_checkpoints_per_thread: int = 20,
+                 ttl_seconds: float = 3600, max_bytes: int = 256 * 1024 * 1024,
+                 decoded_cache_size: int = 256, serde=None):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.decoded_cache_size = decoded_cache_size
+
+        self._threads = OrderedDict()
+        # (thread_id, checkpoint_ns) -> (checkpoint_id, decoded checkpoint), LRU order
+        self._decoded = OrderedDict()
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self._evicted_threads = {"max_threads": 0, "ttl": 0, "max_bytes": 0}
+        self._evicted_checkpoints = 0
+
+    # --- Bookkeeping ---
+    def _touch(self, thread_id: str, create: bool = False) -> Optional[_ThreadRecord]:
+        record = self._threads.get(thread_id)
+        if record is None and create:
+            record = self._threads[thread_id] = _ThreadRecord()
+        if record is not None:
+            record.last_used = time.monotonic()
+            self._threads.move_to_end(thread_id)
+        return record
+
+    def _resize(self, record: _ThreadRecord, delta: int):
+        record.nbytes += delta
+        self._nbytes += delta
+
+    def _drop_thread(self, thread_id: str, reason: str):
+        record = self._threads.pop(thread_id)
+        self._nbytes -= record.nbytes
+        self._evicted_threads[reason] += 1
+        self._forget_decoded(thread_id, record)
+
+    def _forget_decoded(self, thread_id: str, record: _ThreadRecord):
+        for checkpoint_ns in record.checkpoints:
+            self._decoded.pop((thread_id, checkpoint_ns), None)
+
+    def _trim_checkpoints(self, record: _ThreadRecord, checkpoint_ns: str):
+        checkpoints = record.checkpoints[checkpoint_ns]
+        while len(checkpoints) > self.max_checkpoints_per_thread:
+            checkpoint_id = next(iter(checkpoints))
+            checkpoint, metadata, _ = checkpoints.pop(checkpoint_id)
+            freed = _typed_size(checkpoint) + _typed_size(metadata)
+            for _, _, value in record.writes.pop((checkpoint_ns, checkpoint_id), {}).values():
+                freed += _typed_size(value)
+            self._resize(record, -freed)
+            self._evicted_checkpoints += 1
+
+    def _evict(self):
+        """
+        Applies the TTL, thread and byte limits.
+
+        Threads are kept in least-recently-used order and the thread being
+        written was just touched, so it is always last and never evicted.
+        """
+        expired_before = time.monotonic() - self.ttl_seconds
+        while len(self._threads) > 1:
+            thread_id, record = next(iter(self._threads.items()))
+            if record.last_used >= expired_before:
+                break
+            self._drop_thread(thread_id, "ttl")
+
+        while len(self._threads) > max(self.max_threads, 1):
+            self._drop_thread(next(iter(self._threads)), "max_threads")
+
+        while self._nbytes > self.max_bytes and len(self._threads) > 1:
+            self._drop_thread(next(iter(self._threads)), "max_bytes")
+
+    def stats(self) -> dict:
+        """Current footprint and eviction counters."""
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "checkpoints": sum(
+                    len(checkpoints)
+                    for record in self._threads.values()
+                    for checkpoints in record.checkpoints.values()
+                ),
+                "bytes": self._nbytes,
+                "evicted_threads": dict(self._evicted_threads),
+                "evicted_checkpoints": self._evicted_checkpoints,
+            }
+
+    def collect(self):
+        """Copies `stats()` into the Prometheus metrics; run on every scrape."""
+        stats = self.stats()
+        CHECKPOINTER_THREADS.set(stats["threads"])
+        CHECKPOINTER_CHECKPOINTS.set(stats["checkpoints"])
+        CHECKPOINTER_BYTES.set(stats["bytes"])
+        for reason, count in stats["evicted_threads"].items():
+            CHECKPOINTER_EVICTED_THREADS.set(count, reason=reason)
+        CHECKPOINTER_EVICTED_CHECKPOINTS.set(stats["evicted_checkpoints"])
+
+    # --- Reads ---
+    def _tuple(self, record: _ThreadRecord, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> CheckpointTuple:
+        checkpoint, metadata, parent_checkpoint_id = record.checkpoints[checkpoint_ns][checkpoint_id]
+        writes = record.writes.get((checkpoint_ns, checkpoint_id), {}).values()
+        decoded = self._decoded.get((thread_id, checkpoint_ns))
+        if decoded is not None and decoded[0] == checkpoint_id:
+            # Readers may update the checkpoint's dicts, so each gets its own copy
+            self._decoded.move_to_end((thread_id, checkpoint_ns))
+            checkpoint = copy_checkpoint(decoded[1])
+        else:
+            checkpoint = self.serde.loads_typed(checkpoint)
+        return CheckpointTuple(
+            config=_checkpoint_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(metadata),
+            parent_config=(
+                _checkpoint_config(thread_id, checkpoint_ns, parent_checkpoint_id)
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns = _thread_key(config)
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            record = self._touch(thread_id)
+            checkpoints = record.checkpoints.get(checkpoint_ns) if record else None
+            if not checkpoints:
+                return None
+            if checkpoint_id is None:
+                checkpoint_id = max(checkpoints)
+            elif checkpoint_id not in checkpoints:
+                return None
+            return self._tuple(record, thread_id, checkpoint_ns, checkpoint_id)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        before_id = get_checkpoint_id(before) if before else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        results = []
+        with self._lock:
+            thread_ids = [config["configurable"]["thread_id"]] if config else list(self._threads)
+            for thread_id in thread_ids:
+                record = self._threads.get(thread_id)
+                if record is None:
+                    continue
+                for checkpoint_ns, checkpoints in record.checkpoints.items():
+                    if config and "checkpoint_ns" in config["configurable"] \
+                            and checkpoint_ns != config["configurable"]["checkpoint_ns"]:
+                        continue
+                    for checkpoint_id in sorted(checkpoints, reverse=True):
+                        if limit is not None and len(results) >= limit:
+                            break
+                        if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                            continue
+                        if before_id and checkpoint_id >= before_id:
+                            continue
+                        saved = self._tuple(record, thread_id, checkpoint_ns, checkpoint_id)
+                        if filter and not all(saved.metadata.get(k) == v for k, v in filter.items()):
+                            continue
+                        results.append(saved)
+        yield from results
+
+    # --- Writes ---
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id, checkpoint_ns = _thread_key(config)
+        checkpoint_typed = self.serde.dumps_typed(checkpoint)
+        metadata_typed = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            record = self._touch(thread_id, create=True)
+            record.checkpoints.setdefault(checkpoint_ns, {})[checkpoint["id"]] = (
+                checkpoint_typed, metadata_typed, config["configurable"].get("checkpoint_id")
+            )
+            self._resize(record, _typed_size(checkpoint_typed) + _typed_size(metadata_typed))
+            self._trim_checkpoints(record, checkpoint_ns)
+            if self.decoded_cache_size > 0:
+                self._decoded[(thread_id, checkpoint_ns)] = (checkpoint["id"], copy_checkpoint(checkpoint))
+                self._decoded.move_to_end((thread_id, checkpoint_ns))
+                while len(self._decoded) > self.decoded_cache_size:
+                    self._decoded.popitem(last=False)
+            self._evict()
+        return _checkpoint_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id, checkpoint_ns = _thread_key(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            record = self._touch(thread_id, create=True)
+            stored = record.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+            for idx, (channel, value) in enumerate(writes):
+                key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                # Regular writes never overwrite; special writes (errors, interrupts) replace.
+                if key[1] >= 0 and key in stored:
+                    continue
+                value_typed = self.serde.dumps_typed(value)
+                if key in stored:
+                    self._resize(record, -_typed_size(stored[key][2]))
+                stored[key] = (task_id, channel, value_typed)
+                self._resize(record, _typed_size(value_typed))
+            self._evict()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            record = self._threads.pop(thread_id, None)
+            if record is not None:
+                self._nbytes -= record.nbytes
+                self._forget_decoded(thread_id, record)
+
+    # --- Async API (everything is in memory, so these never block) ---
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for saved in self.list(config, filter=filter, before=before, limit=limit):
+            yield saved
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return _next_version(current)
+
+
+def make_checkpointer(kind: str = None):
+    """
+    Builds the checkpointer selected by `kind` or the CHECKPOINTER env var.
+
+    Args:
+        kind (str): "memory" (default, a BoundedMemorySaver whose limits come
+            from the CHECKPOINT_MAX_* / CHECKPOINT_TTL_SECONDS env vars) or
+            "sqlite" (file taken from CHECKPOINT_DB_PATH).
+    """
+    kind = kind or os.getenv("CHECKPOINTER", "memory")
+    if kind == "memory":
+        return BoundedMemorySaver(
+            max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", "10000")),
+            max_checkpoints_per_thread=int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20")),
+            ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600")),
+            max_bytes=int(os.getenv("CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+    if kind == "sqlite":
+        return SQLiteCheckpointer(os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite"))
+    raise ValueError(f"Unknown checkpointer: {kind}")
+
+
+def add_checkpointer_metrics(checkpointer):
+    """Exports the checkpointer's footprint and evictions on /metrics, if it keeps any."""
+    if isinstance(checkpointer, BoundedMemorySaver):
+        metrics.add_collector(checkpointer.collect)
+
+
+def close_checkpointer(checkpointer):
+    """Releases the checkpointer's resources, if it holds any."""
+    if isinstance(checkpointer, SQLiteCheckpointer):
+        checkpointer.close()
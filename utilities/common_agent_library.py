@@ -1,7 +1,13 @@
 import operator
-from typing import TypedDict, Annotated, List
+import uuid
+from typing import TypedDict, Annotated, Callable, List, Optional
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage, ToolMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
+from utilities.tool_executor import aexecute_tool_calls
+from utilities.history import HistoryPolicy
+from utilities.response_cache import ResponseCache
+from utilities.prompt_prefix import PromptPrefix
+from utilities.instrumentation import instrument
 
 # 1. Define the Generic Agent State
 class AgentState(TypedDict):
@@ -9,7 +15,9 @@ class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], operator.add]
 
 # 2. Define the Generic Graph Building Function
-def create_agent(llm, system_message_content: str, tools: list):
+def create_agent(llm, system_message_content: str, tools: list, tool_timeouts=None,
+                 history_policy: HistoryPolicy = None, response_cache: ResponseCache = None,
+                 fast_path: Callable[[str], Optional[str]] = None):
     """
     Creates and compiles a generic LangGraph agent.
 
@@ -17,34 +25,54 @@ def create_agent(llm, system_message_content: str, tools: list):
         llm: The Language Model instance.
         system_message_content (str): The system prompt for the agent.
         tools (list): A list of LangChain tools to bind to the LLM.
+        tool_timeouts: Optional seconds allowed per tool call, either one value
+            for all tools or a mapping of tool name to seconds.
+        history_policy (HistoryPolicy): Optional policy that windows or
+            summarizes long histories before each LLM call.
+        response_cache (ResponseCache): Optional cache answering repeated
+            requests without calling the LLM.
+        fast_path: Optional callable that answers a user question directly,
+            returning None when the LLM is needed.
 
     Returns:
         A compiled LangGraph object.
     """
-    llm_with_tools = llm.bind_tools(tools)
+    # System prompt and tool schemas are serialized once so every request
+    # starts with the same bytes and hits the provider's prompt cache.
+    prefix = PromptPrefix(system_message_content, tools)
+    llm_with_tools = prefix.bind(llm)
     tool_map = {tool.name: tool for tool in tools}
-    system_message = SystemMessage(content=system_message_content)
 
     # Generic Graph Nodes
-    def agent_node(state: AgentState):
+    async def agent_node(state: AgentState):
         """Invokes the LLM with the current conversation history."""
-        messages = [system_message] + state["messages"]
-        result = llm_with_tools.invoke(messages)
+        last_message = state["messages"][-1] if state["messages"] else None
+        if fast_path is not None and isinstance(last_message, HumanMessage) and isinstance(last_message.content, str):
+            answer = fast_path(last_message.content)
+            if answer is not None:
+                return {"messages": [AIMessage(content=answer, id=f"run-{uuid.uuid4()}", response_metadata={"fast_path": True})]}
+
+        history, saved = state["messages"], None
+        if history_policy is not None:
+            history, saved = await history_policy.acompact(history)
+
+        result = await response_cache.aget(history, prefix.key) if response_cache is not None else None
+        if result is None:
+            result = await llm_with_tools.ainvoke([prefix.system_message] + history)
+            share = prefix.cached_share(result)
+            if share is not None:
+                result.response_metadata["cached_prefix_share"] = share
+            if response_cache is not None:
+                await response_cache.aput(history, result, prefix.key)
+        if saved is not None:
+            result.response_metadata["history_tokens_saved"] = saved
         return {"messages": [result]}
 
-    def tool_node(state: AgentState):
-        """Executes the tool call based on the LLM's decision."""
+    async def tool_node(state: AgentState):
+        """Executes all tool calls of the LLM's decision concurrently."""
         last_message = state["messages"][-1]
-        tool_call = last_message.tool_calls[0]
-        tool_name = tool_call["name"]
-        tool_input = tool_call["args"]
-        
-        if tool_name in tool_map:
-            tool_output = tool_map[tool_name].invoke(tool_input)
-        else:
-            tool_output = f"Unknown tool: {tool_name}"
-        
-        return {"messages": [ToolMessage(content=tool_output, name=tool_name, tool_call_id=tool_call["id"])]}
+        tool_messages = await aexecute_tool_calls(last_message.tool_calls, tool_map, tool_timeouts)
+        return {"messages": tool_messages}
     
     # Generic Conditional Edge
     def should_continue(state: AgentState):
@@ -71,4 +99,4 @@ def create_agent(llm, system_message_content: str, tools: list):
     )
     workflow.add_edge("tools", "agent")
 
-    return workflow.compile()
\ No newline at end of file
+    return instrument(workflow.compile())
\ No newline at end of file
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# One scripted reply: plain text, {"content": ..., "tool_calls": [{"name", "args"}]}
+# or a ready-made AIMessage.
+ScriptStep = Union[str, dict, AIMessage]
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+def _count_tokens(messages: List[BaseMessage]) -> int:
+    """Rough prompt size, at about four characters per token."""
+    return sum(len(str(message.content)) for message in messages) // 4 + 3 * len(messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    An offline chat model for benchmarks and local runs.
+
+    Each call waits `latency` seconds (the time to first token), then produces
+    its reply at `tokens_per_second` (0 for all at once), streaming it token
+    by token when the caller streams. Replies carry usage metadata, so token
+    and cost accounting work as with a real provider.
+
+    Without a `script` every call answers `response`. A script lists the
+    replies of one turn in order: the n-th model call after the latest human
+    message gets step n, so a step with `tool_calls` followed by a text step
+    makes an agent call its tools once and then answer. Calls past the end
+    of the script answer `response`. The step depends only on the
+    conversation, so concurrent requests are all scripted the same way.
+    """
+    response: str = "This is a fake response."
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    script: List[Any] = []  # of ScriptStep; Any so pydantic keeps dict steps as they are
+    model_name: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = self.model_name
+        return params
+
+    def _reply(self, messages: Optional[List[BaseMessage]]) -> AIMessage:
+        """The scripted (or default) reply to `messages`, without usage."""
+        step = 0
+        for message in reversed(messages or []):
+            if isinstance(message, HumanMessage):
+                break
+            step += isinstance(message, AIMessage)
+        if step >= len(self.script):
+            return AIMessage(content=self.response)
+        reply = self.script[step]
+        if isinstance(reply, AIMessage):
+            return reply.model_copy()
+        if isinstance(reply, str):
+            return AIMessage(content=reply)
+        tool_calls = [
+            {"name": call["name"], "args": call.get("args", {}), "id": call.get("id") or f"call_{uuid.uuid4().hex[:12]}"}
+            for call in reply.get("tool_calls", [])
+        ]
+        return AIMessage(content=reply.get("content", ""), tool_calls=tool_calls)
+
+    def _usage(self, messages: Optional[List[BaseMessage]], reply: AIMessage) -> dict:
+        prompt = _count_tokens(messages or [])
+        completion = len(_TOKEN.findall(str(reply.content))) + 10 * len(reply.tool_calls)
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _generation_seconds(self, reply: AIMessage) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return self._usage(None, reply)["output_tokens"] / self.tokens_per_second
+
+    def _result(self, messages: Optional[List[BaseMessage]] = None) -> ChatResult:
+        reply = self._reply(messages)
+        reply.usage_metadata = self._usage(messages, reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)], llm_output={"model_name": self.model_name})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        result = self._result(messages)
+        time.sleep(self.latency + self._generation_seconds(result.generations[0].message))
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        result = self._result(messages)
+        await asyncio.sleep(self.latency + self._generation_seconds(result.generations[0].message))
+        return result
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[AIMessageChunk]:
+        """The reply split into one chunk per token, tool calls and usage last."""
+        reply = self._reply(messages)
+        message_id = f"run-{uuid.uuid4()}"
+        for token in _TOKEN.findall(str(reply.content)):
+            yield AIMessageChunk(content=token, id=message_id)
+        tool_call_chunks = [
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+            for i, call in enumerate(reply.tool_calls)
+        ]
+        yield AIMessageChunk(content="", id=message_id, tool_call_chunks=tool_call_chunks,
+                             usage_metadata=self._usage(messages, reply))
+
+    def _pace(self, started: float, tokens: int) -> float:
+        """Seconds to wait so `tokens` tokens end on schedule, without drifting."""
+        if not self.tokens_per_second:
+            return 0.0
+        return max(0.0, started + self.latency + tokens / self.tokens_per_second - time.monotonic())
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        started = time.monotonic()
+        time.sleep(self.latency)
+        for tokens, chunk in enumerate(self._chunks(messages), 1):
+            if chunk.content:
+                time.sleep(self._pace(started, tokens))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.monotonic()
+        await asyncio.sleep(self.latency)
+        for tokens, chunk in enumerate(self._chunks(messages), 1):
+            if chunk.content:
+                await asyncio.sleep(self._pace(started, tokens))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    def bind_tools(self, tools, **kwargs: Any):
+        """Tools are accepted; only scripted tool calls are ever made."""
+        return self
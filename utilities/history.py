@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from utilities.llm_registry import get_llm
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation with the new messages below. "
+    "Keep names, numbers, decisions and open questions; drop small talk. "
+    "Answer with the summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{messages}"
+)
+
+
+def _message_digest(message: BaseMessage) -> bytes:
+    tool_calls = getattr(message, "tool_calls", None) or []
+    return f"{message.type}\x00{message.content}\x00{json.dumps(tool_calls, sort_keys=True, default=str)}".encode()
+
+
+def _group_units(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Splits history into units that must be kept or dropped together.
+
+    An AI message that calls tools and the ToolMessages answering it form one
+    unit, because providers reject tool results without their tool call.
+    """
+    units = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and units:
+            units[-1].append(message)
+        else:
+            units.append([message])
+    return units
+
+
+def _is_tool_exchange(unit: List[BaseMessage]) -> bool:
+    return isinstance(unit[0], AIMessage) and bool(unit[0].tool_calls)
+
+
+class HistoryPolicy:
+    """
+    Decides which part of a conversation is sent to the LLM on each turn.
+
+    History is windowed by token budget, newest first. System messages, the
+    current turn (from the latest human message on) and the latest tool
+    exchanges are always kept. With a `summary_llm`, dropped turns are folded
+    into a running summary by that (cheaper) model. The summary is updated
+    incrementally, so each turn only summarizes the messages that newly fell
+    out of the window.
+
+    Args:
+        max_tokens (int): Token budget for the non-system history.
+        keep_tool_exchanges (int): Number of latest tool exchanges always kept.
+        summary_llm: Optional chat model used to summarize dropped turns.
+        summary_max_tokens (int): Budget reserved for the summary message.
+        token_counter: Callable counting the tokens of a list of messages.
+    """
+
+    def __init__(self, max_tokens: int = 4000, keep_tool_exchanges: int = 1, summary_llm=None,
+                 summary_max_tokens: int = 300, token_counter: Callable = count_tokens_approximately):
+        self.max_tokens = max_tokens
+        self.keep_tool_exchanges = keep_tool_exchanges
+        self.summary_llm = summary_llm
+        self.summary_max_tokens = summary_max_tokens
+        self.token_counter = token_counter
+
+        # Running summaries keyed by a hash chain over the messages they cover.
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.tokens_saved = 0
+
+    def _window(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage], List[BaseMessage]]:
+        """Returns (system messages, kept history, dropped history)."""
+        system = [m for m in messages if isinstance(m, SystemMessage)]
+        units = _group_units([m for m in messages if not isinstance(m, SystemMessage)])
+
+        pinned = set()
+        tool_units = [i for i, unit in enumerate(units) if _is_tool_exchange(unit)]
+        if self.keep_tool_exchanges > 0:
+            pinned.update(tool_units[-self.keep_tool_exchanges:])
+        # The current turn: the latest human message and everything after it
+        # (or just the last unit), so the question itself is never dropped
+        human_units = [i for i, unit in enumerate(units) if isinstance(unit[0], HumanMessage)]
+        if units:
+            pinned.update(range(human_units[-1] if human_units else len(units) - 1, len(units)))
+
+        budget = self.max_tokens - (self.summary_max_tokens if self.summary_llm is not None else 0)
+        budget -= sum(self.token_counter(units[i]) for i in pinned)
+        kept = set(pinned)
+        for i in range(len(units) - 1, -1, -1):
+            if i in kept:
+                continue
+            cost = self.token_counter(units[i])
+            if cost > budget:
+                break
+            kept.add(i)
+            budget -= cost
+
+        kept_messages = [m for i, unit in enumerate(units) if i in kept for m in unit]
+        dropped_messages = [m for i, unit in enumerate(units) if i not in kept for m in unit]
+        return system, kept_messages, dropped_messages
+
+    def _summary_plan(self, dropped: List[BaseMessage]) -> Tuple[str, str, List[BaseMessage]]:
+        """Finds the longest already-summarized prefix of `dropped`."""
+        chain, digests = hashlib.sha1(), []
+        for message in dropped:
+            chain.update(_message_digest(message))
+            digests.append(chain.hexdigest())
+        with self._lock:
+            for covered in range(len(dropped), 0, -1):
+                if digests[covered - 1] in self._summaries:
+                    self._summaries.move_to_end(digests[covered - 1])
+                    return digests[-1], self._summaries[digests[covered - 1]], dropped[covered:]
+        return digests[-1], "", dropped
+
+    def _summary_request(self, summary: str, new_messages: List[BaseMessage]) -> List[BaseMessage]:
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in new_messages if m.content)
+        return [HumanMessage(content=SUMMARY_PROMPT.format(summary=summary or "(none)", messages=transcript))]
+
+    def _store_summary(self, key: str, summary: str):
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > 1024:
+                self._summaries.popitem(last=False)
+
+    def _finish(self, messages, system, summary, kept) -> Tuple[List[BaseMessage], int]:
+        compacted = system + ([SystemMessage(content=SUMMARY_PREFIX + summary)] if summary else []) + kept
+        saved = max(0, self.token_counter(messages) - self.token_counter(compacted))
+        with self._lock:
+            self.turns += 1
+            self.tokens_saved += saved
+        return compacted, saved
+
+    def compact(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], int]:
+        """Returns the messages to send and the number of tokens saved."""
+        system, kept, dropped = self._window(messages)
+        summary = ""
+        if dropped and self.summary_llm is not None:
+            key, summary, new_messages = self._summary_plan(dropped)
+            if new_messages:
+                summary = self.summary_llm.invoke(self._summary_request(summary, new_messages)).content
+                self._store_summary(key, summary)
+        return self._finish(messages, system, summary, kept)
+
+    async def acompact(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], int]:
+        """Async version of `compact`."""
+        system, kept, dropped = self._window(messages)
+        summary = ""
+        if dropped and self.summary_llm is not None:
+            key, summary, new_messages = self._summary_plan(dropped)
+            if new_messages:
+                summary = (await self.summary_llm.ainvoke(self._summary_request(summary, new_messages))).content
+                self._store_summary(key, summary)
+        return self._finish(messages, system, summary, kept)
+
+    def stats(self) -> dict:
+        """Turns compacted and total tokens saved so far."""
+        with self._lock:
+            return {"turns": self.turns, "tokens_saved": self.tokens_saved}
+
+
+def history_policy_from_env() -> Optional[HistoryPolicy]:
+    """
+    Builds a HistoryPolicy from env vars, or None when HISTORY_MAX_TOKENS is unset.
+
+    HISTORY_SUMMARY_MODEL optionally names the cheaper model used for summaries.
+    """
+    max_tokens = os.getenv("HISTORY_MAX_TOKENS")
+    if not max_tokens:
+        return None
+    summary_model = os.getenv("HISTORY_SUMMARY_MODEL")
+    return HistoryPolicy(
+        max_tokens=int(max_tokens),
+        summary_llm=get_llm(summary_model, temperature=0) if summary_model else None,
+    )
@@ -0,0 +1,405 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is optional
+    trace = None
+
+# Set INSTRUMENTATION_TRACING=0 to skip OpenTelemetry spans even when it is installed.
+TRACING_ENABLED = trace is not None and os.getenv("INSTRUMENTATION_TRACING", "1") != "0"
+
+# USD per million (prompt, completion, cached prompt) tokens, matched by model
+# name prefix. LLM_PRICES (a JSON object of the same shape) adds or overrides models.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60, 0.075),
+    "gpt-4o": (2.50, 10.00, 1.25),
+    "gpt-4.1-mini": (0.40, 1.60, 0.10),
+    "gpt-4.1": (2.00, 8.00, 0.50),
+}
+MODEL_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, key)} {value}"]
+
+
+class Counter(_Metric):
+    """A total that only goes up."""
+    kind = "counter"
+
+    def inc(self, value: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, value: float, **labels):
+        """Sets the total from a source that keeps its own count."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def _samples(self, key: Tuple, counts) -> List[str]:
+        bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        lines = [
+            f"{self.name}_bucket{_labels(self.label_names, key, bound)} {count}"
+            for bound, count in zip(bounds, counts[:-1])
+        ]
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {counts[-1]}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {counts[-2]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format.
+
+    Collectors are callables run on every scrape to refresh metrics that
+    mirror state kept elsewhere (queue depths, counts kept by other objects).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+
+NODE_SECONDS = metrics.histogram(
+    "graph_node_duration_seconds", "Wall time of one graph node run.", ["graph", "node", "status"])
+NODE_QUEUE_SECONDS = metrics.histogram(
+    "graph_node_queue_seconds", "Time from a node becoming ready (graph start or previous step done) to it starting.",
+    ["graph", "node"])
+GRAPH_SECONDS = metrics.histogram(
+    "graph_run_duration_seconds", "Wall time of a whole graph run.", ["graph", "status"])
+LLM_SECONDS = metrics.histogram(
+    "llm_request_duration_seconds", "Wall time of one LLM call.", ["graph", "node", "model", "status"])
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "Tokens used by LLM calls; type is prompt, completion or cached_prompt.",
+    ["graph", "node", "model", "type"])
+LLM_COST = metrics.counter(
+    "llm_cost_usd_total", "Estimated LLM cost in USD from MODEL_PRICES.", ["graph", "node", "model"])
+TOOL_SECONDS = metrics.histogram(
+    "tool_duration_seconds", "Wall time of one tool call.", ["graph", "node", "tool", "status"])
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """USD cost of one call, or None for models without a known price."""
+    match = max((name for name in MODEL_PRICES if model.startswith(name)), key=len, default=None)
+    if match is None:
+        return None
+    prompt, completion, cached = MODEL_PRICES[match]
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * prompt + cached_tokens * cached + completion_tokens * completion) / 1_000_000
+
+
+class _Run:
+    __slots__ = ("kind", "graph", "node", "name", "started", "root", "span")
+
+    def __init__(self, kind: str, graph: str, node: str = "", name: str = "", root=None, span=None):
+        self.kind = kind
+        self.graph = graph
+        self.node = node
+        self.name = name
+        self.started = time.perf_counter()
+        self.root = root
+        self.span = span
+
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """
+    Callback handler recording per-node, LLM and tool metrics for graph runs.
+
+    The first run it sees in a tree is the graph itself; its name (the
+    graph's `run_name`) labels everything below it. Node runs are the
+    children of the graph named after their `langgraph_node`. LLM and tool
+    calls are attributed to the node in their metadata. When OpenTelemetry
+    is installed, each graph, node, LLM and tool run also gets a span, the
+    graph's nested under whatever span is current (e.g. the HTTP request).
+    """
+
+    run_inline = True  # cheap and thread-safe, no need for an executor hop
+
+    def __init__(self):
+        self._runs: Dict[UUID, _Run] = {}
+        self._ready: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+        self._tracer = trace.get_tracer(__name__) if TRACING_ENABLED else None
+
+    def _start_span(self, name: str, parent: Optional[_Run], attributes: dict):
+        if self._tracer is None:
+            return None
+        context = trace.set_span_in_context(parent.span) if parent is not None and parent.span is not None else None
+        return self._tracer.start_span(name, context=context, attributes=attributes)
+
+    @staticmethod
+    def _end_span(run: _Run, error: BaseException = None):
+        if run.span is None:
+            return
+        if error is not None:
+            run.span.record_exception(error)
+            run.span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+        run.span.end()
+
+    def _parent_node(self, parent_run_id: Optional[UUID]) -> Optional[_Run]:
+        return self._runs.get(parent_run_id) if parent_run_id is not None else None
+
+    # --- Graph and node runs ---
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                       metadata: Optional[dict] = None, name: Optional[str] = None, **kwargs):
+        name = name or (serialized or {}).get("name") or "graph"
+        node = (metadata or {}).get("langgraph_node")
+        now = time.perf_counter()
+        with self._lock:
+            parent = self._parent_node(parent_run_id)
+            if parent is None:
+                span = self._start_span(f"graph {name}", None, {"graph": name})
+                self._runs[run_id] = _Run("graph", name, span=span)
+                self._ready[run_id] = now
+            elif parent.kind == "graph" and node == name:
+                NODE_QUEUE_SECONDS.observe(now - self._ready.get(parent_run_id, now), graph=parent.graph, node=node)
+                span = self._start_span(f"node {node}", parent, {"graph": parent.graph, "node": node})
+                self._runs[run_id] = _Run("node", parent.graph, node, root=parent_run_id, span=span)
+            else:
+                # Anything a node runs inside (sequences, subgraphs) is labelled with that node
+                self._runs[run_id] = _Run("chain", parent.graph, parent.node, span=parent.span)
+
+    def _end_chain(self, run_id: UUID, error: BaseException = None):
+        status = "error" if error is not None else "ok"
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None or run.kind == "chain":
+                return
+            elapsed = time.perf_counter() - run.started
+            if run.kind == "graph":
+                self._ready.pop(run_id, None)
+                GRAPH_SECONDS.observe(elapsed, graph=run.graph, status=status)
+            else:
+                # The next step's nodes become ready when this step's last node ends
+                self._ready[run.root] = time.perf_counter()
+                NODE_SECONDS.observe(elapsed, graph=run.graph, node=run.node, status=status)
+        self._end_span(run, error)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs):
+        self._end_chain(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        # A node interrupted by GraphInterrupt or cancelled is still timed
+        self._end_chain(run_id, error)
+
+    # --- LLM calls ---
+    def _graph_of(self, parent_run_id: Optional[UUID], metadata: Optional[dict]) -> Tuple[Optional[_Run], str, str]:
+        parent = self._parent_node(parent_run_id)
+        if parent is None:
+            return None, "", ""
+        return parent, parent.graph, parent.node or (metadata or {}).get("langgraph_node", "")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                            metadata: Optional[dict] = None, **kwargs):
+        with self._lock:
+            parent, graph, node = self._graph_of(parent_run_id, metadata)
+            if parent is None:
+                return
+            model = (metadata or {}).get("ls_model_name") or "unknown"
+            span = self._start_span(f"llm {model}", parent, {"graph": graph, "node": node, "model": model})
+            self._runs[run_id] = _Run("llm", graph, node, model, span=span)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                     metadata: Optional[dict] = None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id, metadata=metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model = (response.llm_output or {}).get("model_name") or run.name
+        labels = {"graph": run.graph, "node": run.node, "model": model}
+        LLM_SECONDS.observe(time.perf_counter() - run.started, status="ok", **labels)
+
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if getattr(message, "usage_metadata", None):
+                    usage = message.usage_metadata
+        if usage:
+            prompt, completion = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+            cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+            LLM_TOKENS.inc(prompt, type="prompt", **labels)
+            LLM_TOKENS.inc(completion, type="completion", **labels)
+            LLM_TOKENS.inc(cached, type="cached_prompt", **labels)
+            cost = estimate_cost(model, prompt, completion, cached)
+            if cost is not None:
+                LLM_COST.inc(cost, **labels)
+            if run.span is not None:
+                run.span.set_attributes({"llm.prompt_tokens": prompt, "llm.completion_tokens": completion})
+        if run.span is not None:
+            run.span.update_name(f"llm {model}")
+        self._end_span(run)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            LLM_SECONDS.observe(time.perf_counter() - run.started, graph=run.graph, node=run.node, model=run.name, status="error")
+            self._end_span(run, error)
+
+    # --- Tool calls ---
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                      metadata: Optional[dict] = None, **kwargs):
+        with self._lock:
+            parent, graph, node = self._graph_of(parent_run_id, metadata)
+            if parent is None:
+                return
+            tool = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+            span = self._start_span(f"tool {tool}", parent, {"graph": graph, "node": node, "tool": tool})
+            self._runs[run_id] = _Run("tool", graph, node, tool, span=span)
+
+    def _end_tool(self, run_id: UUID, error: BaseException = None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            TOOL_SECONDS.observe(time.perf_counter() - run.started, graph=run.graph, node=run.node, tool=run.name,
+                                 status="error" if error is not None else "ok")
+            self._end_span(run, error)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end_tool(run_id, error)
+
+
+# One handler for every graph: LangChain skips a handler that is already
+# attached, so a graph nested in another instrumented graph isn't counted twice.
+instrumentation = GraphInstrumentation()
+
+
+def instrument(graph, name: str = None):
+    """
+    Returns `graph` with the shared instrumentation attached and, if given,
+    `name` as the run name its metrics are labelled with. Safe to call again
+    on an instrumented graph, e.g. to rename it.
+    """
+    config = {}
+    callbacks = (graph.config or {}).get("callbacks") or []
+    if instrumentation not in callbacks:
+        config["callbacks"] = [instrumentation]
+    if name:
+        config["run_name"] = name
+    return graph.with_config(config) if config else graph
+
+
+def trace_requests(app):
+    """Adds OpenTelemetry HTTP spans to a FastAPI app when the instrumentation package is installed."""
+    if not TRACING_ENABLED:
+        return
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    except ImportError:
+        return
+    FastAPIInstrumentor.instrument_app(app)
+
+
+def prometheus_response():
+    """The current metrics as a Prometheus scrape response."""
+    from fastapi.responses import Response
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Union
+import httpx
+from langchain_openai import ChatOpenAI
+from utilities.fake_llm import FakeChatModel
+from utilities.instrumentation import metrics
+from utilities.rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Set LLM_PROVIDER=fake to serve every model from an offline fake chat model,
+# e.g. for load tests. FAKE_LLM_LATENCY sets its time to first token in
+# seconds, FAKE_LLM_TOKENS_PER_SECOND its generation speed (0: instant) and
+# FAKE_LLM_SCRIPT a JSON list of scripted replies (see FakeChatModel).
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+FAKE_LLM_SCRIPT = json.loads(os.getenv("FAKE_LLM_SCRIPT", "[]"))
+
+# Connection pool settings shared by every pooled LLM client.
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# Connections opened to each provider endpoint by `awarm_llm_clients`, so the
+# first requests after startup skip the TCP and TLS handshakes.
+LLM_WARMUP_CONNECTIONS = int(os.getenv("LLM_WARMUP_CONNECTIONS", "4"))
+
+# Client-side provider limits shared by every LLM call in the process; 0 turns
+# a limit off. Failed calls are retried here, so the OpenAI SDK's own retries
+# are disabled unless a model sets `max_retries` itself.
+LLM_RATE_RPM = float(os.getenv("LLM_RATE_RPM", "0"))
+LLM_RATE_TPM = float(os.getenv("LLM_RATE_TPM", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+
+rate_limiter = RateLimiter(
+    requests_per_minute=LLM_RATE_RPM,
+    tokens_per_minute=LLM_RATE_TPM,
+    max_retries=LLM_MAX_RETRIES,
+    max_delay=LLM_RETRY_MAX_DELAY,
+)
+
+RATE_LIMITER_EVENTS = metrics.counter(
+    "llm_rate_limiter_events_total",
+    "Provider calls through the rate limiter: requests, retries, rate_limited (429s) and throttled (made to wait).",
+    ["event"])
+RATE_LIMITER_WAIT = metrics.counter(
+    "llm_rate_limiter_wait_seconds_total", "Time calls were held back by the rate limiter.")
+
+
+def _collect_rate_limiter_stats():
+    stats = rate_limiter.stats()
+    RATE_LIMITER_WAIT.set(stats.pop("wait_seconds"))
+    for event, count in stats.items():
+        RATE_LIMITER_EVENTS.set(count, event=event)
+
+
+metrics.add_collector(_collect_rate_limiter_stats)
+
+_llms = {}
+_lock = threading.Lock()
+_http_client = None
+_http_async_client = None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _http_clients():
+    """Creates the process-wide, rate-limited HTTP connection pools on first use."""
+    global _http_client, _http_async_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            transport=RateLimitedTransport(rate_limiter, httpx.HTTPTransport(limits=_pool_limits())))
+        _http_async_client = httpx.AsyncClient(
+            transport=AsyncRateLimitedTransport(rate_limiter, httpx.AsyncHTTPTransport(limits=_pool_limits())))
+    return _http_client, _http_async_client
+
+
+def _openai_llm(model: str, **params):
+    """A ChatOpenAI model on the pooled, rate-limited HTTP clients."""
+    http_client, http_async_client = _http_clients()
+    return ChatOpenAI(
+        model=model,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **{"max_retries": 0, **params},
+    )
+
+
+def _fake_llm(model: str, **params):
+    """The offline FakeChatModel configured by the FAKE_LLM_* variables."""
+    return FakeChatModel(model_name=model, latency=FAKE_LLM_LATENCY,
+                         tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND, script=FAKE_LLM_SCRIPT)
+
+
+# Provider name -> factory building a chat model from (model, **params).
+LLM_PROVIDERS = {"openai": _openai_llm, "fake": _fake_llm}
+
+_provider = LLM_PROVIDER
+
+
+def set_llm_provider(provider: Union[str, Callable]):
+    """
+    Selects where `get_llm` gets its models from and forgets the models
+    created so far.
+
+    Graphs hold on to the model they were built with, so select the
+    provider before importing or building them, e.g. at the top of a
+    benchmark or test.
+
+    Args:
+        provider: A name from LLM_PROVIDERS, or a factory called as
+            `factory(model, **params)` that returns a chat model.
+    """
+    global _provider
+    if isinstance(provider, str) and provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{provider}', expected one of {list(LLM_PROVIDERS)}")
+    with _lock:
+        _provider = provider
+        _llms.clear()
+
+
+def get_llm(model: str, **params):
+    """
+    Returns the shared chat model for a model name and parameters.
+
+    Models come from the provider chosen by LLM_PROVIDER or
+    `set_llm_provider` and are created once per distinct (model, params)
+    pair. OpenAI models share the same pooled HTTP clients, so connections
+    and TLS sessions are reused across turns, graphs and requests, and every
+    call goes through the process-wide `rate_limiter`.
+
+    Args:
+        model (str): The provider's model name, e.g. "gpt-4o".
+        **params: Extra ChatOpenAI parameters such as `temperature`.
+    """
+    key = (model, repr(sorted(params.items())))
+    with _lock:
+        if key not in _llms:
+            factory = LLM_PROVIDERS[_provider] if isinstance(_provider, str) else _provider
+            _llms[key] = factory(model, **params)
+        return _llms[key]
+
+
+# A chat completion and a stream chunk using every part of the OpenAI SDK's
+# response models that agents get back: text, tool calls and usage details.
+_SAMPLE_MESSAGE = {
+    "role": "assistant", "content": "",
+    "tool_calls": [{"id": "call_0", "type": "function", "function": {"name": "warmup", "arguments": "{}"}}],
+}
+_SAMPLE_USAGE = {
+    "prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2,
+    "prompt_tokens_details": {"cached_tokens": 0}, "completion_tokens_details": {"reasoning_tokens": 0},
+}
+_SAMPLE_COMPLETION = {
+    "id": "warmup", "object": "chat.completion", "created": 0, "model": "warmup", "usage": _SAMPLE_USAGE,
+    "choices": [{"index": 0, "finish_reason": "tool_calls", "logprobs": None, "message": _SAMPLE_MESSAGE}],
+}
+_SAMPLE_CHUNK = {
+    "id": "warmup", "object": "chat.completion.chunk", "created": 0, "model": "warmup", "usage": _SAMPLE_USAGE,
+    "choices": [{"index": 0, "finish_reason": None, "delta": {**_SAMPLE_MESSAGE, "tool_calls": [
+        {"index": 0, **_SAMPLE_MESSAGE["tool_calls"][0]}]}}],
+}
+
+
+def _build_response_models():
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk
+    for model, sample in ((ChatCompletion, _SAMPLE_COMPLETION), (ChatCompletionChunk, _SAMPLE_CHUNK)):
+        # model_validate runs pydantic's validators, which construct() skips;
+        # construct() is the SDK's own lenient parsing path, with its type caches
+        model.model_validate(sample).model_dump()
+        model.construct(**sample)
+
+
+async def awarm_llm_clients(connections: int = None) -> dict:
+    """
+    Prepares the shared models for their first requests; returns the seconds
+    each step took, by step name. Call it once the graphs are built, so their
+    models exist.
+
+    "response_models" validates, parses and dumps a sample response with the
+    OpenAI SDK's response models, which otherwise happens first while
+    handling a real response. "connections" opens `connections`
+    pooled connections to every OpenAI endpoint in use, with a (free) model
+    listing request each; they count against the rate limiter like any other
+    request. Failures are reported, not raised: the first real requests then
+    simply pay the setup themselves.
+
+    Args:
+        connections (int): Connections per endpoint; defaults to LLM_WARMUP_CONNECTIONS.
+    """
+    connections = LLM_WARMUP_CONNECTIONS if connections is None else connections
+    with _lock:
+        endpoints = {}
+        for llm in _llms.values():
+            if isinstance(llm, ChatOpenAI):
+                endpoints.setdefault(str(llm.root_async_client.base_url), llm.root_async_client)
+    timings = {}
+    if not endpoints:
+        return timings
+
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(_build_response_models)
+        timings["response_models"] = time.perf_counter() - started
+    except Exception as e:
+        logger.warning("Could not build the OpenAI response models: %s", e)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(client.models.list() for client in endpoints.values() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning("%d of %d warm-up connections failed: %s", len(errors), len(results), errors[0])
+    else:
+        timings["connections"] = time.perf_counter() - started
+    return timings
+
+
+def close_llm_clients():
+    """Closes the pooled sync connections and forgets every shared model."""
+    global _http_client, _http_async_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = _http_async_client = None
+        _llms.clear()
+
+
+async def aclose_llm_clients():
+    """Closes all pooled connections; call it from the FastAPI lifespan on shutdown."""
+    async_client = _http_async_client
+    close_llm_clients()
+    if async_client is not None:
+        await async_client.aclose()
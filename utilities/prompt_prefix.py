@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Optional
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_openai import ChatOpenAI
+
+
+class PromptPrefix:
+    """
+    The part of an agent's requests that never changes: system prompt and tools.
+
+    Tool schemas are converted once and sorted by name, so every request of
+    the agent starts with byte-identical system and tool definitions and the
+    provider's prompt cache can reuse them. `key` identifies the prefix; it
+    is sent to OpenAI as `prompt_cache_key` so requests sharing the prefix
+    are routed to the same cache.
+
+    Args:
+        system_message_content (str): The agent's system prompt.
+        tools (list): The agent's LangChain tools.
+    """
+
+    def __init__(self, system_message_content: str, tools: list):
+        self.system_message = SystemMessage(content=system_message_content)
+        self.tool_schemas = sorted(
+            (convert_to_openai_tool(tool) for tool in tools),
+            key=lambda schema: schema["function"]["name"],
+        )
+        serialized = json.dumps([system_message_content, self.tool_schemas], sort_keys=True, separators=(",", ":"))
+        self.key = hashlib.sha256(serialized.encode()).hexdigest()[:32]
+
+    def bind(self, llm):
+        """Binds the pre-converted tool schemas (and the cache key, for OpenAI) to `llm`."""
+        bound = llm.bind_tools(self.tool_schemas) if self.tool_schemas else llm
+        if isinstance(llm, ChatOpenAI):
+            bound = bound.bind(prompt_cache_key=self.key)
+        return bound
+
+    @staticmethod
+    def cached_share(message: AIMessage) -> Optional[float]:
+        """
+        The share of a request's input tokens served from the provider's prompt
+        cache, or None when the model reported no usage.
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if not usage or not usage.get("input_tokens"):
+            return None
+        cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        return cached / usage["input_tokens"]
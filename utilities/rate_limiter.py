@@ -0,0 +1,248 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+import httpx
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors.
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+class TokenBucket:
+    """
+    A budget refilled continuously at `rate_per_minute`, holding at most
+    `burst_seconds` worth of refill.
+
+    Reservations are taken immediately and may run the bucket into debt; the
+    caller then waits until the debt is paid off. Callers are thus served in
+    the order they reserved, without polling.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 1.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` and returns the seconds to wait before using it."""
+        self._refill(now)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount: float, now: float):
+        """Gives back (or, if negative, additionally takes) `amount`."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Process-wide client-side limits and retries for LLM provider calls.
+
+    Every request reserves one unit from the requests/minute bucket and its
+    estimated tokens (prompt size plus the completion budget) from the
+    tokens/minute bucket, then waits until both can cover it. Once a
+    non-streaming response reports its usage, the token bucket is corrected
+    to the actual count.
+
+    Rate-limit and server errors are retried with jittered exponential
+    backoff. A Retry-After from the provider pauses every caller, not just
+    the one that got the 429, so the requests don't all retry at once.
+    A caller cancelled while waiting (e.g. the SSE client disconnected)
+    gives its reservation back.
+
+    Args:
+        requests_per_minute (float): Request budget; 0 disables the limit.
+        tokens_per_minute (float): Token budget; 0 disables the limit.
+        max_retries (int): Retries after the first attempt.
+        base_delay (float): Backoff for the first retry, in seconds; it doubles after each one.
+        max_delay (float): Upper bound for one backoff or Retry-After wait.
+        burst_seconds (float): How many seconds of budget may be used at once.
+        completion_tokens (int): Completion estimate for requests without `max_tokens`.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0, burst_seconds: float = 1.0,
+                 completion_tokens: int = 256):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.completion_tokens = completion_tokens
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled": 0, "wait_seconds": 0.0}
+
+    def plan(self, request: httpx.Request) -> Tuple[int, bool]:
+        """Estimated tokens of a request, and whether its response is streamed."""
+        content = request.content or b""
+        try:
+            body = json.loads(content) if content else {}
+        except ValueError:
+            body = {}
+        completion = body.get("max_completion_tokens") or body.get("max_tokens") or self.completion_tokens
+        return len(content) // 4 + completion, bool(body.get("stream"))
+
+    def reserve(self, tokens: int) -> float:
+        """Reserves one request and `tokens`; returns the seconds to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._resume_at - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self._stats["requests"] += 1
+            if delay:
+                self._stats["throttled"] += 1
+                self._stats["wait_seconds"] += delay
+            return delay
+
+    def refund(self, tokens: int, requests: int = 1):
+        with self._lock:
+            now = time.monotonic()
+            if self.requests is not None:
+                self.requests.refund(requests, now)
+            if self.tokens is not None:
+                self.tokens.refund(tokens, now)
+
+    def correct(self, estimated: int, response: httpx.Response):
+        """Replaces the token estimate with the usage reported in a read response."""
+        if self.tokens is None:
+            return
+        try:
+            actual = response.json()["usage"]["total_tokens"]
+        except (ValueError, KeyError, TypeError):
+            return
+        self.refund(estimated - actual, requests=0)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """The provider's requested wait in seconds, from retry-after-ms or Retry-After."""
+        if "retry-after-ms" in response.headers:
+            try:
+                return float(response.headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        value = response.headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """
+        Seconds to wait before retrying, or None if the attempt should not be retried.
+
+        Args:
+            attempt (int): Number of retries already made.
+            response: The failed response, or None for a connection error.
+        """
+        if response is not None and response.status_code not in RETRYABLE_STATUS and response.status_code < 500:
+            return None
+        if attempt >= self.max_retries:
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = self._retry_after(response) if response is not None else None
+        with self._lock:
+            self._stats["retries"] += 1
+            if response is not None and response.status_code == 429:
+                self._stats["rate_limited"] += 1
+            if retry_after is None:
+                return backoff
+            # Everyone waits out the provider's limit; jitter spreads the restart
+            retry_after = min(self.max_delay, max(0.0, retry_after))
+            self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+            return retry_after + random.uniform(0, self.base_delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Sends requests through a RateLimiter, for the pooled sync LLM client."""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens, streaming = self.limiter.plan(request)
+        attempt = 0
+        while True:
+            time.sleep(self.limiter.reserve(tokens))
+            try:
+                response = self.transport.handle_request(request)
+            except RETRYABLE_ERRORS:
+                delay = self.limiter.retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self.limiter.retry_delay(attempt, response)
+                if delay is None:
+                    if not streaming and response.is_success and self.limiter.tokens is not None:
+                        response.read()
+                        self.limiter.correct(tokens, response)
+                    return response
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Sends requests through a RateLimiter, for the pooled async LLM client."""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens, streaming = self.limiter.plan(request)
+        attempt = 0
+        while True:
+            delay = self.limiter.reserve(tokens)
+            if delay:
+                try:
+                    await asyncio.sleep(delay)
+                except asyncio.CancelledError:
+                    # Nobody will use the reservation; let the next caller have it
+                    self.limiter.refund(tokens)
+                    raise
+            try:
+                response = await self.transport.handle_async_request(request)
+            except RETRYABLE_ERRORS:
+                delay = self.limiter.retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self.limiter.retry_delay(attempt, response)
+                if delay is None:
+                    if not streaming and response.is_success and self.limiter.tokens is not None:
+                        await response.aread()
+                        self.limiter.correct(tokens, response)
+                    return response
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
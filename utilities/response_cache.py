@@ -0,0 +1,244 @@
+import hashlib
+import json
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+
+def _normalize_text(text) -> str:
+    """Collapses whitespace so trivially different prompts share an entry."""
+    if not isinstance(text, str):
+        return json.dumps(text, sort_keys=True, default=str)
+    return " ".join(text.split())
+
+
+def _message_key(message: BaseMessage) -> list:
+    tool_calls = [[call["name"], call["args"]] for call in getattr(message, "tool_calls", None) or []]
+    content = _normalize_text(message.content)
+    if isinstance(message, HumanMessage):
+        content = content.casefold()
+    return [message.type, content, tool_calls]
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _current_turn(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """The messages after the latest human message."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i + 1:]
+    return messages
+
+
+def _fresh_copy(message: AIMessage, tier: str) -> AIMessage:
+    """
+    Copies a cached response with new message and tool call ids.
+
+    Ids must be unique within a conversation: streaming dedupes messages by
+    id and providers match tool results to calls by tool call id.
+    """
+    tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:24]}"} for call in message.tool_calls]
+    return message.model_copy(update={
+        "id": f"run-{uuid.uuid4()}",
+        "tool_calls": tool_calls,
+        "additional_kwargs": {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"},
+        "response_metadata": {
+            **{k: v for k, v in message.response_metadata.items() if k != "cached_prefix_share"},
+            "cache": tier,
+        },
+        "usage_metadata": None,
+    })
+
+
+class _VectorIndex:
+    """A small in-process cosine-similarity index over unit vectors."""
+
+    def __init__(self):
+        self._vectors = OrderedDict()
+
+    def add(self, key: str, vector: List[float]):
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        self._vectors[key] = [x / norm for x in vector]
+
+    def remove(self, key: str):
+        self._vectors.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def nearest(self, vector: List[float]) -> Tuple[Optional[str], float]:
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        query = [x / norm for x in vector]
+        best_key, best_score = None, -1.0
+        for key, candidate in self._vectors.items():
+            score = sum(a * b for a, b in zip(query, candidate))
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+
+class ResponseCache:
+    """
+    Caches an agent's LLM responses so repeated questions skip the model.
+
+    The exact tier is keyed on a hash of the agent's prompt prefix (system
+    prompt and tool schemas, passed as `namespace`) and the normalized
+    messages. With `embeddings`, a similarity tier
+    also answers paraphrases of a question asked with the same preceding
+    context, when the cosine similarity of the question reaches
+    `similarity_threshold`.
+
+    Turns that contain results of a tool in `bypass_tools` (e.g. the current
+    time) are never looked up nor stored, since their answer goes stale.
+
+    Args:
+        max_entries (int): Entries kept per tier, least recently used evicted first.
+        ttl_seconds (float): How long an entry stays valid.
+        embeddings: Optional LangChain Embeddings enabling the similarity tier.
+        similarity_threshold (float): Minimum cosine similarity for a similarity hit.
+        bypass_tools (Iterable[str]): Names of tools whose results disable caching.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, embeddings=None,
+                 similarity_threshold: float = 0.95, bypass_tools: Iterable[str] = ()):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.bypass_tools = set(bypass_tools)
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, response)
+        self._exact = OrderedDict()
+        # entry key -> (expires_at, context key, response); vectors live in per-context indexes
+        self._similar = OrderedDict()
+        self._indexes = {}
+        # Question vectors computed by a missed lookup, reused when its response is stored
+        self._recent_vectors = OrderedDict()
+        self._counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "bypassed": 0}
+
+    def _bypass(self, messages: List[BaseMessage]) -> bool:
+        return any(
+            isinstance(m, ToolMessage) and m.name in self.bypass_tools
+            for m in _current_turn(messages)
+        )
+
+    def _keys(self, messages: List[BaseMessage], namespace: str) -> Tuple[str, Optional[str], Optional[str]]:
+        """Returns (exact key, similarity context key, question) for a request."""
+        keys = [_message_key(m) for m in messages]
+        exact = _digest([namespace, keys])
+        if self.embeddings is None or not isinstance(messages[-1], HumanMessage):
+            return exact, None, None
+        return exact, _digest([namespace, keys[:-1]]), keys[-1][1]
+
+    def _get_exact(self, key: str, now: float) -> Optional[AIMessage]:
+        entry = self._exact.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._exact[key]
+            return None
+        self._exact.move_to_end(key)
+        return entry[1]
+
+    def _get_similar(self, context: str, vector: List[float], now: float) -> Optional[AIMessage]:
+        index = self._indexes.get(context)
+        if index is None:
+            return None
+        key, score = index.nearest(vector)
+        if key is None or score < self.similarity_threshold:
+            return None
+        expires_at, _, response = self._similar[key]
+        if expires_at < now:
+            self._drop_similar(key)
+            return None
+        self._similar.move_to_end(key)
+        return response
+
+    def _drop_similar(self, key: str):
+        _, context, _ = self._similar.pop(key)
+        index = self._indexes[context]
+        index.remove(key)
+        if not index:
+            del self._indexes[context]
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    async def aget(self, messages: List[BaseMessage], namespace: str = "") -> Optional[AIMessage]:
+        """
+        Returns a cached response for the request, or None.
+
+        Args:
+            messages: The conversation messages sent to the LLM after the prefix.
+            namespace: Identifies the agent's prefix, e.g. `PromptPrefix.key`.
+        """
+        if self._bypass(messages):
+            self._count("bypassed")
+            return None
+        exact, context, question = self._keys(messages, namespace)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._get_exact(exact, now)
+            if hit is not None:
+                self._counters["exact_hits"] += 1
+                return _fresh_copy(hit, "exact")
+            if context is None or context not in self._indexes:
+                self._counters["misses"] += 1
+                return None
+
+        vector = await self.embeddings.aembed_query(question)
+        with self._lock:
+            self._recent_vectors[exact] = vector
+            while len(self._recent_vectors) > 256:
+                self._recent_vectors.popitem(last=False)
+            hit = self._get_similar(context, vector, time.monotonic())
+            self._counters["similar_hits" if hit is not None else "misses"] += 1
+        return _fresh_copy(hit, "similar") if hit is not None else None
+
+    async def aput(self, messages: List[BaseMessage], response: AIMessage, namespace: str = ""):
+        """Stores a copy of the LLM's response to `messages`."""
+        if self._bypass(messages):
+            return
+        # The caller keeps its message; annotating it later must not change the entry
+        response = response.model_copy(deep=True)
+        exact, context, question = self._keys(messages, namespace)
+        vector = None
+        if context is not None:
+            with self._lock:
+                vector = self._recent_vectors.pop(exact, None)
+            if vector is None:
+                vector = await self.embeddings.aembed_query(question)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._exact[exact] = (expires_at, response)
+            self._exact.move_to_end(exact)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if vector is not None:
+                if exact in self._similar:
+                    self._drop_similar(exact)
+                self._similar[exact] = (expires_at, context, response)
+                self._indexes.setdefault(context, _VectorIndex()).add(exact, vector)
+                while len(self._similar) > self.max_entries:
+                    self._drop_similar(next(iter(self._similar)))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current entry counts."""
+        with self._lock:
+            return {**self._counters, "exact_entries": len(self._exact), "similar_entries": len(self._similar)}
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._similar.clear()
+            self._indexes.clear()
+            self._recent_vectors.clear()
@@ -0,0 +1,209 @@
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTH_NAMES = ["january", "february", "march", "april", "may", "june", "july",
+               "august", "september", "october", "november", "december"]
+
+_HOURS_LINE = re.compile(r"^\s*(\w+)\s*:\s*(.+?)\s*$")
+_TIME_RANGE = re.compile(r"(\d{1,2}(?::\d{2})?\s*[AaPp][Mm])\s*-\s*(\d{1,2}(?::\d{2})?\s*[AaPp][Mm])")
+
+# Question patterns used by the router; anything they don't cover goes to the LLM.
+_DAY_WORD = re.compile(r"\b(" + "|".join(d.lower() for d in DAY_NAMES) + r")s?\b")
+_RELATIVE_DAY = re.compile(r"\b(today|tonight|tomorrow)\b")
+_NOW = re.compile(r"\b(now|right now|currently|at the moment|at this moment)\b")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_MONTH_DATE = re.compile(r"\b(" + "|".join(MONTH_NAMES) + r")\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?\b")
+_CLOCK_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)|\b(\d{1,2}):(\d{2})\b|\b(noon|midnight)\b")
+_BARE_HOUR = re.compile(r"\bat\s+\d{1,2}\b(?!\s*(?::|am|pm|a\.m\.|p\.m\.))")
+_HOURS_INTENT = re.compile(r"\b(open|opens|opening|close|closes|closing|closed|hours)\b")
+# Wording the router can't answer with a plain open/closed: time ranges and
+# relative weeks ("before 8", "until 9", "next Sunday") and negations.
+_AMBIGUOUS = re.compile(
+    r"\b(before|after|until|till|til|by|since|between|next|last|past|previous|not|never|cannot)\b|n['’]t\b")
+# What the question is about: "the pharmacy", "does the kitchen open"; only
+# the store itself may be answered from its schedule.
+_SUBJECT = re.compile(r"\b(?:the|your|its|our)\s+([a-z][a-z-]*)|\b(?:does|do|is|are|will|was)\s+([a-z][a-z-]*)\s+(?:open|close)")
+_STORE_WORDS = {"store", "shop", "business", "you", "it", "hours", "opening", "closing", "moment", "doors"}
+
+
+def _parse_clock(text: str) -> time:
+    return datetime.strptime(text.replace(" ", "").upper(), "%I:%M%p" if ":" in text else "%I%p").time()
+
+
+def _upcoming(today: date, month: int, day: int, year: Optional[str]) -> date:
+    """A month/day date; without a year, its next occurrence from today."""
+    if year:
+        return date(int(year) + 2000 if len(year) == 2 else int(year), month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def _format_clock(value: time) -> str:
+    return value.strftime("%I:%M %p").lstrip("0")
+
+
+class WeeklySchedule:
+    """
+    Opening hours indexed by weekday (Monday is 0).
+
+    Each day holds a list of (opens, closes) intervals; closed days hold an
+    empty list.
+    """
+
+    def __init__(self, days: Dict[int, List[Tuple[time, time]]]):
+        self.days = {weekday: sorted(days.get(weekday, [])) for weekday in range(7)}
+
+    @classmethod
+    def parse(cls, text: str) -> "WeeklySchedule":
+        """
+        Parses "Monday: 9:00 AM - 5:00 PM" / "Sunday: Closed" lines.
+
+        Raises:
+            ValueError: If a line names an unknown day or has unreadable hours.
+        """
+        days = {}
+        for line in text.strip().splitlines():
+            match = _HOURS_LINE.match(line)
+            if not match:
+                continue
+            day, hours = match.group(1).capitalize(), match.group(2)
+            if day not in DAY_NAMES:
+                raise ValueError(f"Unknown day in store hours: {line!r}")
+            intervals = [(_parse_clock(a), _parse_clock(b)) for a, b in _TIME_RANGE.findall(hours)]
+            if not intervals and hours.strip().lower() != "closed":
+                raise ValueError(f"Unreadable store hours: {line!r}")
+            days[DAY_NAMES.index(day)] = intervals
+        return cls(days)
+
+    def is_open(self, moment: datetime) -> bool:
+        return any(opens <= moment.time() < closes for opens, closes in self.days[moment.weekday()])
+
+    def describe(self, weekday: int) -> str:
+        """The hours of one day, e.g. "9:00 AM - 5:00 PM", or "closed"."""
+        intervals = self.days[weekday]
+        if not intervals:
+            return "closed"
+        return ", ".join(f"{_format_clock(a)} - {_format_clock(b)}" for a, b in intervals)
+
+    def next_opening(self, moment: datetime) -> Optional[datetime]:
+        """The next time the store opens after `moment`, within a week."""
+        for offset in range(8):
+            day = moment.date() + timedelta(days=offset)
+            for opens, _ in self.days[day.weekday()]:
+                candidate = datetime.combine(day, opens)
+                if candidate > moment:
+                    return candidate
+        return None
+
+
+class StoreHoursRouter:
+    """
+    Answers common store-hours questions straight from a WeeklySchedule.
+
+    Handles "open now", "hours on <day>", "open on <day>" and "open at <time>
+    on <day or date>". Questions it can't read unambiguously (several days
+    or times, no hours-related wording, "before"/"after"/"next"/"last",
+    negations, or a subject other than the store such as "the pharmacy")
+    return None so the caller can fall back to the LLM.
+
+    Args:
+        schedule (WeeklySchedule): The store's weekly hours.
+        clock: Callable returning the current local datetime.
+    """
+
+    def __init__(self, schedule: WeeklySchedule, clock: Callable[[], datetime] = datetime.now):
+        self.schedule = schedule
+        self.clock = clock
+
+    def _day(self, question: str, today: date) -> Tuple[Optional[date], int]:
+        """Finds the single day a question refers to; returns (date, matches found)."""
+        found = []
+        for match in _RELATIVE_DAY.finditer(question):
+            found.append(today + timedelta(days=1 if match.group(1) == "tomorrow" else 0))
+        for match in _DAY_WORD.finditer(question):
+            weekday = DAY_NAMES.index(match.group(1).capitalize())
+            found.append(today + timedelta(days=(weekday - today.weekday()) % 7))
+        try:
+            for match in _ISO_DATE.finditer(question):
+                found.append(date(int(match.group(1)), int(match.group(2)), int(match.group(3))))
+            for match in _MONTH_DATE.finditer(question):
+                found.append(_upcoming(today, MONTH_NAMES.index(match.group(1)) + 1, int(match.group(2)), match.group(3)))
+            for match in _NUMERIC_DATE.finditer(question):
+                found.append(_upcoming(today, int(match.group(1)), int(match.group(2)), match.group(3)))
+        except ValueError:
+            return None, 2
+        # A weekday named next to an explicit date ("Friday, March 6") is one reference
+        distinct = set(found)
+        return (distinct.pop(), 1) if len(distinct) == 1 else (None, len(distinct))
+
+    def _time(self, question: str) -> Tuple[Optional[time], int]:
+        found = []
+        for match in _CLOCK_TIME.finditer(question):
+            if match.group(6):
+                found.append(time(12) if match.group(6) == "noon" else time(0))
+            elif match.group(3):
+                hour, minute = int(match.group(1)), int(match.group(2) or 0)
+                if not 1 <= hour <= 12 or minute > 59:
+                    return None, 2
+                hour = hour % 12 + (12 if match.group(3).startswith("p") else 0)
+                found.append(time(hour, minute))
+            else:
+                hour, minute = int(match.group(4)), int(match.group(5))
+                # Only unmistakable 24-hour times: "6:30" could be morning or evening,
+                # so like a bare "at 7" it goes to the LLM
+                if 1 <= hour <= 12 or hour > 23 or minute > 59:
+                    return None, 2
+                found.append(time(hour, minute))
+        return (found[0], 1) if len(found) == 1 else (None, len(found))
+
+    def _day_label(self, day: date, today: date) -> str:
+        if day == today:
+            return "today"
+        if day == today + timedelta(days=1):
+            return "tomorrow"
+        if day - today < timedelta(days=7) and day >= today:
+            return f"on {DAY_NAMES[day.weekday()]}"
+        return f"on {DAY_NAMES[day.weekday()]}, {day.strftime('%B')} {day.day}"
+
+    def answer(self, question: str) -> Optional[str]:
+        """Returns the answer to `question`, or None when it needs the LLM."""
+        question = question.lower()
+        if not _HOURS_INTENT.search(question) or _BARE_HOUR.search(question) or _AMBIGUOUS.search(question):
+            return None
+        subjects = {word for match in _SUBJECT.finditer(question) for word in match.groups() if word}
+        if subjects - _STORE_WORDS:
+            return None
+        now = self.clock()
+        day, days_found = self._day(question, now.date())
+        at, times_found = self._time(question)
+        asks_now = bool(_NOW.search(question))
+        if days_found > 1 or times_found > 1 or (asks_now and (days_found or times_found)):
+            return None
+
+        if asks_now:
+            if self.schedule.is_open(now):
+                return f"Yes, the store is open right now. Today's hours are {self.schedule.describe(now.weekday())}."
+            reopening = self.schedule.next_opening(now)
+            if reopening is None:
+                return "No, the store is closed right now."
+            when = self._day_label(reopening.date(), now.date())
+            return f"No, the store is closed right now. It opens {when} at {_format_clock(reopening.time())}."
+
+        if day is None:
+            return None
+        label = self._day_label(day, now.date())
+        hours = self.schedule.describe(day.weekday())
+        if at is None:
+            if hours == "closed":
+                return f"The store is closed {label}."
+            return f"The store's hours {label} are {hours}."
+
+        moment = datetime.combine(day, at)
+        if self.schedule.is_open(moment):
+            return f"Yes, the store is open at {_format_clock(at)} {label} (hours: {hours})."
+        if hours == "closed":
+            return f"No, the store is closed {label}."
+        return f"No, the store is closed at {_format_clock(at)} {label}. Hours {label} are {hours}."
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import Counter, deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import AIMessage, BaseMessage
+from utilities.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Value of a request's "mode" field that selects token-level streaming.
+TOKEN_STREAM_MODE = "tokens"
+
+# Seconds of silence after which a keep-alive comment is sent, so proxies
+# don't close streams that are idle during long tool calls.
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# Seconds between checks for a disconnected client while a stream is idle.
+SSE_DISCONNECT_POLL_INTERVAL = float(os.getenv("SSE_DISCONNECT_POLL_INTERVAL", "0.5"))
+# Seconds a run keeps going with no client attached, waiting for a reconnect,
+# before it is cancelled. 0 cancels as soon as the client disconnects.
+SSE_RESUME_GRACE = float(os.getenv("SSE_RESUME_GRACE", "5"))
+# Seconds a finished run's events stay available for replay.
+SSE_REPLAY_TTL = float(os.getenv("SSE_REPLAY_TTL", "60"))
+# Events kept per run for replay; older ones are dropped first.
+SSE_REPLAY_MAX_EVENTS = int(os.getenv("SSE_REPLAY_MAX_EVENTS", "5000"))
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+HEARTBEAT = ": keep-alive\n\n"
+
+# How streams ended: "completed", "cancelled" (no client left) or "failed";
+# "resumed" counts reconnections served from the replay buffer.
+stream_stats = Counter()
+
+SSE_STREAMS = metrics.counter("sse_streams_total", "SSE streams by outcome, and resumed reconnections.", ["outcome"])
+
+
+def _collect_stream_stats():
+    for outcome, count in stream_stats.items():
+        SSE_STREAMS.set(count, outcome=outcome)
+
+
+metrics.add_collector(_collect_stream_stats)
+
+# An event as produced by the stream generators: (event name, JSON payload).
+Event = Tuple[str, dict]
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+def format_sse(data: str, event: str = None, id: str = None) -> str:
+    """
+    Frames one Server-Sent Event. Every line of `data` gets its own `data:`
+    field, so multi-line text arrives intact.
+    """
+    fields = []
+    if id is not None:
+        fields.append(f"id: {id}")
+    if event is not None:
+        fields.append(f"event: {event}")
+    fields.extend(f"data: {line}" for line in _LINE_BREAK.split(data))
+    return "\n".join(fields) + "\n\n"
+
+
+def sse_event(event: str, data: dict, id: str = None) -> str:
+    """Formats a named Server-Sent Event with a JSON payload."""
+    return format_sse(json.dumps(data), event, id)
+
+
+def message_role(message: BaseMessage) -> str:
+    return "human" if message.type == "human" else "ai"
+
+
+def _message_chunk(payload) -> Optional[dict]:
+    """
+    A part of a message written by a node with `get_stream_writer()`, i.e. a
+    {"node", "id", "content"} payload appending `content` to message `id`.
+    Nodes use it for messages they assemble themselves, such as the writer
+    pipeline's enhanced text.
+    """
+    if isinstance(payload, dict) and {"node", "id", "content"} <= payload.keys():
+        return {"node": payload["node"], "id": payload["id"], "content": payload["content"]}
+    return None
+
+
+def _whole_message(payload) -> Optional[dict]:
+    """
+    A finished message written by a node with `get_stream_writer()`, i.e. a
+    {"node", "message"} payload, such as the writer pipeline's draft. Its
+    tokens were already streamed by the model, so token streams skip it.
+    """
+    if isinstance(payload, dict) and isinstance(payload.get("message"), BaseMessage) and "node" in payload:
+        return payload
+    return None
+
+
+async def stream_token_events(graph, graph_input: dict, config: dict = None, **stream_kwargs) -> AsyncIterator[Event]:
+    """
+    Streams a graph's LLM output token by token.
+
+    Each `token` event carries the emitting node, the id of the message being
+    generated and the new text, so clients can grow one bubble per message.
+    Message parts written by nodes (see `_message_chunk`) are sent as tokens
+    too, and the finished message is then not sent again. A final `end`
+    event marks the end of the run. Extra keyword arguments are passed on
+    to `graph.astream`.
+    """
+    streamed = set()
+    async for mode, chunk in graph.astream(graph_input, config, stream_mode=["messages", "custom"], **stream_kwargs):
+        if mode == "custom":
+            part = _message_chunk(chunk)
+            if part is not None:
+                streamed.add(part["id"])
+                yield "token", part
+            continue
+        message, metadata = chunk
+        # Chunks arrive while the model streams; a full AIMessage only shows up
+        # when the model didn't stream, so both are forwarded as tokens.
+        if isinstance(message, AIMessage) and message.content and message.id not in streamed:
+            yield "token", {
+                "node": metadata["langgraph_node"],
+                "id": message.id,
+                "content": message.content,
+            }
+    yield "end", {}
+
+
+async def stream_message_events(graph, graph_input: dict, config: dict = None,
+                                final: Callable[[List[BaseMessage]], list] = None, **stream_kwargs) -> AsyncIterator[Event]:
+    """
+    Streams the message each node adds as a `message` event
+    ({"node", "role", "content"}), then an `end` event. Message parts written
+    by nodes (see `_message_chunk`) are sent as `chunk` events
+    ({"node", "id", "content"}) as they arrive, instead of as one `message`;
+    finished messages they write (see `_whole_message`) are sent right away.
+
+    Args:
+        final: If given, the `end` event carries {"messages": final(messages)}
+            computed from the graph's final state.
+        **stream_kwargs: Passed on to `graph.astream`.
+    """
+    final_state = None
+    streamed = set()
+    stream_mode = ["updates", "custom", "values"] if final else ["updates", "custom"]
+    async for mode, chunk in graph.astream(graph_input, config, stream_mode=stream_mode, **stream_kwargs):
+        if mode == "values":
+            # The last full-state snapshot is the graph's final state
+            final_state = chunk
+            continue
+        if mode == "custom":
+            part = _message_chunk(chunk)
+            if part is not None:
+                streamed.add(part["id"])
+                yield "chunk", part
+            whole = _whole_message(chunk)
+            if whole is not None and whole["message"].id not in streamed:
+                message = whole["message"]
+                streamed.add(message.id)
+                yield "message", {"node": whole["node"], "role": message_role(message), "content": message.content}
+            continue
+        for node, update in chunk.items():
+            if isinstance(update, dict) and update.get("messages"):
+                message = update["messages"][-1]
+                if message.id not in streamed:
+                    yield "message", {"node": node, "role": message_role(message), "content": message.content}
+    yield "end", {"messages": final(final_state["messages"])} if final and final_state else {}
+
+
+class _Run:
+    """One stream's events, numbered from 1, and the task producing them."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.frames = []
+        self.first = 1
+        self.count = 0
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self.listeners = 0
+        self.abandon = None
+        self.changed = asyncio.get_running_loop().create_future()
+
+    def append(self, event: str, data: dict):
+        self.count += 1
+        self.frames.append(sse_event(event, data, f"{self.id}:{self.count}"))
+        if len(self.frames) > SSE_REPLAY_MAX_EVENTS:
+            # Drop the older half at once so trimming stays cheap per event
+            dropped = len(self.frames) // 2
+            del self.frames[:dropped]
+            self.first += dropped
+        self.notify()
+
+    def notify(self):
+        if not self.changed.done():
+            self.changed.set_result(None)
+        self.changed = asyncio.get_running_loop().create_future()
+
+    def frames_after(self, position: int) -> Optional[List[str]]:
+        """Frames numbered above `position`, or None if some were already dropped."""
+        if position + 1 < self.first:
+            return None
+        return self.frames[position + 1 - self.first:]
+
+
+class StreamHub:
+    """
+    Serves Server-Sent Event streams with heartbeats, event ids and replay.
+
+    Each stream runs as a background task whose events are framed with the
+    id "<run id>:<n>", n counting up from 1, and kept in a bounded replay
+    buffer. The response follows that buffer, sending a keep-alive comment
+    after `heartbeat_interval` seconds of silence. A client whose
+    connection drops can send the last id it saw in a `Last-Event-ID`
+    header and `resume()` continues from the next event without re-running
+    the graph.
+
+    When no client is attached, including one that never started reading
+    the response, the run is cancelled after `resume_grace` seconds, aborting its in-flight LLM call and skipping later nodes. A
+    disconnect is noticed either when the server closes the response, or by
+    polling `request.is_disconnected()` while idle, since some ASGI servers
+    only report it on the next write. Finished runs are forgotten after
+    `replay_ttl` seconds.
+
+    Args:
+        heartbeat_interval (float): Idle seconds before a keep-alive comment.
+        resume_grace (float): Seconds a run survives without any client.
+        replay_ttl (float): Seconds a finished run can still be replayed.
+        poll_interval (float): Seconds between disconnect checks while idle.
+    """
+
+    def __init__(self, heartbeat_interval: float = None, resume_grace: float = None,
+                 replay_ttl: float = None, poll_interval: float = None):
+        self.heartbeat_interval = heartbeat_interval or SSE_HEARTBEAT_INTERVAL
+        self.resume_grace = SSE_RESUME_GRACE if resume_grace is None else resume_grace
+        self.replay_ttl = SSE_REPLAY_TTL if replay_ttl is None else replay_ttl
+        self.poll_interval = poll_interval or SSE_DISCONNECT_POLL_INTERVAL
+        self._runs: Dict[str, _Run] = {}
+        self._finished = deque()
+
+    def response(self, request, events: AsyncIterator[Event], on_finish: Callable[[], None] = None) -> StreamingResponse:
+        """
+        Starts a run for `events` and returns the response that follows it.
+
+        Args:
+            request: The Starlette request being answered.
+            events: The stream's (event, payload) pairs.
+            on_finish: Called once when the run ends, however it ends.
+        """
+        self._expire()
+        run = _Run()
+        run.task = asyncio.create_task(self._pump(run, events, on_finish))
+        # Until the response starts following the run: a client gone before
+        # the body is sent never reaches `_follow`, which disarms this
+        run.abandon = asyncio.get_running_loop().call_later(
+            max(self.resume_grace, self.poll_interval), self._abandon, run)
+        self._runs[run.id] = run
+        return StreamingResponse(self._follow(request, run, 0), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    def resume(self, request) -> Optional[StreamingResponse]:
+        """
+        Continues the run named by the request's Last-Event-ID header after
+        that event, or returns None if there is no such run to resume.
+        """
+        run_id, _, position = (request.headers.get("last-event-id") or "").rpartition(":")
+        run = self._runs.get(run_id)
+        if run is None or not position.isdigit() or run.frames_after(int(position)) is None:
+            return None
+        stream_stats["resumed"] += 1
+        return StreamingResponse(self._follow(request, run, int(position)), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    async def _pump(self, run: _Run, events: AsyncIterator[Event], on_finish: Optional[Callable[[], None]]):
+        outcome = "cancelled"
+        try:
+            async for event, data in events:
+                run.append(event, data)
+            outcome = "completed"
+        except Exception as e:
+            outcome = "failed"
+            logger.warning("Stream %s failed: %s", run.id, e)
+            run.append("error", {"error": str(e)})
+        finally:
+            run.done = True
+            run.notify()
+            self._finished.append((time.monotonic() + self.replay_ttl, run.id))
+            stream_stats[outcome] += 1
+            if on_finish is not None:
+                on_finish()
+
+    async def _follow(self, request, run: _Run, position: int) -> AsyncIterator[str]:
+        """Sends the run's frames after `position` as they arrive, with heartbeats."""
+        run.listeners += 1
+        if run.abandon is not None:
+            run.abandon.cancel()
+            run.abandon = None
+        last_write = time.monotonic()
+        try:
+            while True:
+                frames = run.frames_after(position)
+                if frames is None:
+                    # Fell behind the replay buffer; continue from the oldest kept event
+                    position = run.first - 1
+                    continue
+                if frames:
+                    position += len(frames)
+                    last_write = time.monotonic()
+                    yield "".join(frames)
+                    continue
+                if run.done:
+                    return
+                try:
+                    await asyncio.wait_for(asyncio.shield(run.changed), self.poll_interval)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    if time.monotonic() - last_write >= self.heartbeat_interval:
+                        last_write = time.monotonic()
+                        yield HEARTBEAT
+        finally:
+            run.listeners -= 1
+            if run.listeners == 0 and not run.done:
+                self._detach(run)
+
+    def _detach(self, run: _Run):
+        """The last client left: cancel the run unless one reconnects in time."""
+        if self.resume_grace <= 0:
+            run.task.cancel()
+        else:
+            run.abandon = asyncio.get_running_loop().call_later(self.resume_grace, self._abandon, run)
+
+    @staticmethod
+    def _abandon(run: _Run):
+        run.abandon = None
+        if run.listeners == 0 and not run.done:
+            run.task.cancel()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._finished and self._finished[0][0] <= now:
+            self._runs.pop(self._finished.popleft()[1], None)
+
+    async def aclose(self):
+        """Cancels every running stream; call it from the FastAPI lifespan on shutdown."""
+        tasks = [run.task for run in self._runs.values() if not run.done]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._runs.clear()
+        self._finished.clear()
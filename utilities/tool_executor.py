@@ -0,0 +1,131 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Union
+from langchain_core.messages import ToolMessage
+
+# Default time budget (in seconds) for a single tool call.
+DEFAULT_TOOL_TIMEOUT = 30.0
+
+# Bounded pool shared by every agent for running synchronous tools. A thread
+# can't be interrupted: a sync tool that times out keeps its worker until it
+# returns by itself, so size the pool for the slow calls that may pile up
+# (e.g. requests per second x worst-case tool duration) on top of normal load.
+TOOL_POOL_WORKERS = int(os.getenv("TOOL_POOL_WORKERS", "8"))
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_POOL_WORKERS, thread_name_prefix="agent-tool")
+
+ToolTimeouts = Union[float, Dict[str, float], None]
+
+
+def _timeout_for(tool_name: str, timeouts: ToolTimeouts) -> float:
+    """Resolves the timeout for a tool from a global value or a per-tool mapping."""
+    if isinstance(timeouts, dict):
+        return timeouts.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+    if timeouts is None:
+        return DEFAULT_TOOL_TIMEOUT
+    return timeouts
+
+
+def _is_async_tool(tool) -> bool:
+    """True for tools that only provide a coroutine implementation."""
+    return getattr(tool, "coroutine", None) is not None and getattr(tool, "func", None) is None
+
+
+def _run_tool_sync(tool, tool_input: dict):
+    """Runs a tool from a pool thread, driving async-only tools on a private loop."""
+    if _is_async_tool(tool):
+        return asyncio.run(tool.ainvoke(tool_input))
+    return tool.invoke(tool_input)
+
+
+def _tool_message(tool_call: dict, content, status: str = "success") -> ToolMessage:
+    return ToolMessage(
+        content=str(content),
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status=status,
+    )
+
+
+def execute_tool_calls(tool_calls: List[dict], tool_map: dict, timeouts: ToolTimeouts = None) -> List[ToolMessage]:
+    """
+    Executes every tool call of an AI message concurrently.
+
+    A call that times out is reported as an error right away, but a sync
+    tool that is already running can't be stopped: it holds its pool worker
+    until it finishes (see TOOL_POOL_WORKERS). Only calls still queued are
+    cancelled.
+
+    Args:
+        tool_calls (list): The `tool_calls` of the AI message.
+        tool_map (dict): Tool name to LangChain tool.
+        timeouts: Seconds allowed per call, either one value for all tools
+            or a mapping of tool name to seconds.
+
+    Returns:
+        One ToolMessage per tool call, in the original order.
+    """
+    started = time.monotonic()
+    futures = [
+        # Each call runs in a copy of the caller's context so tool callbacks
+        # (tracing, instrumentation) see the node's run as their parent
+        _tool_pool.submit(contextvars.copy_context().run, _run_tool_sync, tool_map[call["name"]], call["args"])
+        if call["name"] in tool_map else None
+        for call in tool_calls
+    ]
+
+    results = []
+    for tool_call, future in zip(tool_calls, futures):
+        tool_name = tool_call["name"]
+        if future is None:
+            results.append(_tool_message(tool_call, f"Unknown tool: {tool_name}", "error"))
+            continue
+
+        # All calls start together, so each deadline is measured from submission.
+        timeout = _timeout_for(tool_name, timeouts)
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            results.append(_tool_message(tool_call, future.result(timeout=remaining)))
+        except FutureTimeoutError:
+            # Drops the call if it is still queued; a running one finishes in the background
+            future.cancel()
+            results.append(_tool_message(tool_call, f"Tool '{tool_name}' timed out after {timeout}s", "error"))
+        except Exception as e:
+            results.append(_tool_message(tool_call, f"Error running tool '{tool_name}': {e}", "error"))
+    return results
+
+
+async def aexecute_tool_calls(tool_calls: List[dict], tool_map: dict, timeouts: ToolTimeouts = None) -> List[ToolMessage]:
+    """
+    Async version of `execute_tool_calls`.
+
+    Async tools run on the event loop and are cancelled when they time out;
+    sync tools run in the bounded tool pool, where a timed-out call keeps its
+    worker until it returns.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def run_one(tool_call: dict) -> ToolMessage:
+        tool_name = tool_call["name"]
+        tool = tool_map.get(tool_name)
+        if tool is None:
+            return _tool_message(tool_call, f"Unknown tool: {tool_name}", "error")
+
+        if getattr(tool, "coroutine", None) is not None:
+            pending = tool.ainvoke(tool_call["args"])
+        else:
+            # run_in_executor doesn't carry contextvars over; without them the
+            # tool's callbacks would lose the node's run as their parent
+            pending = loop.run_in_executor(_tool_pool, contextvars.copy_context().run, tool.invoke, tool_call["args"])
+
+        timeout = _timeout_for(tool_name, timeouts)
+        try:
+            return _tool_message(tool_call, await asyncio.wait_for(pending, timeout))
+        except asyncio.TimeoutError:
+            return _tool_message(tool_call, f"Tool '{tool_name}' timed out after {timeout}s", "error")
+        except Exception as e:
+            return _tool_message(tool_call, f"Error running tool '{tool_name}': {e}", "error")
+
+    return list(await asyncio.gather(*(run_one(call) for call in tool_calls)))
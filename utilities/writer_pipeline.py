@@ -0,0 +1,144 @@
+import asyncio
+import os
+import re
+import uuid
+from typing import Annotated, List, Optional, Tuple, TypedDict
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, message_chunk_to_message
+from langgraph.config import get_stream_writer
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+# Set WRITER_PIPELINE=1 to let the enhancer rewrite the writer's text paragraph
+# by paragraph while the writer is still generating.
+WRITER_PIPELINE = os.getenv("WRITER_PIPELINE", "0") == "1"
+# Pieces handed to the enhancer are cut at paragraph breaks once they reach
+# MIN_CHARS, or at a sentence end once they reach MAX_CHARS without one.
+WRITER_PIPELINE_MIN_CHARS = int(os.getenv("WRITER_PIPELINE_MIN_CHARS", "300"))
+WRITER_PIPELINE_MAX_CHARS = int(os.getenv("WRITER_PIPELINE_MAX_CHARS", "2000"))
+# Enhancer calls running at once per answer; later pieces wait their turn.
+WRITER_PIPELINE_MAX_ENHANCERS = int(os.getenv("WRITER_PIPELINE_MAX_ENHANCERS", "4"))
+
+_SENTENCE_END = re.compile(r"[.!?]\s")
+
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+
+
+def split_piece(text: str, min_chars: int, max_chars: int) -> Tuple[Optional[str], str]:
+    """
+    Cuts the next piece for the enhancer off the start of `text`.
+
+    Returns (piece, rest), with piece None while `text` has no complete
+    paragraph of at least `min_chars`, or over `max_chars`, yet.
+    """
+    cut = text.rfind("\n\n")
+    if cut < min_chars and len(text) >= max_chars:
+        sentences = [match.end() for match in _SENTENCE_END.finditer(text)]
+        cut = sentences[-1] if sentences else len(text)
+    elif cut < min_chars:
+        return None, text
+    return text[:cut].strip(), text[cut:].lstrip()
+
+
+def create_writer_graph(llm, enhance_prompt: str, pipelined: bool = None,
+                        min_chars: int = None, max_chars: int = None, max_enhancers: int = None):
+    """
+    Builds the writer -> enhancer graph: `writer` answers the conversation
+    and `enhancer` rewrites the answer with `enhance_prompt`.
+
+    Sequentially, `enhancer` is a second node that starts once the writer is
+    done. Pipelined, a single `writer` node streams the writer's answer and
+    sends each finished piece (see `split_piece`) to the enhancer right away,
+    so the two overlap and a long answer takes about as long as the slower
+    of the two rather than their sum. At most `max_enhancers` pieces are
+    enhanced at once. The finished draft and the enhanced pieces are written
+    to the stream, in order, as soon as they and the pieces before them are
+    done (see utilities/streaming.py); the final state holds the writer's
+    draft and the joined enhanced text, as with the sequential graph.
+
+    Args:
+        llm: Chat model used by both steps.
+        enhance_prompt (str): Prompt for the enhancer, with a `{text}` field.
+        pipelined (bool): Overlap the two steps; defaults to WRITER_PIPELINE.
+        min_chars (int): Smallest piece sent to the enhancer.
+        max_chars (int): Largest piece, when the writer produces no paragraph break.
+        max_enhancers (int): Enhancer calls running at once.
+    """
+    pipelined = WRITER_PIPELINE if pipelined is None else pipelined
+    min_chars = min_chars or WRITER_PIPELINE_MIN_CHARS
+    max_chars = max_chars or WRITER_PIPELINE_MAX_CHARS
+    max_enhancers = max_enhancers or WRITER_PIPELINE_MAX_ENHANCERS
+
+    async def writer(state: State) -> State:
+        resp = await llm.ainvoke(state["messages"])
+        return {"messages": [resp]}
+
+    async def enhancer(state: State) -> State:
+        last_msg = state["messages"][-1].content
+        resp = await llm.ainvoke([HumanMessage(content=enhance_prompt.format(text=last_msg))])
+        return {"messages": [resp]}
+
+    async def pipelined_writer(state: State) -> State:
+        write = get_stream_writer()
+        enhanced_id = f"run-{uuid.uuid4()}"
+        pending = asyncio.Queue()
+        slots = asyncio.Semaphore(max_enhancers)
+        tasks, parts = [], []
+
+        async def run_enhancer(piece: str):
+            # Enhancer tokens of parallel pieces would interleave, so they aren't
+            # streamed; each piece is written whole once it is ready.
+            async with slots:
+                prompt = [HumanMessage(content=enhance_prompt.format(text=piece))]
+                return await llm.ainvoke(prompt, {"tags": [TAG_NOSTREAM]})
+
+        def enhance(piece: str):
+            task = asyncio.create_task(run_enhancer(piece))
+            tasks.append(task)
+            pending.put_nowait(task)
+
+        async def emit():
+            while (task := await pending.get()) is not None:
+                text = (await task).content
+                write({"node": "enhancer", "id": enhanced_id, "content": ("\n\n" if parts else "") + text})
+                parts.append(text)
+
+        emitter = asyncio.create_task(emit())
+        try:
+            draft, buffer = None, ""
+            async for chunk in llm.astream(state["messages"]):
+                draft = chunk if draft is None else draft + chunk
+                # Tool-call and usage-only chunks carry no text
+                buffer += chunk.content if isinstance(chunk.content, str) else ""
+                piece, buffer = split_piece(buffer, min_chars, max_chars)
+                if piece:
+                    enhance(piece)
+            if buffer.strip():
+                enhance(buffer.strip())
+            pending.put_nowait(None)
+            draft = message_chunk_to_message(draft) if draft is not None else AIMessage(content="")
+            # Message-mode clients get the draft now, not only with the final update
+            write({"node": "writer", "message": draft})
+            await emitter
+        finally:
+            # A cancelled run (e.g. the client left) stops every enhancer call
+            emitter.cancel()
+            for task in tasks:
+                task.cancel()
+        enhanced = AIMessage(content="\n\n".join(parts), id=enhanced_id)
+        return {"messages": [draft, enhanced]}
+
+    graph = StateGraph(State)
+    if pipelined:
+        graph.add_node("writer", pipelined_writer)
+        graph.add_edge(START, "writer")
+        graph.add_edge("writer", END)
+    else:
+        graph.add_node("writer", writer)
+        graph.add_node("enhancer", enhancer)
+        graph.add_edge(START, "writer")
+        graph.add_edge("writer", "enhancer")
+        graph.add_edge("enhancer", END)
+    return graph.compile()